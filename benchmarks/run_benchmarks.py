@@ -0,0 +1,257 @@
+"""색인(로드/분할/저장)과 질문 응답의 처리량, 지연 시간, 최대 RSS 측정
+
+외부 서비스 대신 benchmarks/stand_ins.py의 로컬 GitBook/Confluence 서버, 해싱 임베딩,
+스트리밍 채팅 모델을 사용하므로 네트워크나 API 키 없이 항상 같은 입력으로 실행됩니다.
+코퍼스 크기와 단계마다 별도 프로세스에서 측정하여 단계별 최대 RSS를 구하고,
+결과를 저장된 기준(baseline)과 비교하여 허용 범위를 넘은 항목을 회귀로 표시합니다.
+sync_db 단계는 실제 빌드와 같은 경로(분할/임베딩/저장 파이프라인, 임베딩 스케줄러,
+디스크 임베딩 캐시)로 색인하며, 임베딩 호출마다 --embedding-latency초 지연합니다.
+
+기준 결과는 기기마다 다르므로 저장소에 두지 않고, 비교할 기기에서 기준 커밋으로 먼저 만듭니다:
+
+    git stash && python benchmarks/run_benchmarks.py --update-baseline && git stash pop
+    python benchmarks/run_benchmarks.py --sizes 50,200,800 --output results.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import subprocess
+
+BENCHMARK_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_DIRECTORY, '..', 'src'))
+sys.path.insert(0, BENCHMARK_DIRECTORY)
+
+# config는 import 시점에 필수 환경 변수를 읽으므로 다른 모듈보다 먼저 더미 값을 설정
+for name in ('OPENAI_API_KEY', 'CONFLUENCE_PRIVATE_API_KEY', 'CONFLUENCE_SPACE_KEY', 'EMAIL_ADRESS'):
+    os.environ.setdefault(name, 'benchmark')
+os.environ.setdefault('CONFLUENCE_SPACE_NAME', 'http://127.0.0.1/wiki')
+os.environ.setdefault('ANONYMIZED_TELEMETRY', 'False')
+
+import numpy as np
+
+STAGES = ('gitbook_load', 'confluence_load', 'split_docs', 'sync_db', 'retrieval_qa_inference')
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIRECTORY, 'baseline.json')
+# 기준보다 나빠지면 회귀로 보는 지표 (True: 클수록 나쁨)
+COMPARED_METRICS = {'p50_ms': True, 'p95_ms': True, 'throughput': False, 'peak_rss_mb': True}
+
+
+def peak_rss_mb():
+    """현재 프로세스의 최대 RSS (MB, Linux의 ru_maxrss는 KB 단위)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def summarize(stage, size, items, seconds, latencies):
+    latencies_ms = np.asarray(latencies, dtype=np.float64) * 1000
+    return {
+        'stage': stage,
+        'size': size,
+        'items': items,
+        'seconds': seconds,
+        'throughput': items / seconds if seconds else None,
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p95_ms': float(np.percentile(latencies_ms, 95)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def timed(latencies, fn):
+    """호출마다 걸린 시간을 latencies에 기록하는 래퍼"""
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+    return wrapper
+
+
+def load_gitbook(args, timed_pages=None):
+    from load_db import GitBookLoader
+    loader = GitBookLoader(args.sitemap, requests_per_second=0, cache_directory=None)
+    if timed_pages is not None:
+        loader.fetch_page = timed(timed_pages, loader.fetch_page)
+    return loader.load()
+
+
+def run_stage(args):
+    """단계 하나를 측정 (자식 프로세스에서 실행, 측정 대상이 아닌 준비 과정은 시간에서 제외)"""
+    from stand_ins import FakeEmbeddings, FakeStreamingChatModel, make_questions
+    embeddings = FakeEmbeddings(latency=args.embedding_latency)
+    latencies = []
+
+    if args.child == 'gitbook_load':
+        start = time.perf_counter()
+        docs = load_gitbook(args, latencies)
+        return summarize(args.child, args.size, len(docs), time.perf_counter() - start, latencies)
+
+    if args.child == 'confluence_load':
+        from confluence_sync import ConfluenceSync
+        sync = ConfluenceSync(
+            url=args.confluence, username=None, api_key=None, space_key='BENCH',
+            state_path=os.path.join(args.directory, 'confluence_state.json'), requests_per_second=0
+        )
+        sync.fetch_page = timed(latencies, sync.fetch_page)
+        start = time.perf_counter()
+        docs = sync.sync(full=True).documents
+        return summarize(args.child, args.size, len(docs), time.perf_counter() - start, latencies)
+
+    from load_db import DataLoader
+    loader = DataLoader(persist_directory=os.path.join(args.directory, 'db'), document_source='gitbook')
+    docs = load_gitbook(args)
+
+    if args.child == 'split_docs':
+        chunks = 0
+        for _ in range(args.repeat):
+            run_start = time.perf_counter()
+            chunks = len(loader.split_docs([doc.model_copy(deep=True) for doc in docs]))
+            latencies.append(time.perf_counter() - run_start)
+        # 처리량은 반복 실행의 중앙값 기준 (문서/초)
+        return summarize(args.child, args.size, len(docs), float(np.median(latencies)), latencies) | {'chunks': chunks}
+
+    if args.child == 'sync_db':
+        from embedding_cache import CachedEmbeddings
+        from index_manifest import IndexManifest
+        # 실제 빌드처럼 디스크 캐시로 감싼 임베딩을 스케줄러가 동시에 호출 (지연 시간은 임베딩 요청별)
+        embeddings.embed_documents = timed(latencies, embeddings.embed_documents)
+        cached = CachedEmbeddings(embeddings, cache_path=os.path.join(args.directory, 'sync_cache.sqlite3'))
+        directory = os.path.join(args.directory, 'sync')
+        db = loader.load_from_db(cached, directory)
+        start = time.perf_counter()
+        db = loader.sync_db(db, iter(docs), IndexManifest(directory).load(), cached)
+        chunks = db._collection.count()
+        return summarize(args.child, args.size, chunks, time.perf_counter() - start, latencies)
+
+    if args.child == 'retrieval_qa_inference':
+        import help_desk
+        help_desk.create_embeddings = lambda: embeddings
+        help_desk.HelpDesk.get_llm = lambda self: FakeStreamingChatModel(
+            first_token_delay=args.llm_latency, token_delay=args.llm_latency / 10
+        )
+        model = help_desk.HelpDesk(new_db=True)
+        questions = make_questions(args.queries)
+        model.retrieval_qa_inference(questions[0], verbose=False)  # 워밍업 (클라이언트 생성)
+        model.answer_cache = None
+        inference = timed(latencies, model.retrieval_qa_inference)
+        start = time.perf_counter()
+        for question in questions:
+            inference(question, verbose=False)
+        return summarize(args.child, args.size, len(questions), time.perf_counter() - start, latencies)
+
+    raise ValueError(f"알 수 없는 단계: {args.child}")
+
+
+def compare(results, baseline, tolerance):
+    """기준 대비 tolerance 비율 이상 나빠진 (항목, 지표, 기준값, 현재값) 목록"""
+    previous = {(r['size'], r['stage']): r for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        base = previous.get((result['size'], result['stage']))
+        if base is None:
+            continue
+        for metric, higher_is_worse in COMPARED_METRICS.items():
+            old, new = base.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old if higher_is_worse else (old - new) / old
+            if change > tolerance:
+                regressions.append((f"{result['size']}/{result['stage']}", metric, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='50,200,800', help="쉼표로 구분한 코퍼스 크기 (페이지 수)")
+    parser.add_argument('--stages', default=','.join(STAGES), help="측정할 단계")
+    parser.add_argument('--queries', type=int, default=50, help="retrieval_qa_inference 질문 수")
+    parser.add_argument('--repeat', type=int, default=5, help="split_docs 반복 횟수")
+    parser.add_argument('--embedding-latency', type=float, default=0.02, help="임베딩 호출당 지연 시간(초)")
+    parser.add_argument('--llm-latency', type=float, default=0.0, help="LLM 첫 토큰 지연 시간(초)")
+    parser.add_argument('--output', help="결과를 저장할 JSON 경로")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="비교할 기준 결과 JSON")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="회귀로 볼 기준 대비 악화 비율")
+    parser.add_argument('--update-baseline', action='store_true', help="현재 결과를 기준으로 저장")
+    parser.add_argument('--child', choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument('--size', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--sitemap', help=argparse.SUPPRESS)
+    parser.add_argument('--confluence', help=argparse.SUPPRESS)
+    parser.add_argument('--directory', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_stage(args)))
+        return
+
+    from stand_ins import StandInServer
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    stages = [stage for stage in args.stages.split(',') if stage]
+    results = []
+    with StandInServer() as server:
+        for size in sizes:
+            for stage in stages:
+                directory = tempfile.mkdtemp(prefix=f'benchmark_{size}_{stage}_')
+                # 상대 경로 기본값(./db/...)이 임시 디렉토리 아래에 생기도록 작업 디렉토리를 옮기고,
+                # HelpDesk가 사용하는 설정은 로컬 서버를 가리키도록 환경 변수로 전달
+                env = dict(
+                    os.environ,
+                    DOCUMENT_SOURCE='gitbook', GITBOOK_SITEMAP=server.sitemap_url(size),
+                    GITBOOK_REQUESTS_PER_SECOND='0', GITBOOK_CACHE_DIRECTORY='',
+                    EMBEDDING_CACHE_PATH=os.path.join(directory, 'embedding_cache.sqlite3'),
+                )
+                command = [
+                    sys.executable, os.path.abspath(__file__), '--child', stage, '--size', str(size),
+                    '--sitemap', server.sitemap_url(size), '--confluence', server.confluence_url(size),
+                    '--directory', directory, '--queries', str(args.queries), '--repeat', str(args.repeat),
+                    '--embedding-latency', str(args.embedding_latency), '--llm-latency', str(args.llm_latency),
+                ]
+                try:
+                    completed = subprocess.run(command, cwd=directory, env=env, capture_output=True, text=True)
+                    if completed.returncode != 0:
+                        print(completed.stderr[-2000:], file=sys.stderr)
+                        raise SystemExit(f"{size}/{stage} 측정 실패")
+                    result = json.loads(completed.stdout.strip().splitlines()[-1])
+                finally:
+                    shutil.rmtree(directory, ignore_errors=True)
+                results.append(result)
+                print(f"{size:>6} {stage:<24}{result['items']:>7} 건 {result['throughput']:>10.1f}/s "
+                      f"p50 {result['p50_ms']:>9.2f}ms p95 {result['p95_ms']:>9.2f}ms "
+                      f"p99 {result['p99_ms']:>9.2f}ms RSS {result['peak_rss_mb']:>7.1f}MB")
+
+    report = {
+        'params': {key: value for key, value in vars(args).items()
+                   if key not in ('child', 'size', 'sitemap', 'confluence', 'directory')},
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"기준 결과를 저장했습니다: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"기준 결과가 없어 비교를 생략합니다: {args.baseline} "
+              f"(기준 커밋에서 --update-baseline으로 먼저 만드세요)")
+        return
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    if not regressions:
+        print(f"기준 대비 {args.tolerance:.0%} 이상 나빠진 항목이 없습니다.")
+        return
+    print(f"기준 대비 {args.tolerance:.0%} 이상 나빠진 항목:")
+    for name, metric, old, new in regressions:
+        print(f"  {name} {metric}: {old:.2f} -> {new:.2f}")
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+"""벤치마크용 결정적 대역 (외부 API/네트워크 없이 같은 입력에 항상 같은 결과)
+
+- FakeEmbeddings: 토큰 해싱으로 만든 정규화 벡터 (비슷한 글은 비슷한 벡터)
+- FakeStreamingChatModel: 프롬프트 해시로 정해진 답변을 단어 단위로 스트리밍
+- StandInServer: 합성 GitBook 사이트맵/페이지와 Confluence REST API를 제공하는 로컬 HTTP 서버
+"""
+import json
+import time
+import hashlib
+import threading
+from typing import Any, Iterator, List, Optional
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import Field
+
+from lexical_index import tokenize
+
+VOCABULARY = [
+    '회원가입', '로그인', '비밀번호', '인증', '문자', '이메일', '계정', '탈퇴', '설정', '알림',
+    '친구', '대화', '메시지', '사진', '동영상', '파일', '저장', '삭제', '복구', '백업',
+    '캘린더', '일정', '공유', '초대', '그룹', '채널', '보안', '프라이버시', '차단', '신고',
+    '결제', '환불', '구독', '쿠폰', '포인트', '업데이트', '버전', '오류', '네트워크', '데이터',
+    'FETA', 'iOS', 'Android', 'PC', 'QR', 'PIN', '2FA', 'Wi-Fi', 'LTE', 'FAQ',
+]
+ENDINGS = ['합니다.', '할 수 있습니다.', '해 주세요.', '됩니다.', '하지 않습니다.', '를 확인하세요.']
+
+
+def stable_seed(*parts):
+    """실행마다 달라지는 hash() 대신 SHA-256으로 만든 시드"""
+    digest = hashlib.sha256('\x00'.join(str(part) for part in parts).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'little')
+
+
+def make_sentence(rng, words=8):
+    picks = rng.choice(len(VOCABULARY), size=words)
+    return ' '.join(VOCABULARY[i] for i in picks) + ' ' + ENDINGS[int(rng.integers(len(ENDINGS)))]
+
+
+def make_page(index, sections=4, paragraphs=3, sentences=4):
+    """페이지 번호로 정해지는 (제목, [(소제목, 본문)]) 합성 페이지"""
+    rng = np.random.default_rng(stable_seed('page', index))
+    title = f"{VOCABULARY[index % len(VOCABULARY)]} 안내 {index}"
+    body = []
+    for s in range(sections):
+        heading = f"{VOCABULARY[int(rng.integers(len(VOCABULARY)))]} {s + 1}"
+        text = '\n\n'.join(
+            ' '.join(make_sentence(rng) for _ in range(sentences)) for _ in range(paragraphs)
+        )
+        body.append((heading, text))
+    return title, body
+
+
+def make_questions(count, seed=0):
+    rng = np.random.default_rng(stable_seed('questions', seed))
+    return [
+        ' '.join(VOCABULARY[i] for i in rng.choice(len(VOCABULARY), size=3, replace=False)) + ' 어떻게 하나요?'
+        for _ in range(count)
+    ]
+
+
+def render_html(title, sections):
+    parts = [f"<h1>{title}</h1>"]
+    for i, (heading, text) in enumerate(sections):
+        parts.append(f"<h{2 if i % 2 == 0 else 3}>{heading}</h{2 if i % 2 == 0 else 3}>")
+        parts.extend(f"<p>{paragraph}</p>" for paragraph in text.split('\n\n'))
+    return '\n'.join(parts)
+
+
+class FakeEmbeddings(Embeddings):
+    """토큰 해싱(feature hashing) 임베딩
+
+    lexical_index.tokenize의 토큰마다 고정된 차원에 ±1을 더해 정규화하므로 같은
+    단어를 공유하는 글끼리 유사도가 높습니다. latency초만큼 호출마다 지연할 수 있습니다.
+    """
+
+    def __init__(self, size=256, latency=0.0):
+        self.size = size
+        self.latency = latency
+
+    def embed(self, text):
+        vector = np.zeros(self.size, dtype=np.float32)
+        for token in tokenize(text):
+            seed = stable_seed('token', token)
+            vector[seed % self.size] += 1.0 if (seed >> 32) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            vector[0] = 1.0
+            norm = 1.0
+        return (vector / norm).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency:
+            time.sleep(self.latency)
+        return [self.embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.latency:
+            time.sleep(self.latency)
+        return self.embed(text)
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """프롬프트 해시로 정해지는 답변을 단어 단위로 스트리밍하는 채팅 모델
+
+    first_token_delay초 뒤 첫 단어를, 이후 token_delay초마다 한 단어씩 반환합니다.
+    받은 프롬프트(마지막 메시지)는 호출 순서대로 prompts에 기록됩니다.
+    """
+
+    answer_words: int = 40
+    first_token_delay: float = 0.0
+    token_delay: float = 0.0
+    prompts: List[str] = Field(default_factory=list)
+
+    @property
+    def _llm_type(self) -> str:
+        return 'fake-streaming-chat'
+
+    def _answer_words(self, messages: List[BaseMessage]) -> List[str]:
+        self.prompts.append(messages[-1].content if messages else '')
+        rng = np.random.default_rng(stable_seed('answer', messages[-1].content if messages else ''))
+        return [VOCABULARY[i] for i in rng.choice(len(VOCABULARY), size=self.answer_words)]
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        words = self._answer_words(messages)
+        time.sleep(self.first_token_delay + self.token_delay * max(0, len(words) - 1))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=' '.join(words)))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        for i, word in enumerate(self._answer_words(messages)):
+            time.sleep(self.first_token_delay if i == 0 else self.token_delay)
+            text = word if i == 0 else ' ' + word
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text))
+            if run_manager:
+                run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """/{n}/sitemap.xml, /{n}/page-{i} (GitBook)와 /wiki/{n}/rest/api/content[/{id}] (Confluence)
+
+    n은 코퍼스 크기(페이지 수)이며, 같은 번호의 페이지는 크기와 관계없이 같은 내용입니다.
+    Confluence 페이지의 버전은 서버의 page_versions(기본 1)를 따르고, failing_pages의
+    페이지 본문 요청은 500으로 응답합니다. 서버의 max_page_size가 있으면 페이지 목록의
+    limit을 그 값으로 줄여 응답합니다.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    # 헤더와 본문을 따로 쓰므로 Nagle 알고리즘을 끄지 않으면 keep-alive 요청마다 지연 ACK(~40ms)만큼 늦어짐
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def send_body(self, body, content_type):
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = url.path.strip('/').split('/')
+        try:
+            if parts[0] == 'wiki':
+                self.confluence(int(parts[1]), parts[2:], parse_qs(url.query))
+            elif parts[1] == 'sitemap.xml':
+                self.sitemap(int(parts[0]))
+            else:
+                index = int(parts[1].removeprefix('page-'))
+                title, sections = make_page(index)
+                html = (f'<html lang="ko"><head><title>{title}</title>'
+                        f'<meta name="description" content="{title}"></head>'
+                        f'<body>{render_html(title, sections)}</body></html>')
+                self.send_body(html, 'text/html; charset=utf-8')
+        except (IndexError, ValueError):
+            self.send_error(404)
+
+    def sitemap(self, count):
+        base = f"http://{self.headers['Host']}/{count}"
+        urls = ''.join(
+            f"<url><loc>{base}/page-{i}</loc><lastmod>2024-01-01</lastmod></url>" for i in range(count)
+        )
+        self.send_body(
+            f'<?xml version="1.0" encoding="UTF-8"?>'
+            f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>',
+            'application/xml'
+        )
+
+    def confluence(self, count, path, query):
+        if path[:3] != ['rest', 'api', 'content']:
+            raise ValueError(path)
+        if len(path) == 3:
+            start, limit = int(query['start'][0]), int(query['limit'][0])
+            if self.server.max_page_size:
+                # Confluence Cloud처럼 요청한 limit보다 적게 응답
+                limit = min(limit, self.server.max_page_size)
+            ids = range(start, min(start + limit, count))
+            data = {
+                'results': [
+                    {'id': str(i), 'title': make_page(i)[0], 'version': {'number': self.server.page_versions.get(i, 1)},
+                     '_links': {'webui': f"/spaces/BENCH/pages/{i}"}}
+                    for i in ids
+                ],
+                '_links': {'next': 'more'} if start + limit < count else {},
+            }
+        else:
+            index = int(path[3])
+            if index in self.server.failing_pages:
+                self.send_error(500)
+                return
+            title, sections = make_page(index)
+            data = {
+                'id': str(index), 'title': title,
+                'version': {'number': self.server.page_versions.get(index, 1), 'when': '2024-01-01T00:00:00.000Z'},
+                'body': {'storage': {'value': render_html(title, sections)}},
+                '_links': {'webui': f"/spaces/BENCH/pages/{index}"},
+            }
+        self.send_body(json.dumps(data, ensure_ascii=False), 'application/json')
+
+
+class StandInServer:
+    """StandInHandler를 백그라운드 스레드에서 실행하는 로컬 서버"""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.server = ThreadingHTTPServer((host, port), StandInHandler)
+        self.server.daemon_threads = True
+        # Confluence 페이지 번호별 버전과 본문 요청이 실패할 페이지 번호 (테스트에서 변경)
+        self.page_versions = self.server.page_versions = {}
+        self.failing_pages = self.server.failing_pages = set()
+        # 설정하면 페이지 목록 요청의 limit을 이 값으로 줄여 응답 (None이면 요청한 대로)
+        self.max_page_size = None
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def max_page_size(self):
+        return self.server.max_page_size
+
+    @max_page_size.setter
+    def max_page_size(self, value):
+        self.server.max_page_size = value
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def sitemap_url(self, count):
+        return f"{self.base_url}/{count}/sitemap.xml"
+
+    def confluence_url(self, count):
+        return f"{self.base_url}/wiki/{count}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
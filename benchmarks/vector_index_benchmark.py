@@ -0,0 +1,148 @@
+"""Chroma와 NumPy 벡터 인덱스(float16/int8)의 검색 지연 시간, RSS, recall@k 비교
+
+실제 임베딩 대신 군집 구조를 가진 임의 벡터로 Chroma 컬렉션을 만들고, 같은 컬렉션을
+vector_index.export_collection으로 내보낸 뒤 백엔드별로 별도 프로세스에서 검색합니다.
+정답은 float32 전수 검색 결과입니다.
+
+    python benchmarks/vector_index_benchmark.py --count 20000 --dim 1024 --queries 200
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+BACKENDS = ('chroma', 'float16', 'int8', 'float16-preload', 'int8-preload')
+COLLECTION_NAME = 'benchmark'
+
+
+def current_rss_mb():
+    """현재 프로세스 RSS (MB)"""
+    with open('/proc/self/statm') as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+def make_vectors(count, dim, seed, clusters=256):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, count)
+    vectors = centers[labels] + 0.5 * rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def build(directory, count, dim, seed):
+    import chromadb
+    from vector_index import export_collection
+
+    client = chromadb.PersistentClient(path=os.path.join(directory, 'chroma'))
+    collection = client.get_or_create_collection(COLLECTION_NAME)
+    vectors = make_vectors(count, dim, seed)
+    for start in range(0, count, 5000):
+        end = min(start + 5000, count)
+        collection.add(
+            ids=[str(i) for i in range(start, end)],
+            embeddings=vectors[start:end].tolist(),
+            documents=[f"chunk {i}" for i in range(start, end)],
+            metadatas=[{'source': f"doc-{i // 10}", 'title': f"doc {i // 10}"} for i in range(start, end)]
+        )
+    for dtype in ('float16', 'int8'):
+        export_collection(collection, os.path.join(directory, dtype), dtype=dtype)
+    return vectors
+
+
+def run_backend(directory, backend, queries, k):
+    """백엔드 하나를 열고 질문별 검색 시간과 결과 ID 측정 (자식 프로세스에서 실행)"""
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    if backend == 'chroma':
+        import chromadb
+        collection = chromadb.PersistentClient(path=os.path.join(directory, 'chroma')).get_collection(COLLECTION_NAME)
+
+        def search(vector):
+            return [int(i) for i in collection.query(query_embeddings=[vector.tolist()], n_results=k)['ids'][0]]
+    else:
+        from vector_index import NumpyVectorIndex
+        dtype, _, preload = backend.partition('-')
+        index = NumpyVectorIndex(os.path.join(directory, dtype), preload=bool(preload))
+
+        def search(vector):
+            return [int(doc.page_content.split()[1]) for doc in index.similarity_search_by_vector(vector, k=k)]
+    load_seconds = time.perf_counter() - start
+
+    search(queries[0])  # 워밍업
+    latencies, results = [], []
+    for vector in queries:
+        t = time.perf_counter()
+        results.append(search(vector))
+        latencies.append((time.perf_counter() - t) * 1000)
+    return {
+        'backend': backend,
+        'load_seconds': load_seconds,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'rss_mb': current_rss_mb() - rss_before,
+        'results': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=20000)
+    parser.add_argument('--dim', type=int, default=1024)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="결과를 저장할 JSON 경로")
+    parser.add_argument('--child', choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument('--directory', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        queries = np.load(os.path.join(args.directory, 'queries.npy'))
+        print(json.dumps(run_backend(args.directory, args.child, queries, args.k)))
+        return
+
+    directory = tempfile.mkdtemp(prefix='vector_index_benchmark_')
+    try:
+        print(f"벡터 {args.count}개 ({args.dim}차원) 생성 및 내보내기 중...")
+        vectors = build(directory, args.count, args.dim, args.seed)
+        rng = np.random.default_rng(args.seed + 1)
+        picks = rng.integers(0, args.count, args.queries)
+        queries = vectors[picks] + 0.3 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+        np.save(os.path.join(directory, 'queries.npy'), queries)
+
+        normalized = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+        truth = np.argsort(-(normalized @ vectors.T), axis=1)[:, :args.k]
+
+        report = []
+        for backend in BACKENDS:
+            output = subprocess.run(
+                [sys.executable, __file__, '--child', backend, '--directory', directory, '--k', str(args.k)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            hits = sum(len(set(found) & set(expected)) for found, expected in zip(result.pop('results'), truth.tolist()))
+            result['recall_at_k'] = hits / (args.k * args.queries)
+            report.append(result)
+
+        print(f"{'backend':<16}{'load(s)':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'rss(MB)':>10}{'recall@' + str(args.k):>11}")
+        for r in report:
+            print(f"{r['backend']:<16}{r['load_seconds']:>10.2f}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}"
+                  f"{r['rss_mb']:>10.1f}{r['recall_at_k']:>11.3f}")
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump({'params': vars(args), 'results': report}, f, indent=2)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -18,14 +18,101 @@ CONFLUENCE_SPACE_KEY = os.environ['CONFLUENCE_SPACE_KEY']
 # Hint: space_key and page_id can both be found in the URL of a page in Confluence
 # https://yoursite.atlassian.com/wiki/spaces/<space_key>/pages/<page_id>
 CONFLUENCE_USERNAME = os.environ['EMAIL_ADRESS']
+# 본문 병렬 요청 수 (증분 동기화를 위한 페이지 버전 상태는 인덱스 버전 디렉토리에 저장)
+CONFLUENCE_CONCURRENCY = int(os.environ.get('CONFLUENCE_CONCURRENCY', '8'))
 
 # GitBook 설정
 GITBOOK_DOMAIN = os.environ.get('GITBOOK_DOMAIN', 'https://docs.fe-ta.com')
 GITBOOK_SITEMAP = os.environ.get('GITBOOK_SITEMAP', 'https://docs.fe-ta.com/sitemap-pages.xml')
 
-# 문서 로드 옵션 (confluence, gitbook, both)
+# GitBook 크롤링 동시성 및 호스트별 초당 요청 수
+GITBOOK_CONCURRENCY = int(os.environ.get('GITBOOK_CONCURRENCY', '8'))
+GITBOOK_REQUESTS_PER_SECOND = float(os.environ.get('GITBOOK_REQUESTS_PER_SECOND', '10'))
+# 조건부 요청(ETag/Last-Modified)을 위한 GitBook 페이지 본문 캐시 위치 (검증자는 인덱스 버전 디렉토리에 저장)
+GITBOOK_CACHE_DIRECTORY = os.environ.get('GITBOOK_CACHE_DIRECTORY', './db/gitbook_cache/')
+
+# 문서 로드 옵션 (confluence, gitbook, both, snapshot: 저장된 스냅숏에서 네트워크 없이 로드)
 DOCUMENT_SOURCE = os.environ.get('DOCUMENT_SOURCE', 'both')
 
-PATH_NAME_SPLITTER = './splitted_docs.jsonl'
+# 증분 재색인 여부 (true이면 변경된 문서만 다시 임베딩)
+INCREMENTAL_INDEX = os.environ.get('INCREMENTAL_INDEX', 'true').lower() == 'true'
+
+# 색인 파이프라인 설정 (단계 사이 큐 크기)
+PIPELINE_DOCUMENT_QUEUE_SIZE = int(os.environ.get('PIPELINE_DOCUMENT_QUEUE_SIZE', '32'))
+PIPELINE_CHUNK_QUEUE_SIZE = int(os.environ.get('PIPELINE_CHUNK_QUEUE_SIZE', '1000'))
+PIPELINE_WRITE_QUEUE_SIZE = int(os.environ.get('PIPELINE_WRITE_QUEUE_SIZE', '8'))
+
+# 문서 분할 프로세스 수 (1 이하이면 직렬 분할)와 프로세스 풀을 사용하기 시작할 문서 수
+SPLIT_WORKERS = int(os.environ.get('SPLIT_WORKERS', str(os.cpu_count() or 1)))
+SPLIT_PARALLEL_MIN_DOCUMENTS = int(os.environ.get('SPLIT_PARALLEL_MIN_DOCUMENTS', '64'))
+
+# 청크 중복 제거 (정확히 같은 청크와 MinHash 추정 자카드 유사도가 임계값 이상인 청크는 하나만 임베딩)
+CHUNK_DEDUP_ENABLED = os.environ.get('CHUNK_DEDUP_ENABLED', 'true').lower() == 'true'
+CHUNK_DEDUP_THRESHOLD = float(os.environ.get('CHUNK_DEDUP_THRESHOLD', '0.85'))
+CHUNK_DEDUP_NUM_PERM = int(os.environ.get('CHUNK_DEDUP_NUM_PERM', '128'))
+CHUNK_DEDUP_BANDS = int(os.environ.get('CHUNK_DEDUP_BANDS', '32'))
+CHUNK_DEDUP_SHINGLE_SIZE = int(os.environ.get('CHUNK_DEDUP_SHINGLE_SIZE', '5'))
+
+# 임베딩 스케줄러 설정 (요청당 최대 입력 수/토큰 수, AIMD 동시 요청 수, 격리 파일)
+EMBEDDING_BATCH_SIZE = int(os.environ.get('EMBEDDING_BATCH_SIZE', '1000'))
+EMBEDDING_MAX_TOKENS_PER_REQUEST = int(os.environ.get('EMBEDDING_MAX_TOKENS_PER_REQUEST', '250000'))
+EMBEDDING_MAX_CONCURRENCY = int(os.environ.get('EMBEDDING_MAX_CONCURRENCY', '8'))
+EMBEDDING_INITIAL_CONCURRENCY = int(os.environ.get('EMBEDDING_INITIAL_CONCURRENCY', '2'))
+EMBEDDING_QUARANTINE_PATH = os.environ.get('EMBEDDING_QUARANTINE_PATH', './db/embedding_quarantine.jsonl')
+
+# 임베딩 캐시 설정
+EMBEDDING_CACHE_PATH = os.environ.get('EMBEDDING_CACHE_PATH', './db/embedding_cache.sqlite3')
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.environ.get('EMBEDDING_CACHE_MAX_ENTRIES', '200000'))
+
+# 원본 페이지/분할된 청크 스냅숏 저장소 (빈 값이면 저장하지 않음)와 소스별 스냅숏 매니페스트 (JSON Lines)
+SNAPSHOT_DIRECTORY = os.environ.get('SNAPSHOT_DIRECTORY', './db/snapshots/')
+PATH_NAME_SPLITTER = os.environ.get('PATH_NAME_SPLITTER', './splitted_docs.jsonl')
 PERSIST_DIRECTORY = './db/chroma_gitbook/'
+# 블루/그린 빌드: 보관할 인덱스 버전 수, 승격 전 검증 기준, 서비스 중 새 버전 확인 주기(초)
+INDEX_KEEP_VERSIONS = int(os.environ.get('INDEX_KEEP_VERSIONS', '3'))
+INDEX_MIN_CHUNKS = int(os.environ.get('INDEX_MIN_CHUNKS', '1'))
+INDEX_VALIDATION_QUERY = os.environ.get('INDEX_VALIDATION_QUERY', '회원가입은 어떻게 하나요?')
+INDEX_RELOAD_INTERVAL = float(os.environ.get('INDEX_RELOAD_INTERVAL', '5'))
+# 검색 백엔드 (chroma 또는 numpy: 메모리 매핑한 float16/int8 행렬로 직접 검색)
+RETRIEVER_BACKEND = os.environ.get('RETRIEVER_BACKEND', 'chroma').lower()
+VECTOR_INDEX_DTYPE = os.environ.get('VECTOR_INDEX_DTYPE', 'float16').lower()
+# false(기본)이면 메모리 매핑 상태로 검색, true이면 행렬을 float32로 메모리에 올려 검색
+# (float16 대비 2배, int8 대비 4배 메모리를 프로세스마다 쓰는 대신 지연 시간 감소)
+VECTOR_INDEX_PRELOAD = os.environ.get('VECTOR_INDEX_PRELOAD', 'false').lower() == 'true'
+
+# 어휘(BM25) 인덱스와 하이브리드 검색 설정
+# 질문 임베딩이 EMBEDDING_QUERY_TIMEOUT초 안에 끝나지 않거나 실패하면 어휘 검색만으로 답변
+LEXICAL_INDEX_ENABLED = os.environ.get('LEXICAL_INDEX_ENABLED', 'true').lower() == 'true'
+HYBRID_RRF_K = int(os.environ.get('HYBRID_RRF_K', '60'))
+EMBEDDING_QUERY_TIMEOUT = float(os.environ.get('EMBEDDING_QUERY_TIMEOUT', '3'))
+
+# 프롬프트 컨텍스트 설정 (최대 토큰 수, 거의 같은 청크로 볼 3-gram Jaccard 유사도)
+CONTEXT_MAX_TOKENS = int(os.environ.get('CONTEXT_MAX_TOKENS', '1500'))
+CONTEXT_DUPLICATE_THRESHOLD = float(os.environ.get('CONTEXT_DUPLICATE_THRESHOLD', '0.9'))
+
+# 대화 기록 설정 (그대로 보관할 최근 대화의 최대 토큰 수, 오래된 대화 요약의 최대 토큰 수)
+CONVERSATION_HISTORY_MAX_TOKENS = int(os.environ.get('CONVERSATION_HISTORY_MAX_TOKENS', '800'))
+CONVERSATION_SUMMARY_MAX_TOKENS = int(os.environ.get('CONVERSATION_SUMMARY_MAX_TOKENS', '300'))
+
+# 계측 설정 (단계별 소요 시간/카운터 수집 여부, 끝난 구간을 기록할 JSONL 파일 경로 (비우면 기록 안 함))
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+METRICS_JSONL_PATH = os.environ.get('METRICS_JSONL_PATH', '')
+
+# 답변 캐시 설정 (최대 항목 수, 유효 시간(초), 유사 질문으로 볼 코사인 유사도 임계값)
+ANSWER_CACHE_ENABLED = os.environ.get('ANSWER_CACHE_ENABLED', 'true').lower() == 'true'
+ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get('ANSWER_CACHE_MAX_ENTRIES', '1000'))
+ANSWER_CACHE_TTL_SECONDS = float(os.environ.get('ANSWER_CACHE_TTL_SECONDS', '86400'))
+ANSWER_CACHE_SIMILARITY_THRESHOLD = float(os.environ.get('ANSWER_CACHE_SIMILARITY_THRESHOLD', '0.95'))
+# 일괄 추론 시 동시에 보낼 LLM 요청 수
+INFERENCE_BATCH_CONCURRENCY = int(os.environ.get('INFERENCE_BATCH_CONCURRENCY', '8'))
+# HTTP 서버 설정 (동시 처리 질문 수, 대기/처리 제한 시간(초), 최대 요청 본문 크기)
+SERVER_HOST = os.environ.get('SERVER_HOST', '0.0.0.0')
+SERVER_PORT = int(os.environ.get('SERVER_PORT', '8000'))
+SERVER_MAX_CONCURRENCY = int(os.environ.get('SERVER_MAX_CONCURRENCY', '16'))
+SERVER_QUEUE_TIMEOUT = float(os.environ.get('SERVER_QUEUE_TIMEOUT', '5'))
+SERVER_REQUEST_TIMEOUT = float(os.environ.get('SERVER_REQUEST_TIMEOUT', '60'))
+SERVER_MAX_BODY_BYTES = int(os.environ.get('SERVER_MAX_BODY_BYTES', '65536'))
 EVALUATION_DATASET = '../data/gitbook_evaluation_dataset.tsv'
+# 평가 설정 (동시에 평가할 질문 수, 중단된 평가를 이어서 하기 위한 행별 결과 기록 파일)
+EVALUATION_CONCURRENCY = int(os.environ.get('EVALUATION_CONCURRENCY', '4'))
+EVALUATION_CHECKPOINT = os.environ.get('EVALUATION_CHECKPOINT', '../data/evaluation_checkpoint.jsonl')
@@ -0,0 +1,112 @@
+import re
+import time
+import logging
+import threading
+import unicodedata
+import collections
+
+import numpy as np
+
+
+def normalize_question(question):
+    """정확 일치 비교를 위한 질문 정규화 (유니코드/대소문자/공백/끝 문장부호)"""
+    text = unicodedata.normalize('NFKC', question).lower().strip()
+    text = re.sub(r'\s+', ' ', text)
+    return text.rstrip(' ?!.~…')
+
+
+class AnswerCache:
+    """질문 → (답변, 소스) 캐시
+
+    1단계는 정규화된 질문 텍스트의 정확 일치, 2단계는 질문 임베딩의 코사인 유사도가
+    임계값 이상인 유사 질문입니다. 항목은 TTL이 지나면 만료되고, 가득 차면 가장
+    오래 사용되지 않은 항목부터 제거되며, 인덱스 버전이 바뀌면 모두 비워집니다.
+    """
+
+    def __init__(self, max_entries=1000, ttl_seconds=86400, similarity_threshold=0.95):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.logger = logging.getLogger(__name__)
+
+        self.index_version = None
+        self._entries = collections.OrderedDict()
+        self._matrix = None
+        self._matrix_keys = []
+        self._lock = threading.Lock()
+        self.stats = {'exact_hits': 0, 'semantic_hits': 0, 'misses': 0}
+
+    def _check_version(self, index_version):
+        if index_version != self.index_version:
+            if self._entries:
+                self.logger.info(f"인덱스 버전 변경으로 답변 캐시 {len(self._entries)}개 항목을 비웁니다.")
+            self._entries.clear()
+            self._matrix = None
+            self.index_version = index_version
+
+    def _expire(self):
+        now = time.time()
+        expired = [key for key, entry in self._entries.items() if entry['expires_at'] <= now]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def _get_matrix(self):
+        """유사도 검색용 정규화 임베딩 행렬 (변경 시에만 다시 만듦)"""
+        if self._matrix is None:
+            keys = [key for key, entry in self._entries.items() if entry['vector'] is not None]
+            self._matrix_keys = keys
+            self._matrix = (
+                np.vstack([self._entries[key]['vector'] for key in keys]) if keys else np.empty((0, 0))
+            )
+        return self._matrix
+
+    def get(self, question, index_version):
+        """정확 일치 조회"""
+        key = normalize_question(question)
+        with self._lock:
+            self._check_version(index_version)
+            entry = self._entries.get(key)
+            if entry is not None and entry['expires_at'] > time.time():
+                self._entries.move_to_end(key)
+                self.stats['exact_hits'] += 1
+                return entry['value']
+            return None
+
+    def get_similar(self, vector, index_version):
+        """질문 임베딩이 충분히 비슷한 캐시 항목 조회 (없으면 미스로 기록)"""
+        with self._lock:
+            self._check_version(index_version)
+            self._expire()
+            matrix = self._get_matrix()
+            if vector is not None and matrix.shape[0]:
+                query = np.asarray(vector, dtype=np.float32)
+                query = query / (np.linalg.norm(query) or 1.0)
+                scores = matrix @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity_threshold:
+                    key = self._matrix_keys[best]
+                    self._entries.move_to_end(key)
+                    self.stats['semantic_hits'] += 1
+                    return self._entries[key]['value']
+            self.stats['misses'] += 1
+            return None
+
+    def put(self, question, vector, value, index_version):
+        key = normalize_question(question)
+        if vector is not None:
+            vector = np.asarray(vector, dtype=np.float32)
+            vector = vector / (np.linalg.norm(vector) or 1.0)
+        with self._lock:
+            self._check_version(index_version)
+            self._entries[key] = {'value': value, 'vector': vector, 'expires_at': time.time() + self.ttl_seconds}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def get_stats(self):
+        hits = self.stats['exact_hits'] + self.stats['semantic_hits']
+        total = hits + self.stats['misses']
+        return dict(self.stats, entries=len(self._entries), hit_rate=hits / total if total else 0.0)
@@ -0,0 +1,80 @@
+import os
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+
+STATE_FILE_NAME = 'build_state.json'
+JOURNAL_FILE_NAME = 'build_journal.jsonl'
+
+
+class BuildJournal:
+    """색인 빌드 진행 상황을 기록하는 저널
+
+    Chroma에 저장이 끝난 배치의 청크 ID를 한 줄씩 추가 기록하므로, 빌드가 중간에
+    중단되더라도 다음 실행에서 이미 저장된 청크를 건너뛰고 이어서 진행할 수 있습니다.
+    """
+
+    def __init__(self, persist_directory):
+        self.state_path = os.path.join(persist_directory, STATE_FILE_NAME)
+        self.journal_path = os.path.join(persist_directory, JOURNAL_FILE_NAME)
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+    def read_state(self):
+        if not os.path.exists(self.state_path):
+            return None
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            self.logger.warning(f"빌드 상태 파일을 읽지 못했습니다: {e}")
+            return None
+
+    def _write_state(self, state):
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    def in_progress(self):
+        state = self.read_state()
+        return bool(state) and state.get('status') == 'in_progress'
+
+    def start(self, incremental):
+        """새 빌드 시작 (이전 저널은 비움)"""
+        self._write_state({
+            'status': 'in_progress',
+            'incremental': incremental,
+            'started_at': datetime.now(timezone.utc).isoformat(),
+        })
+        open(self.journal_path, 'w', encoding='utf-8').close()
+
+    def record(self, ids):
+        """저장이 끝난 배치의 청크 ID 기록"""
+        with self._lock:
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(list(ids)) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def committed_ids(self):
+        """저널에 기록된 청크 ID 전체 (마지막 줄이 잘렸으면 무시)"""
+        ids = set()
+        if not os.path.exists(self.journal_path):
+            return ids
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    ids.update(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return ids
+
+    def finish(self):
+        """빌드 완료 표시 후 저널 삭제"""
+        state = self.read_state() or {}
+        state.update({'status': 'complete', 'finished_at': datetime.now(timezone.utc).isoformat()})
+        self._write_state(state)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
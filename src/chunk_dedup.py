@@ -0,0 +1,149 @@
+import hashlib
+import collections
+
+import numpy as np
+
+SOURCES_SEPARATOR = '\n'
+
+
+def normalize_text(text):
+    """공백 차이와 대소문자를 무시하도록 정규화"""
+    return ' '.join(text.split()).lower()
+
+
+def shingle_hashes(text, size):
+    """글자 size-gram의 32비트 롤링 해시 (실행마다 같은 값)"""
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    if not len(codes):
+        return np.zeros(1, dtype=np.uint64)
+    size = min(size, len(codes))
+    count = len(codes) - size + 1
+    hashes = np.zeros(count, dtype=np.uint64)
+    for offset in range(size):
+        hashes = (hashes * np.uint64(1000003) + codes[offset:offset + count]) & np.uint64(0xFFFFFFFF)
+    return np.unique(hashes)
+
+
+def join_sources(sources):
+    """Chroma 메타데이터는 스칼라 값만 허용하므로 소스 목록을 줄바꿈으로 이은 문자열로 저장"""
+    return SOURCES_SEPARATOR.join(sorted(sources))
+
+
+def split_sources(value):
+    return set(filter(None, (value or '').split(SOURCES_SEPARATOR)))
+
+
+class ChunkDeduplicator:
+    """정확히 같은 청크(정규화 후 해시)와 거의 같은 청크(MinHash/LSH)를 찾는 색인
+
+    청크 ID와 본문을 add()로 등록하면 find()가 같은/유사한 등록 청크의 ID를 돌려줍니다.
+    MinHash 서명을 bands개 구간으로 나누어 한 구간이라도 같으면 후보로 보고, 서명으로
+    추정한 자카드 유사도가 threshold 이상인 후보 중 가장 유사한(같으면 먼저 등록된) 청크를 고릅니다.
+    """
+
+    def __init__(self, threshold=0.85, num_perm=128, bands=32, shingle_size=5, seed=1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm({num_perm})은 bands({bands})의 배수여야 합니다.")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        # 해시 함수 (a * x + b) mod 2^64의 상위 32비트 (a는 홀수, multiply-shift 방식)
+        self._a = (rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1))[:, None]
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)[:, None]
+        # 구간(band)의 서명 값들을 64비트 키 하나로 합칠 때 쓰는 계수
+        self._band_weights = rng.integers(1, 2 ** 63, size=self.rows, dtype=np.uint64)
+        self._exact = {}
+        self._buckets = collections.defaultdict(list)
+        self._entries = {}
+        self.stats = collections.Counter()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, chunk_id):
+        return chunk_id in self._entries
+
+    def signature(self, text):
+        shingles = shingle_hashes(text, self.shingle_size)
+        return ((self._a * shingles[None, :] + self._b) >> np.uint64(32)).min(axis=1)
+
+    def band_keys(self, signature):
+        # uint64 곱셈은 2^64로 나눈 나머지가 되므로 넘침을 허용하는 해시로 사용
+        keys = (signature.reshape(self.bands, self.rows) * self._band_weights).sum(axis=1)
+        return list(enumerate(keys.tolist()))
+
+    def prepare(self, text):
+        """본문의 (정확 해시, MinHash 서명, 구간 키) (find/add에 재사용)"""
+        normalized = normalize_text(text)
+        signature = self.signature(normalized)
+        return hashlib.sha1(normalized.encode('utf-8')).hexdigest(), signature, self.band_keys(signature)
+
+    def find(self, text=None, prepared=None, exclude=()):
+        """등록된 청크 중 같거나 유사한 청크의 (종류 'exact'/'near', 청크 ID), 없으면 (None, None)
+
+        exclude의 청크는 유사 청크 후보에서 제외합니다 (정규화한 본문이 같으면 여전히 'exact').
+        """
+        exact_hash, signature, keys = prepared or self.prepare(text)
+        if exact_hash in self._exact:
+            return 'exact', self._exact[exact_hash]
+        candidates = {}
+        for key in keys:
+            for chunk_id in self._buckets.get(key, ()):
+                if chunk_id not in exclude:
+                    candidates.setdefault(chunk_id, None)
+        best_id, best_similarity = None, 0.0
+        for chunk_id in candidates:
+            similarity = float(np.mean(self._entries[chunk_id][1] == signature))
+            if similarity >= self.threshold and similarity > best_similarity:
+                best_id, best_similarity = chunk_id, similarity
+        return ('near', best_id) if best_id is not None else (None, None)
+
+    def add(self, chunk_id, text=None, prepared=None):
+        if chunk_id in self._entries:
+            return
+        exact_hash, signature, keys = prepared or self.prepare(text)
+        self._exact.setdefault(exact_hash, chunk_id)
+        for key in keys:
+            self._buckets[key].append(chunk_id)
+        self._entries[chunk_id] = (exact_hash, signature, keys)
+
+    def discard(self, chunk_id):
+        """삭제된 청크를 색인에서 제거 (이후 같은 내용은 새 청크로 유지됨)"""
+        entry = self._entries.pop(chunk_id, None)
+        if entry is None:
+            return
+        exact_hash, _, keys = entry
+        if self._exact.get(exact_hash) == chunk_id:
+            del self._exact[exact_hash]
+        for key in keys:
+            bucket = self._buckets[key]
+            bucket.remove(chunk_id)
+            if not bucket:
+                del self._buckets[key]
+
+    def deduplicate(self, chunk_id, text, exclude=()):
+        """청크를 확인하여 새 청크면 등록하고 (None, chunk_id), 중복이면 (종류, 대표 청크 ID) 반환
+
+        exclude에는 수정된 페이지의 이전 청크를 넘깁니다. 그렇지 않으면 조금 고친 문단이
+        자신의 이전 버전과 유사 청크로 판정되어 수정 내용이 임베딩되지 않습니다.
+        """
+        prepared = self.prepare(text)
+        kind, match = self.find(prepared=prepared, exclude=exclude)
+        if match is not None and match != chunk_id:
+            self.stats[kind] += 1
+            return kind, match
+        self.add(chunk_id, prepared=prepared)
+        self.stats['kept'] += 1
+        return None, chunk_id
+
+    def summary(self):
+        total = self.stats['kept'] + self.stats['exact'] + self.stats['near']
+        removed = self.stats['exact'] + self.stats['near']
+        ratio = removed / total if total else 0.0
+        return (
+            f"청크 {total}개 중 {removed}개 제거 ({ratio:.1%}): "
+            f"동일 {self.stats['exact']}개, 유사 {self.stats['near']}개"
+        )
@@ -0,0 +1,197 @@
+import os
+import json
+import logging
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+from bs4 import BeautifulSoup
+from langchain_core.documents import Document
+
+from crawler import ConcurrentCrawler
+from document_splitter import sectioned_text
+
+# 인덱스 버전 디렉토리에 저장하는 동기화 상태 파일 이름
+STATE_FILE_NAME = 'confluence_state.json'
+
+
+class ConfluenceSyncResult:
+    """증분 동기화 결과
+
+    documents: 새로 추가되거나 버전이 바뀐 페이지
+    unchanged_sources: 바뀌지 않아 본문을 받지 않은 페이지의 소스
+    deleted_sources: 이전 동기화 이후 삭제된 페이지의 소스
+    unchanged_pages: 본문을 받지 않은 페이지의 {페이지 ID: 소스}
+    """
+
+    def __init__(self, documents, unchanged_sources, deleted_sources, unchanged_pages=None):
+        self.documents = documents
+        self.unchanged_sources = unchanged_sources
+        self.deleted_sources = deleted_sources
+        self.unchanged_pages = unchanged_pages or {}
+
+
+class ConfluenceSync:
+    """Confluence REST API로 마지막 동기화 이후 변경된 페이지만 가져오는 로더
+
+    스페이스의 페이지 ID와 버전 번호만 가볍게 조회한 뒤, 로컬 상태 파일에
+    저장된 버전과 비교하여 바뀐 페이지의 본문만 병렬로 요청합니다.
+    상태 파일은 색인이 성공한 뒤 save_state()를 호출해야 갱신됩니다.
+    """
+
+    def __init__(self, url, username, api_key, space_key, state_path,
+                 concurrency=8, requests_per_second=10.0, page_size=200, crawler=None):
+        self.base_url = url.rstrip('/')
+        self.space_key = space_key
+        self.state_path = state_path
+        self.page_size = page_size
+        self.logger = logging.getLogger(__name__)
+
+        self.crawler = crawler or ConcurrentCrawler(
+            concurrency=concurrency,
+            requests_per_second=requests_per_second
+        )
+        if username and api_key:
+            self.crawler.session.auth = (username, api_key)
+
+        self.state = self.load_state()
+        self.pending_state = None
+        self.page_order = []
+        self.result = None
+
+    def load_state(self):
+        if not os.path.exists(self.state_path):
+            return {'last_sync': None, 'pages': {}}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            self.logger.warning(f"Confluence 동기화 상태 로드 중 오류, 전체 동기화합니다: {e}")
+            return {'last_sync': None, 'pages': {}}
+
+    def save_state(self):
+        """동기화 결과를 상태 파일에 반영 (색인 성공 후 호출)"""
+        if self.pending_state is None:
+            return
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.pending_state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+        self.state, self.pending_state = self.pending_state, None
+        self.logger.info(f"Confluence 동기화 상태 저장: {len(self.state['pages'])}개 페이지")
+
+    def _api_url(self, path, **params):
+        url = f"{self.base_url}/rest/api/{path}"
+        return f"{url}?{urlencode(params)}" if params else url
+
+    def list_pages(self):
+        """스페이스의 모든 페이지 ID와 버전 번호 조회 (본문 제외)
+
+        서버가 limit을 page_size보다 작게 줄일 수 있으므로(Confluence Cloud), 받은 개수가 아니라
+        _links.next가 없거나 빈 페이지가 올 때까지 받은 개수만큼 start를 옮기며 조회합니다.
+        목록이 잘리면 나머지 페이지가 삭제된 것으로 처리되므로 끝까지 조회해야 합니다.
+        """
+        pages = {}
+        start = 0
+        while True:
+            url = self._api_url(
+                'content', spaceKey=self.space_key, type='page',
+                expand='version', limit=self.page_size, start=start
+            )
+            data = self.crawler.fetch(url).json()
+            results = data.get('results', [])
+            for page in results:
+                pages[str(page['id'])] = {
+                    'version': page.get('version', {}).get('number'),
+                    'source': self.base_url + page['_links']['webui'],
+                }
+            if not results or not data.get('_links', {}).get('next'):
+                break
+            start += len(results)
+        return pages
+
+    def fetch_page(self, page_id):
+        url = self._api_url(f'content/{page_id}', expand='body.storage,version')
+        return self.crawler.fetch(url).json()
+
+    def build_document(self, page):
+        """ConfluenceLoader와 같은 형식의 Document 생성"""
+        content = page.get('body', {}).get('storage', {}).get('value', '')
+        # h1~h3은 마크다운 헤더 줄로 남겨 헤더 기준 분할에 사용
+        text = sectioned_text(BeautifulSoup(content, 'lxml'), ' ', strip=True)
+        metadata = {
+            'title': page['title'],
+            'id': page['id'],
+            'source': self.base_url + page['_links']['webui'],
+        }
+        if 'version' in page and 'when' in page['version']:
+            metadata['when'] = page['version']['when']
+        return Document(page_content=text, metadata=metadata)
+
+    def iter_sync(self, full=False):
+        """변경된 페이지를 병렬로 가져오며 완료되는 대로 Document 반환
+
+        full=True이면 저장된 버전을 무시하고 모든 페이지 본문을 가져옵니다.
+        반복이 끝나면 self.result에 바뀌지 않은/삭제된 페이지 정보가 설정됩니다.
+        """
+        known_pages = {} if full else self.state.get('pages', {})
+        current_pages = self.list_pages()
+
+        changed_ids = [
+            page_id for page_id, info in current_pages.items()
+            if known_pages.get(page_id, {}).get('version') != info['version']
+        ]
+        deleted_ids = [page_id for page_id in known_pages if page_id not in current_pages]
+        self.logger.info(
+            f"Confluence 페이지 {len(current_pages)}개 중 변경/추가 {len(changed_ids)}개, "
+            f"삭제 {len(deleted_ids)}개"
+        )
+
+        failed_ids = set()
+        yield from self.iter_pages(changed_ids, failed_ids)
+
+        # 본문을 받지 못한 페이지는 이전 버전을 유지하여 다음 동기화 때 다시 시도
+        new_pages = {}
+        for page_id, info in current_pages.items():
+            if page_id in failed_ids:
+                if page_id in known_pages:
+                    new_pages[page_id] = known_pages[page_id]
+                continue
+            new_pages[page_id] = info
+        self.pending_state = {
+            'last_sync': datetime.now(timezone.utc).isoformat(),
+            'pages': new_pages,
+        }
+
+        changed = set(changed_ids) - failed_ids
+        unchanged_pages = {
+            page_id: info['source'] for page_id, info in current_pages.items() if page_id not in changed
+        }
+        deleted_sources = {known_pages[page_id]['source'] for page_id in deleted_ids}
+        self.page_order = list(current_pages)
+        self.result = ConfluenceSyncResult([], set(unchanged_pages.values()), deleted_sources, unchanged_pages)
+
+    def iter_pages(self, page_ids, failed_ids=None):
+        """주어진 페이지의 본문을 병렬로 가져오며 완료되는 대로 Document 반환
+
+        본문을 받지 못한 페이지는 건너뛰고 failed_ids에 추가합니다.
+        """
+        for page_id, page, error in self.crawler.crawl(list(page_ids), self.fetch_page):
+            if error is not None:
+                self.logger.error(f"Confluence 페이지 {page_id} 로드 중 오류 발생: {error}")
+                if failed_ids is not None:
+                    failed_ids.add(page_id)
+                continue
+            yield self.build_document(page)
+
+    def sync(self, full=False):
+        """변경된 페이지를 모두 가져와 동기화 결과로 반환"""
+        documents = list(self.iter_sync(full))
+
+        # 결과 순서를 페이지 목록 순서로 고정
+        order = {page_id: i for i, page_id in enumerate(self.page_order)}
+        documents.sort(key=lambda doc: order.get(str(doc.metadata['id']), len(order)))
+        self.result.documents = documents
+        return self.result
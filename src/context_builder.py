@@ -0,0 +1,128 @@
+import logging
+
+from langchain_core.documents import Document
+
+MIN_OVERLAP = 5
+MAX_OVERLAP = 64
+MIN_TRUNCATED_TOKENS = 32
+
+
+def find_overlap(left, right):
+    """left의 끝과 right의 시작이 겹치는 글자 수 (겹치지 않으면 0)"""
+    for size in range(min(len(left), len(right), MAX_OVERLAP), MIN_OVERLAP - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def shingles(text, size=3):
+    text = ' '.join(text.split())
+    return {text[i:i + size] for i in range(max(1, len(text) - size + 1))}
+
+
+class ContextBuilder:
+    """검색된 청크를 프롬프트에 넣기 전에 정리하는 도우미
+
+    1. 같은 소스에서 이웃한(chunk_index 연속) 청크를 겹치는 부분을 빼고 하나로 합치고
+    2. 다른 청크에 포함되거나 거의 같은(3-gram Jaccard ≥ 임계값) 청크를 버린 뒤
+    3. 검색 순위대로 토큰 예산(max_tokens)까지만 채웁니다.
+    """
+
+    def __init__(self, max_tokens=1500, duplicate_threshold=0.9, encoding_name='cl100k_base'):
+        self.max_tokens = max_tokens
+        self.duplicate_threshold = duplicate_threshold
+        self.logger = logging.getLogger(__name__)
+        self._encoding = self._load_encoding(encoding_name)
+
+    def _load_encoding(self, encoding_name):
+        try:
+            import tiktoken
+            return tiktoken.get_encoding(encoding_name)
+        except Exception as e:
+            self.logger.warning(f"tiktoken 인코딩을 불러오지 못해 글자 수로 토큰을 추정합니다: {e}")
+            return None
+
+    def count_tokens(self, text):
+        if self._encoding is None:
+            return len(text)
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text, max_tokens):
+        if self._encoding is None:
+            return text[:max_tokens]
+        return self._encoding.decode(self._encoding.encode(text, disallowed_special=())[:max_tokens])
+
+    def merge_chunks(self, docs):
+        """같은 소스의 이웃한 청크를 합쳐 (가장 높은 순위, Document) 목록으로 반환"""
+        groups = {}
+        for rank, doc in enumerate(docs):
+            source = doc.metadata.get('source') or doc.metadata.get('id')
+            groups.setdefault(source, []).append((rank, doc))
+
+        merged = []
+        for items in groups.values():
+            # chunk_index가 있으면 페이지 안 순서대로 정렬 (없으면 검색 순서 유지)
+            items.sort(key=lambda item: (0, item[1].metadata['chunk_index'], item[0])
+                       if 'chunk_index' in item[1].metadata else (1, item[0], item[0]))
+            rank, current = items[0]
+            text, index = current.page_content, current.metadata.get('chunk_index')
+            for next_rank, doc in items[1:]:
+                next_index = doc.metadata.get('chunk_index')
+                # 우연히 5글자 이상 같은 문구로 끝나고 시작하는 청크를 잇지 않도록 이웃한 청크만 합침
+                if index is None or next_index is None or next_index - index > 1:
+                    merged.append((rank, Document(page_content=text, metadata=current.metadata)))
+                    rank, current, text = next_rank, doc, doc.page_content
+                    index = next_index
+                    continue
+                if next_index != index:
+                    overlap = find_overlap(text, doc.page_content)
+                    text += doc.page_content[overlap:] if overlap else '\n' + doc.page_content
+                rank = min(rank, next_rank)
+                index = next_index
+            merged.append((rank, Document(page_content=text, metadata=current.metadata)))
+        merged.sort(key=lambda item: item[0])
+        return merged
+
+    def is_duplicate(self, text, kept):
+        candidate = shingles(text)
+        for other_text, other_shingles in kept:
+            if text in other_text:
+                return True
+            union = len(candidate | other_shingles)
+            if union and len(candidate & other_shingles) / union >= self.duplicate_threshold:
+                return True
+        return False
+
+    def build(self, docs):
+        """정리된 Document 목록과 통계 반환"""
+        merged = self.merge_chunks(docs)
+
+        kept, packed = [], []
+        used_tokens = 0
+        dropped = 0
+        for _, doc in merged:
+            text = doc.page_content
+            if self.is_duplicate(text, kept):
+                dropped += 1
+                continue
+            kept.append((text, shingles(text)))
+
+            tokens = self.count_tokens(text)
+            remaining = self.max_tokens - used_tokens
+            if tokens > remaining:
+                # 예산이 조금 남았으면 잘라서라도 넣고, 아니면 여기서 멈춤
+                if remaining >= MIN_TRUNCATED_TOKENS:
+                    packed.append(Document(page_content=self.truncate(text, remaining), metadata=doc.metadata))
+                    used_tokens += remaining
+                break
+            packed.append(doc)
+            used_tokens += tokens
+
+        stats = {
+            'retrieved': len(docs),
+            'merged': len(merged),
+            'duplicates': dropped,
+            'packed': len(packed),
+            'context_tokens': used_tokens,
+        }
+        return packed, stats
@@ -0,0 +1,51 @@
+import collections
+
+
+class ConversationMemory:
+    """토큰 수가 제한된 대화 기록
+
+    최근 대화는 max_history_tokens 안에서 그대로 보관하고, 넘치는 오래된 대화는
+    기존 요약에 덧붙여 다시 요약합니다. 요약은 대화 한 턴마다 밀려난 대화만
+    반영하므로 대화가 길어져도 요약 비용과 프롬프트 크기가 일정하게 유지됩니다.
+    """
+
+    def __init__(self, count_tokens, max_history_tokens=800, summary_max_tokens=300):
+        self.count_tokens = count_tokens
+        self.max_history_tokens = max_history_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.summary = ''
+        self.turns = collections.deque()
+        self.history_tokens = 0
+        self.turn_count = 0
+
+    def is_empty(self):
+        return not self.turns and not self.summary
+
+    @staticmethod
+    def format_turn(question, answer):
+        return f"사용자: {question}\n도우미: {answer}"
+
+    def add_turn(self, question, answer, summarize):
+        """대화 한 턴을 추가하고, 창을 넘으면 밀려난 턴을 summarize(기존 요약, 밀려난 대화)로 요약에 반영"""
+        text = self.format_turn(question, answer)
+        tokens = self.count_tokens(text)
+        self.turns.append((text, tokens))
+        self.history_tokens += tokens
+        self.turn_count += 1
+
+        evicted = []
+        while self.turns and self.history_tokens > self.max_history_tokens:
+            text, tokens = self.turns.popleft()
+            self.history_tokens -= tokens
+            evicted.append(text)
+        if evicted:
+            self.summary = summarize(self.summary, '\n'.join(evicted))
+        return len(evicted)
+
+    def history_text(self):
+        return '\n'.join(text for text, _ in self.turns)
+
+    def clear(self):
+        self.summary = ''
+        self.turns.clear()
+        self.history_tokens = 0
@@ -0,0 +1,122 @@
+import os
+import gzip
+import json
+import hashlib
+import logging
+import threading
+
+STATE_FILE_NAME = 'state.json'
+
+
+class CrawlCache:
+    """URL별 lastmod, ETag, Last-Modified 값과 마지막으로 받은 본문을 저장
+
+    다음 크롤링 때 바뀌지 않은 페이지는 요청을 생략하거나 조건부 요청
+    (If-None-Match / If-Modified-Since)을 보내 304 응답 시 저장된 본문을 재사용합니다.
+
+    본문은 내용 해시로 저장하고 상태 파일(state_path)에는 URL별 검증자와 본문 해시를 기록하므로,
+    인덱스 버전마다 상태 파일을 따로 두어도 본문 저장소를 함께 쓸 수 있습니다.
+    """
+
+    def __init__(self, directory, state_path=None):
+        self.directory = directory
+        self.state_path = state_path or os.path.join(directory, STATE_FILE_NAME)
+        self.body_directory = os.path.join(directory, 'bodies')
+        self.logger = logging.getLogger(__name__)
+        self.entries = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except Exception as e:
+            self.logger.warning(f"크롤링 캐시 상태 로드 중 오류, 빈 상태로 시작합니다: {e}")
+            self.entries = {}
+
+    def save(self):
+        """임시 파일에 기록 후 교체하여 원자적으로 저장"""
+        os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        tmp_path = self.state_path + '.tmp'
+        with self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    def _body_path(self, digest):
+        return os.path.join(self.body_directory, digest[:2], digest + '.html.gz')
+
+    def get(self, url):
+        with self._lock:
+            return self.entries.get(url)
+
+    def read_body(self, url):
+        """저장된 본문 반환 (없으면 None)"""
+        digest = (self.get(url) or {}).get('body')
+        if not digest:
+            return None
+        path = self._body_path(digest)
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return f.read()
+
+    def conditional_headers(self, url):
+        """저장된 검증자로 조건부 요청 헤더 생성"""
+        entry = self.get(url) or {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url, body, lastmod=None, etag=None, last_modified=None):
+        """새로 받은 본문과 검증자 저장"""
+        digest = hashlib.sha256(body.encode('utf-8')).hexdigest()
+        path = self._body_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        with self._lock:
+            self.entries[url] = {
+                'lastmod': lastmod, 'etag': etag, 'last_modified': last_modified, 'body': digest
+            }
+
+    def touch(self, url, lastmod=None):
+        """304 응답 등으로 본문이 그대로일 때 lastmod만 갱신"""
+        with self._lock:
+            entry = self.entries.setdefault(url, {})
+            if lastmod:
+                entry['lastmod'] = lastmod
+
+    def prune(self, state_paths=()):
+        """이 캐시와 state_paths의 상태 파일 어느 것도 참조하지 않는 본문 삭제"""
+        with self._lock:
+            referenced = {entry.get('body') for entry in self.entries.values()}
+        for state_path in state_paths:
+            try:
+                with open(state_path, 'r', encoding='utf-8') as f:
+                    referenced.update(entry.get('body') for entry in json.load(f).values())
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                # 읽지 못한 상태 파일이 참조하는 본문을 지우지 않도록 정리를 건너뜀
+                self.logger.warning(f"크롤링 캐시 상태를 읽지 못해 본문 정리를 건너뜁니다 ({state_path}): {e}")
+                return 0
+        removed = 0
+        if not os.path.isdir(self.body_directory):
+            return removed
+        for prefix in os.listdir(self.body_directory):
+            prefix_directory = os.path.join(self.body_directory, prefix)
+            for name in os.listdir(prefix_directory):
+                if name.endswith('.html.gz') and name[:-len('.html.gz')] not in referenced:
+                    os.remove(os.path.join(prefix_directory, name))
+                    removed += 1
+        return removed
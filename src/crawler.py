@@ -0,0 +1,111 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+)
+
+
+def create_session(pool_size=10, retries=3, backoff_factor=0.5):
+    """커넥션 풀과 재시도(지수 백오프)가 설정된 keep-alive 세션 생성"""
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET", "HEAD"],
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"User-Agent": DEFAULT_USER_AGENT})
+    return session
+
+
+class HostRateLimiter:
+    """호스트별 초당 요청 수 제한 (스레드 안전)"""
+
+    def __init__(self, requests_per_second=5.0):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_allowed = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            scheduled = max(now, self._next_allowed.get(host, now))
+            self._next_allowed[host] = scheduled + self.interval
+        delay = scheduled - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ConcurrentCrawler:
+    """동시성 제한이 있는 스레드 풀 기반 HTTP 크롤러
+
+    하나의 세션(커넥션 풀)을 모든 워커가 공유하고, 호스트별 속도 제한과
+    재시도를 적용합니다.
+    """
+
+    def __init__(self, concurrency=8, requests_per_second=5.0, retries=3,
+                 backoff_factor=0.5, timeout=30, session=None):
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.session = session or create_session(
+            pool_size=self.concurrency, retries=retries, backoff_factor=backoff_factor
+        )
+        self.rate_limiter = HostRateLimiter(requests_per_second)
+        self.logger = logging.getLogger(__name__)
+
+    def fetch(self, url, headers=None):
+        """속도 제한을 지켜 단일 URL 요청"""
+        self.rate_limiter.wait(url)
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+    def crawl(self, urls, handler, prefetch=2):
+        """URL 목록을 병렬로 처리하고 완료된 순서대로 (url, 결과, 오류) 반환
+
+        handler는 url을 받아 결과를 반환하는 함수이며, 보통 fetch를 호출합니다.
+        urls는 제너레이터도 가능하며, 한 번에 concurrency * prefetch개까지만 요청을 맡기고
+        결과가 소비될 때마다 다음 URL을 꺼내므로 소비 쪽이 느리면 크롤링도 함께 늦춰집니다.
+        """
+        urls = iter(urls)
+        max_pending = self.concurrency * max(1, prefetch)
+        futures = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            try:
+                while True:
+                    for url in urls:
+                        futures[executor.submit(handler, url)] = url
+                        if len(futures) >= max_pending:
+                            break
+                    if not futures:
+                        return
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        url = futures.pop(future)
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            yield url, None, e
+                        else:
+                            yield url, result, None
+            finally:
+                # 소비가 중간에 멈추면 아직 시작하지 않은 요청은 취소
+                for future in futures:
+                    future.cancel()
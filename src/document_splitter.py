@@ -0,0 +1,134 @@
+import json
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_text_splitters import MarkdownHeaderTextSplitter
+
+# 마크다운 헤더 기준으로 분할 (HTML의 h1~h3도 이 헤더로 바꾸어 분할)
+HEADERS_TO_SPLIT_ON = [
+    ("#", "Titre 1"),
+    ("##", "Sous-titre 1"),
+    ("###", "Sous-titre 2"),
+]
+HTML_HEADER_TAGS = {'h1': '#', 'h2': '##', 'h3': '###'}
+# 청크 크기를 좀 더 작게 설정 (512 -> 300)하여 토큰 수를 제한
+CHUNK_SIZE = 300
+CHUNK_OVERLAP = 20
+SEPARATORS = ["\n\n", "\n", "(?<=\. )", " ", ""]
+
+
+def sectioned_text(soup, separator='', strip=False):
+    """HTML의 h1~h3을 마크다운 헤더 줄로 바꾸어 텍스트 추출
+
+    get_text()만 사용하면 제목이 본문에 섞여 마크다운 헤더 분할이 아무 효과가 없으므로,
+    제목 태그를 자리표시자로 바꾼 뒤 get_text(separator, strip)으로 추출하고
+    자리표시자를 "\\n\\n## 제목\\n\\n" 형태의 줄로 되돌립니다. 제목이 없으면 get_text()와 같습니다.
+    """
+    headings = []
+    for tag in soup.find_all(list(HTML_HEADER_TAGS)):
+        # 다른 제목 안에 들어 있는 태그는 바깥 제목에 포함
+        if tag.find_parent(list(HTML_HEADER_TAGS)):
+            continue
+        title = ' '.join(tag.get_text(' ', strip=True).split())
+        marker = f"\x00{len(headings)}\x00"
+        headings.append((marker, f"\n\n{HTML_HEADER_TAGS[tag.name]} {title}\n\n" if title else "\n\n"))
+        tag.replace_with(marker)
+
+    text = soup.get_text(separator, strip=strip)
+    for marker, line in headings:
+        text = text.replace(f"{separator}{marker}{separator}" if separator else marker, line, 1)
+        text = text.replace(marker, line, 1)
+    return text
+
+
+def create_splitters():
+    """마크다운 헤더 분할기와 문자 단위 분할기"""
+    markdown_splitter = MarkdownHeaderTextSplitter(headers_to_split_on=HEADERS_TO_SPLIT_ON)
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        separators=SEPARATORS,
+        length_function=len  # 단순 문자 길이 기준
+    )
+    return markdown_splitter, splitter
+
+
+def splitter_fingerprint():
+    """분할 설정의 지문 (설정이 바뀌면 저장된 청크를 재사용하지 않고 다시 분할)"""
+    settings = {
+        'headers': HEADERS_TO_SPLIT_ON,
+        'chunk_size': CHUNK_SIZE,
+        'chunk_overlap': CHUNK_OVERLAP,
+        'separators': SEPARATORS,
+    }
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def split_markdown(markdown_splitter, doc):
+    """마크다운 헤더 기준으로 분할하고 원본 메타데이터 병합"""
+    md_doc = markdown_splitter.split_text(doc.page_content)
+    for i in range(len(md_doc)):
+        md_doc[i].metadata = md_doc[i].metadata | doc.metadata
+    return md_doc
+
+
+def split_with(splitters, doc):
+    """문서 하나를 헤더 구간으로 나눈 뒤 청크로 분할 (chunk_index는 붙이지 않음)"""
+    markdown_splitter, splitter = splitters
+    return splitter.split_documents(split_markdown(markdown_splitter, doc))
+
+
+_worker_splitters = None
+
+
+def split_in_worker(docs):
+    """작업 프로세스에서 문서 묶음을 분할 (분할기는 프로세스마다 한 번만 생성)"""
+    global _worker_splitters
+    if _worker_splitters is None:
+        _worker_splitters = create_splitters()
+    return [split_with(_worker_splitters, doc) for doc in docs]
+
+
+class ParallelSplitter:
+    """문서 분할을 프로세스 풀에 나누어 맡기는 분할기
+
+    결과는 항상 입력 순서대로 돌려주므로 직렬 분할과 바이트 단위로 같은 청크가 나옵니다.
+    분할은 순수 파이썬 연산이라 스레드로는 GIL 때문에 빨라지지 않으므로 프로세스를 사용하며,
+    색인 파이프라인의 다른 스레드와 함께 fork되지 않도록 spawn 방식으로 작업 프로세스를 만듭니다.
+    풀은 처음 사용할 때 만들어집니다.
+    """
+
+    def __init__(self, workers, batch_size=8):
+        self.workers = workers
+        self.batch_size = batch_size
+        self._executor = None
+
+    def get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def submit(self, docs):
+        """문서 묶음의 분할을 예약하고 [문서별 청크 목록] Future 반환"""
+        return self.get_executor().submit(split_in_worker, list(docs))
+
+    def map(self, docs):
+        """모든 문서를 batch_size개씩 나누어 분할하고 입력 순서대로 [문서별 청크 목록] 반환"""
+        docs = list(docs)
+        batches = [docs[i:i + self.batch_size] for i in range(0, len(docs), self.batch_size)]
+        results = []
+        for batch_result in self.get_executor().map(split_in_worker, batches):
+            results.extend(batch_result)
+        return results
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
@@ -0,0 +1,202 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from array import array
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from metrics import get_registry
+
+
+class CachedEmbeddings(Embeddings):
+    """디스크 기반 임베딩 캐시
+
+    (모델, 차원, sha256(텍스트)) 키로 벡터를 SQLite에 저장하여 같은 텍스트는
+    임베딩 API를 두 번 호출하지 않습니다. 최대 항목 수를 넘으면 가장 오래
+    사용되지 않은 항목부터 제거합니다.
+    """
+
+    def __init__(self, embeddings: Embeddings, cache_path, max_entries=200000):
+        self.embeddings = embeddings
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.logger = logging.getLogger(__name__)
+
+        model = getattr(embeddings, 'model', None) or type(embeddings).__name__
+        dimensions = getattr(embeddings, 'dimensions', None)
+        self.namespace = f"{model}:{dimensions}"
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON embeddings(last_access)")
+        self._conn.commit()
+        # 저장할 때마다 COUNT(*)로 전체 테이블을 세지 않도록 항목 수를 메모리에 유지
+        # (INSERT OR REPLACE로 덮어쓴 항목도 더하므로 실제 수보다 크거나 같은 추정치)
+        self._entry_count = self._count_entries()
+
+    def _key(self, text, kind):
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        return f"{self.namespace}:{kind}:{digest}"
+
+    def _lookup(self, keys):
+        """캐시에서 키 목록 조회 후 접근 시각 갱신"""
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            # SQLite 변수 개수 제한을 피하기 위해 나누어 조회
+            for i in range(0, len(unique_keys), 500):
+                chunk = unique_keys[i:i+500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array('f', blob).tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+        return found
+
+    def _store(self, items):
+        """(키, 벡터) 목록 저장 후 필요하면 오래된 항목 제거
+
+        캐시 적중 시와 같은 값을 돌려주도록 float32로 변환된 벡터를 반환합니다.
+        """
+        now = time.time()
+        rows = [(key, array('f', vector)) for key, vector in items]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+                [(key, vector.tobytes(), now) for key, vector in rows]
+            )
+            self._conn.commit()
+            self._entry_count += len(rows)
+            if self._entry_count > self.max_entries:
+                self._evict()
+        return {key: vector.tolist() for key, vector in rows}
+
+    def _count_entries(self):
+        return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _evict(self):
+        """추정한 항목 수가 최대치를 넘었을 때 실제 수를 다시 세고 오래된 항목 제거"""
+        count = self._count_entries()
+        self._entry_count = count
+        if count <= self.max_entries:
+            return
+        # 여유를 두고 최대 크기의 90%까지 줄임
+        to_remove = count - int(self.max_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+            (to_remove,)
+        )
+        self._conn.commit()
+        self._entry_count = count - to_remove
+        self.logger.info(f"임베딩 캐시에서 {to_remove}개 항목 제거")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text, 'doc') for text in texts]
+        found = self._lookup(keys)
+
+        # 캐시에 없는 텍스트만 (중복 제거 후) 임베딩
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        miss_count = sum(1 for key in keys if key not in found)
+        with self._lock:
+            self.hits += len(texts) - miss_count
+            self.misses += miss_count
+        metrics = get_registry()
+        metrics.inc('embedding_cache_hits_total', len(texts) - miss_count, kind='document')
+        metrics.inc('embedding_cache_misses_total', miss_count, kind='document')
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            found.update(self._store(zip(missing.keys(), vectors)))
+
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text, 'query')
+        found = self._lookup([key])
+        if key in found:
+            with self._lock:
+                self.hits += 1
+            get_registry().inc('embedding_cache_hits_total', kind='query')
+            return found[key]
+
+        with self._lock:
+            self.misses += 1
+        get_registry().inc('embedding_cache_misses_total', kind='query')
+        vector = self.embeddings.embed_query(text)
+        return self._store([(key, vector)])[key]
+
+    def get_stats(self):
+        """캐시 적중/미스 통계"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+    def log_stats(self):
+        stats = self.get_stats()
+        self.logger.info(
+            f"임베딩 캐시 통계: 적중 {stats['hits']}건, 미스 {stats['misses']}건, "
+            f"적중률 {stats['hit_rate']:.1%}"
+        )
+
+
+class LazyEmbeddings(Embeddings):
+    """처음 임베딩이 필요할 때 실제 임베딩 객체를 생성하는 프록시
+
+    인덱스를 여는 데에는 임베딩 객체만 있으면 되므로, 클라이언트 생성을 첫 질문
+    시점으로 미뤄 앱 시작 시간을 줄입니다.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._embeddings = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Embeddings:
+        if self._embeddings is None:
+            with self._lock:
+                if self._embeddings is None:
+                    self._embeddings = self._factory()
+        return self._embeddings
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.get().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.get().embed_query(text)
+
+    def __getattr__(self, name):
+        # log_stats, get_stats 등 감싼 객체의 속성은 그대로 전달
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
@@ -0,0 +1,271 @@
+import os
+import json
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import get_registry
+
+RATE_LIMIT = 'rate_limit'
+RETRYABLE = 'retryable'
+INVALID_INPUT = 'invalid_input'
+FATAL = 'fatal'
+
+# 상태 코드 없이 오는 토큰 한도 초과 오류의 메시지
+TOKEN_LIMIT_MESSAGES = ('maximum context length', 'context_length_exceeded', 'too many tokens')
+
+
+def classify_error(error):
+    """임베딩 오류를 속도 제한 / 재시도 가능 / 입력 오류 / 치명적 오류로 분류
+
+    - 입력 오류(400/413/422, 토큰 한도 초과)만 텍스트 탓이므로 배치를 나누어 격리합니다.
+    - 401/403/404(잘못된 키, 모델 권한, 배포 이름)와 상태 코드 없는 알 수 없는 오류는
+      요청 전체의 문제이므로 치명적 오류로 보고 빌드를 중단합니다.
+    openai 패키지에 직접 의존하지 않도록 예외 이름과 상태 코드로 판별합니다.
+    """
+    name = type(error).__name__
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+
+    if status == 429 or name == 'RateLimitError':
+        return RATE_LIMIT
+    if (status is not None and status >= 500) or name in (
+            'APITimeoutError', 'APIConnectionError', 'InternalServerError', 'ServiceUnavailableError'):
+        return RETRYABLE
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return RETRYABLE
+    if status in (400, 413, 422) or name in ('BadRequestError', 'UnprocessableEntityError'):
+        return INVALID_INPUT
+    message = str(error).lower()
+    if any(marker in message for marker in TOKEN_LIMIT_MESSAGES):
+        return INVALID_INPUT
+    return FATAL
+
+
+class AIMDConcurrencyLimiter:
+    """AIMD 방식으로 동시 요청 수를 조절하는 리미터
+
+    성공할 때마다 한도를 조금씩(1/한도) 늘리고, 429 응답을 받으면 절반으로 줄입니다.
+    """
+
+    def __init__(self, initial=2, minimum=1, maximum=8, decrease_interval=1.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.in_flight = 0
+        self.decrease_interval = decrease_interval
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self):
+        with self._condition:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+    def on_rate_limit(self):
+        with self._condition:
+            # 동시에 실패한 여러 요청 때문에 연달아 줄어들지 않도록 간격을 둠
+            now = time.monotonic()
+            if now - self._last_decrease < self.decrease_interval:
+                return
+            self._last_decrease = now
+            self.limit = max(self.minimum, self.limit / 2)
+
+
+class BatchPacker:
+    """항목을 차례로 받아 토큰 한도와 배치 크기를 넘지 않는 배치로 묶음
+
+    EmbeddingScheduler.pack과 스트리밍 색인(DataLoader.sync_db)이 같은 규칙으로 묶도록 함께 사용합니다.
+    """
+
+    def __init__(self, count_tokens, max_tokens, max_batch_size):
+        self.count_tokens = count_tokens
+        self.max_tokens = max_tokens
+        self.max_batch_size = max_batch_size
+        self.items = []
+        self.tokens = 0
+
+    def add(self, item, text):
+        """항목을 추가하고, 이 항목이 들어가지 않아 닫힌 이전 배치가 있으면 반환"""
+        tokens = self.count_tokens(text)
+        batch = None
+        if self.items and (self.tokens + tokens > self.max_tokens or len(self.items) >= self.max_batch_size):
+            batch = self.flush()
+        self.items.append(item)
+        self.tokens += tokens
+        return batch
+
+    def flush(self):
+        """채우던 배치를 반환하고 비움 (비어 있으면 None)"""
+        batch = self.items or None
+        self.items, self.tokens = [], 0
+        return batch
+
+
+class EmbeddingScheduler:
+    """토큰 수 기준으로 배치를 묶고 여러 요청을 동시에 보내는 임베딩 스케줄러
+
+    - 배치는 tiktoken 토큰 수가 요청 한도를 넘지 않도록 채웁니다.
+    - 동시 요청 수는 AIMD로 조절하며, 429 응답 시 줄이고 성공 시 늘립니다.
+    - 재시도 가능한 오류는 지수 백오프로 재시도하고, 입력 오류는 배치를 반으로
+      나누어 원인 텍스트를 찾아낸 뒤 격리 파일에 기록하고 건너뜁니다.
+    - 인증/권한/배포 오류 같은 치명적 오류와 재시도를 모두 소진한 429/일시적 오류는
+      격리하지 않고 그대로 발생시켜 빌드를 중단합니다. 새 버전은 승격되지 않아 이전 버전이
+      계속 서비스되며, 저널에 기록된 청크는 --resume으로 이어서 빌드할 수 있습니다.
+    """
+
+    def __init__(self, embeddings, max_tokens_per_request=250000, max_batch_size=1000,
+                 max_concurrency=8, initial_concurrency=2, max_retries=6,
+                 quarantine_path=None, encoding_name='cl100k_base'):
+        self.embeddings = embeddings
+        self.max_tokens_per_request = max_tokens_per_request
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.quarantine_path = quarantine_path
+        self.logger = logging.getLogger(__name__)
+
+        self.limiter = AIMDConcurrencyLimiter(initial=initial_concurrency, maximum=max_concurrency)
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='embed')
+        self.stats = {'requests': 0, 'rate_limited': 0, 'retried': 0, 'quarantined': 0, 'tokens': 0}
+        self._stats_lock = threading.Lock()
+        self._quarantine_lock = threading.Lock()
+        self._encoding = self._load_encoding(encoding_name)
+
+    def _load_encoding(self, encoding_name):
+        try:
+            import tiktoken
+            return tiktoken.get_encoding(encoding_name)
+        except Exception as e:
+            self.logger.warning(f"tiktoken 인코딩을 불러오지 못해 글자 수로 토큰을 추정합니다: {e}")
+            return None
+
+    def count_tokens(self, text):
+        if self._encoding is None:
+            return len(text)
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+    def _count(self, key, value=1):
+        with self._stats_lock:
+            self.stats[key] += value
+
+    def packer(self):
+        return BatchPacker(self.count_tokens, self.max_tokens_per_request, self.max_batch_size)
+
+    def pack(self, texts):
+        """텍스트 인덱스를 토큰 한도와 배치 크기에 맞춰 묶음"""
+        packer = self.packer()
+        batches = [packer.add(i, text) for i, text in enumerate(texts)] + [packer.flush()]
+        return [batch for batch in batches if batch]
+
+    def submit(self, texts, keys=None):
+        """배치 하나를 비동기로 임베딩 (동시 요청 한도에 도달하면 대기)
+
+        Future는 텍스트별 벡터 목록을 반환하며, 격리된 텍스트 자리는 None입니다.
+        """
+        keys = keys or [None] * len(texts)
+        self.limiter.acquire()
+        try:
+            future = self.executor.submit(self._run, list(texts), list(keys))
+        except Exception:
+            self.limiter.release()
+            raise
+        future.add_done_callback(lambda _: self.limiter.release())
+        return future
+
+    def embed_documents(self, texts, keys=None):
+        """텍스트 전체를 토큰 기준으로 묶어 동시에 임베딩 (블로킹)"""
+        keys = keys or [None] * len(texts)
+        futures = [
+            (batch, self.submit([texts[i] for i in batch], [keys[i] for i in batch]))
+            for batch in self.pack(texts)
+        ]
+        results = [None] * len(texts)
+        for batch, future in futures:
+            for i, vector in zip(batch, future.result()):
+                results[i] = vector
+        return results
+
+    def _run(self, texts, keys):
+        try:
+            return self._embed_with_retry(texts)
+        except Exception as e:
+            # 입력 오류가 아니면 텍스트 문제가 아니므로 나누거나 격리하지 않음
+            if classify_error(e) != INVALID_INPUT:
+                raise
+            if len(texts) == 1:
+                self._quarantine(texts[0], keys[0], e)
+                return [None]
+            # 입력 오류는 배치를 반으로 나누어 원인 텍스트를 좁혀 감
+            half = (len(texts) + 1) // 2
+            self.logger.info(f"임베딩 입력 오류 ({e}), 배치를 {half}개 단위로 나누어 재시도합니다.")
+            return self._run(texts[:half], keys[:half]) + self._run(texts[half:], keys[half:])
+
+    def _embed_with_retry(self, texts):
+        """속도 제한/재시도 가능한 오류는 지수 백오프로 재시도, 나머지는 그대로 발생"""
+        metrics = get_registry()
+        attempt = 0
+        while True:
+            try:
+                self._count('requests')
+                with metrics.span('index.embed_batch', size=len(texts), attempt=attempt):
+                    vectors = self.embeddings.embed_documents(texts)
+                self.limiter.on_success()
+                tokens = sum(self.count_tokens(text) for text in texts)
+                self._count('tokens', tokens)
+                metrics.inc('embeddings_total', len(texts), kind='document')
+                metrics.inc('embedding_tokens_total', tokens)
+                return vectors
+            except Exception as e:
+                kind = classify_error(e)
+                if kind in (INVALID_INPUT, FATAL) or attempt >= self.max_retries:
+                    raise
+                if kind == RATE_LIMIT:
+                    self._count('rate_limited')
+                    metrics.inc('embedding_rate_limited_total')
+                    self.limiter.on_rate_limit()
+                self._count('retried')
+                delay = min(60.0, (2 ** attempt) * 0.5) * (0.5 + random.random())
+                self.logger.warning(
+                    f"임베딩 요청 실패 ({kind}): {e}, {delay:.1f}초 후 재시도 "
+                    f"(동시 요청 한도 {int(self.limiter.limit)})"
+                )
+                time.sleep(delay)
+                attempt += 1
+
+    def _quarantine(self, text, key, error):
+        """입력 오류로 실패한 텍스트를 격리 파일에 기록"""
+        self._count('quarantined')
+        self.logger.error(f"임베딩 입력 오류로 격리합니다 ({key}): {error}")
+        if not self.quarantine_path:
+            return
+        record = {'key': key, 'error': str(error), 'text': text}
+        with self._quarantine_lock:
+            directory = os.path.dirname(self.quarantine_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.quarantine_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def log_stats(self):
+        self.logger.info(
+            f"임베딩 스케줄러 통계: 요청 {self.stats['requests']}건, 토큰 {self.stats['tokens']}개, "
+            f"429 {self.stats['rate_limited']}건, 재시도 {self.stats['retried']}건, "
+            f"격리 {self.stats['quarantined']}건, 최종 동시 요청 한도 {int(self.limiter.limit)}"
+        )
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
@@ -1,13 +1,21 @@
 import os
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
 import pandas as pd
 from help_desk import HelpDesk
 from dotenv import load_dotenv, find_dotenv
-from langchain_core.smith import evaluation
-from config import EVALUATION_DATASET
+from config import EVALUATION_DATASET, EVALUATION_CONCURRENCY, EVALUATION_CHECKPOINT
 
 
 def predict(model, question):
-    result, sources = model.retrieval_qa_inference(question, verbose=False)
+    # 오류 안내 문구가 예측으로 채점되지 않도록 예외를 그대로 받고, 캐시된 답변은 지연 시간과
+    # 품질을 왜곡하므로 답변 캐시를 사용하지 않음
+    result, sources = model.retrieval_qa_inference(question, verbose=False, raise_errors=True, use_cache=False)
     return result
 
 
@@ -16,61 +24,161 @@ def open_evaluation_dataset(filepath):
     return df
 
 
-def get_levenshtein_distance(model, reference_text, prediction_text):
+def get_levenshtein_evaluator():
+    """행마다 새로 만들지 않도록 한 번만 생성하여 재사용 (상태가 없어 여러 스레드에서 공유 가능)"""
     from langchain_community.evaluation.string_distance import StringDistanceEvalChain
-    evaluator = StringDistanceEvalChain()
-    return evaluator.evaluate_strings(
-        prediction=prediction_text,
-        reference=reference_text
-    )
+    return StringDistanceEvalChain()
 
-def get_cosine_distance(model, reference_text, prediction_text):
-    from langchain_community.evaluation.embedding_distance import EmbeddingDistanceEvalChain, EmbeddingDistance
-    evaluator = EmbeddingDistanceEvalChain(distance_metric=EmbeddingDistance.COSINE)
+
+def get_levenshtein_distance(evaluator, reference_text, prediction_text):
     return evaluator.evaluate_strings(
         prediction=prediction_text,
         reference=reference_text
     )
 
-def evaluate_dataset(model, dataset, verbose=True):
-    predictions = []
-    levenshtein_distances = []
-    cosine_distances = []
-    for i, row in dataset.iterrows():
-        prediction_text = predict(model, row['Questions'])
-
-        # Distances
-        levenshtein_distance = get_levenshtein_distance(model, row['Réponses'].strip(), prediction_text.strip())
-        cosine_distance = get_cosine_distance(model, row['Réponses'].strip(), prediction_text.strip())
-
-        if verbose:
-            print("\n QUESTIONS \n", row['Questions'])
-            print("\n REPONSES \n", row['Réponses'])
-            print("\n PREDICTION \n", prediction_text)
-            print("\n LEV DISTANCE \n", levenshtein_distance['score'])
-            print("\n COS DISTANCE \n", cosine_distance['score'])
 
-        predictions.append(prediction_text)
-        levenshtein_distances.append(levenshtein_distance['score'])
-        cosine_distances.append(cosine_distance['score'])
+def get_cosine_distances(model, reference_texts, prediction_texts):
+    """정답과 예측을 한 번에 임베딩하여 행별 코사인 거리(1 - 코사인 유사도)를 벡터 연산으로 계산
+
+    모델의 (캐시된) 임베딩을 재사용하므로 같은 문자열을 반복 임베딩하지 않습니다.
+    """
+    if not reference_texts:
+        return np.empty(0)
+    vectors = np.asarray(model.embeddings.embed_documents(list(reference_texts) + list(prediction_texts)),
+                         dtype=np.float32)
+    references, predictions = vectors[:len(reference_texts)], vectors[len(reference_texts):]
+    norms = np.linalg.norm(references, axis=1) * np.linalg.norm(predictions, axis=1)
+    similarities = np.einsum('ij,ij->i', references, predictions) / np.where(norms == 0, 1.0, norms)
+    return 1.0 - similarities
+
+
+def load_checkpoint(checkpoint_path):
+    """중단된 평가에서 이미 끝난 행의 결과 {행 번호: 결과}"""
+    completed = {}
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return completed
+    with open(checkpoint_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # 기록 도중 중단된 마지막 줄은 무시하고 다시 평가
+                continue
+            completed[record['index']] = record
+    return completed
+
+
+def evaluate_row(model, evaluator, index, question, reference):
+    """질문 하나를 추론하고 지연 시간, 토큰 수, Levenshtein 거리를 계산"""
+    start = time.perf_counter()
+    prediction_text = predict(model, question)
+    latency = time.perf_counter() - start
+    levenshtein_distance = get_levenshtein_distance(evaluator, reference.strip(), prediction_text.strip())
+    return {
+        'index': index,
+        'question': question,
+        'prediction': prediction_text,
+        'latency_seconds': latency,
+        'question_tokens': model.context_builder.count_tokens(question),
+        'prediction_tokens': model.context_builder.count_tokens(prediction_text),
+        'levenshtein_distance': levenshtein_distance['score'],
+    }
+
+
+def evaluate_dataset(model, dataset, verbose=True, max_workers=EVALUATION_CONCURRENCY,
+                     checkpoint_path=EVALUATION_CHECKPOINT):
+    """데이터셋의 질문을 max_workers개씩 동시에 평가
+
+    끝난 행은 checkpoint_path에 한 줄씩 기록하므로 중단된 평가를 다시 실행하면
+    남은 행만 평가합니다. 추론에 실패한 행은 기록하지 않고, 하나라도 실패하면 결과를
+    저장하지 않고 RuntimeError를 올리므로 다시 실행하면 실패한 행만 평가합니다.
+    코사인 거리는 모든 행이 끝난 뒤 한 번에 계산하며, 평가가 끝나면 체크포인트를 지웁니다.
+    답변 캐시는 사용하지 않습니다 (모델의 캐시 설정은 바꾸지 않음).
+    """
+    completed = load_checkpoint(checkpoint_path)
+    # 데이터셋이 바뀌어 질문이 다른 행의 결과는 사용하지 않음
+    completed = {
+        index: record for index, record in completed.items()
+        if index in dataset.index and dataset.at[index, 'Questions'] == record['question']
+    }
+    pending = [index for index in dataset.index if index not in completed]
+    if completed:
+        print(f"체크포인트에서 {len(completed)}개 행을 불러왔습니다. 남은 {len(pending)}개 행을 평가합니다.")
+
+    evaluator = get_levenshtein_evaluator()
+    failed = []
+    checkpoint_lock = threading.Lock()
+    checkpoint = open(checkpoint_path, 'a', encoding='utf-8') if checkpoint_path else None
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(evaluate_row, model, evaluator, index,
+                                dataset.at[index, 'Questions'], dataset.at[index, 'Réponses']): index
+                for index in pending
+            }
+            for future in as_completed(futures):
+                try:
+                    record = future.result()
+                except Exception as e:
+                    failed.append(futures[future])
+                    print(f"{futures[future]}번 행 평가 실패, 다음 실행에서 다시 평가합니다: {e}")
+                    continue
+                completed[record['index']] = record
+                if checkpoint is not None:
+                    with checkpoint_lock:
+                        checkpoint.write(json.dumps(record, ensure_ascii=False) + '\n')
+                        checkpoint.flush()
+                if verbose:
+                    print("\n QUESTIONS \n", record['question'])
+                    print("\n REPONSES \n", dataset.at[record['index'], 'Réponses'])
+                    print("\n PREDICTION \n", record['prediction'])
+                    print("\n LEV DISTANCE \n", record['levenshtein_distance'])
+                    print(f"\n LATENCY \n {record['latency_seconds']:.2f}s")
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+    if failed:
+        raise RuntimeError(f"{len(failed)}개 행의 평가가 실패했습니다. 다시 실행하면 실패한 행만 평가합니다.")
+
+    records = [completed[index] for index in dataset.index]
+    predictions = [record['prediction'] for record in records]
+    cosine_distances = get_cosine_distances(
+        model,
+        [reference.strip() for reference in dataset['Réponses']],
+        [prediction.strip() for prediction in predictions]
+    )
 
     dataset['Prédiction'] = predictions
-    dataset['Levenshtein_Distance'] = levenshtein_distances
+    dataset['Levenshtein_Distance'] = [record['levenshtein_distance'] for record in records]
     dataset['Cosine_Distance'] = cosine_distances
+    dataset['Latency_Seconds'] = [record['latency_seconds'] for record in records]
+    dataset['Question_Tokens'] = [record['question_tokens'] for record in records]
+    dataset['Prediction_Tokens'] = [record['prediction_tokens'] for record in records]
     dataset.to_csv(EVALUATION_DATASET, index=False, sep= '\t')
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
     return dataset
 
 
-def run():
+def run(model):
     dataset = open_evaluation_dataset(EVALUATION_DATASET)
-    results = evaluate_dataset(model, dataset)
+    return evaluate_dataset(model, dataset)
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="평가 데이터셋으로 답변 품질과 지연 시간 측정")
+    parser.add_argument('--workers', type=int, default=EVALUATION_CONCURRENCY, help="동시에 평가할 질문 수")
+    parser.add_argument('--quiet', action='store_true', help="행별 결과를 출력하지 않음")
+    args = parser.parse_args()
+
     load_dotenv(find_dotenv())
     model = HelpDesk(new_db=False)
     dataset = open_evaluation_dataset(EVALUATION_DATASET)
-    evaluate_dataset(model, dataset)
+    evaluate_dataset(model, dataset, verbose=not args.quiet, max_workers=args.workers)
 
     print('Mean Levenshtein distance: ', dataset['Levenshtein_Distance'].mean())
-    print('Mean Cosine distance: ', dataset['Cosine_Distance'].mean())
\ No newline at end of file
+    print('Mean Cosine distance: ', dataset['Cosine_Distance'].mean())
+    print('P50 latency (s): ', dataset['Latency_Seconds'].median())
+    print('P95 latency (s): ', dataset['Latency_Seconds'].quantile(0.95))
+    print('Mean prediction tokens: ', dataset['Prediction_Tokens'].mean())
+    model.embeddings.log_stats()
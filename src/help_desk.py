@@ -1,6 +1,10 @@
 import sys
+import time
+import asyncio
 import logging
+import threading
 import collections
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from langchain_openai import OpenAIEmbeddings, ChatOpenAI
 from langchain.chains import RetrievalQA
 from langchain.prompts import PromptTemplate
@@ -8,6 +12,41 @@ from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import HumanMessage, SystemMessage
 
 import load_db
+from embedding_cache import CachedEmbeddings, LazyEmbeddings
+from answer_cache import AnswerCache, normalize_question
+from singleflight import SingleFlight
+import vector_index
+import lexical_index
+from hybrid_search import HybridSearcher
+from context_builder import ContextBuilder
+from conversation_memory import ConversationMemory
+from metrics import get_registry
+from config import (
+    EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES, INDEX_RELOAD_INTERVAL,
+    ANSWER_CACHE_ENABLED, ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_TTL_SECONDS,
+    ANSWER_CACHE_SIMILARITY_THRESHOLD, INFERENCE_BATCH_CONCURRENCY,
+    RETRIEVER_BACKEND, VECTOR_INDEX_DTYPE, VECTOR_INDEX_PRELOAD,
+    LEXICAL_INDEX_ENABLED, HYBRID_RRF_K, EMBEDDING_QUERY_TIMEOUT,
+    CONTEXT_MAX_TOKENS, CONTEXT_DUPLICATE_THRESHOLD,
+    CONVERSATION_HISTORY_MAX_TOKENS, CONVERSATION_SUMMARY_MAX_TOKENS
+)
+
+def create_embeddings() -> CachedEmbeddings:
+    """디스크 캐시로 감싼 OpenAI 임베딩 생성 (HelpDesk 없이 DB를 빌드할 때도 사용)"""
+    # 모델명 지정 및 차원 크기 설정으로 최적화
+    embeddings = OpenAIEmbeddings(
+        model="text-embedding-3-small",  # 더 효율적인 임베딩 모델
+        dimensions=1024,  # 임베딩 차원 지정
+        retry_min_seconds=1,
+        retry_max_seconds=60,
+        show_progress_bar=True
+    )
+    return CachedEmbeddings(
+        embeddings,
+        cache_path=EMBEDDING_CACHE_PATH,
+        max_entries=EMBEDDING_CACHE_MAX_ENTRIES
+    )
+
 
 class HelpDesk():
     """Create the necessary objects to create a QARetrieval chain"""
@@ -21,25 +60,198 @@ class HelpDesk():
         self.logger.info("HelpDesk 초기화 시작...")
         self.new_db = new_db
         self.template = self.get_template()
-        self.embeddings = self.get_embeddings()
-        self.llm = self.get_llm()
+        # 임베딩/LLM 클라이언트와 체인은 처음 사용할 때 생성
+        self.embeddings = LazyEmbeddings(self.get_embeddings)
+        self._llm = None
+        self._retrieval_qa_chain = None
+        self._init_lock = threading.RLock()
         self.prompt = self.get_prompt()
 
+        self.data_loader = load_db.DataLoader()
+        self.index_store = self.data_loader.index_store
+        self._reload_lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._last_reload_check = 0.0
+        self._rebuild_lock = threading.Lock()
+        self._rebuild_thread = None
+        self.rebuild_status = {'state': 'idle', 'started_at': None, 'finished_at': None, 'error': None}
+        self.startup_metrics = {'index_load_seconds': None, 'first_query_seconds': None}
+        # 자주 묻는 질문은 LLM 호출 없이 답변 (인덱스 버전이 바뀌면 자동으로 비워짐)
+        self.answer_cache = AnswerCache(
+            max_entries=ANSWER_CACHE_MAX_ENTRIES,
+            ttl_seconds=ANSWER_CACHE_TTL_SECONDS,
+            similarity_threshold=ANSWER_CACHE_SIMILARITY_THRESHOLD
+        ) if ANSWER_CACHE_ENABLED else None
+        # 같은 질문이 동시에 들어오면 검색/LLM 호출을 한 번만 수행
+        self.singleflight = SingleFlight()
+        # 비동기 질문 공유는 이벤트 루프별로 (다른 루프의 태스크는 기다릴 수 없음)
+        self._async_inflight = {}
+        self._async_inflight_lock = threading.Lock()
+        # 스트리밍 응답의 최근 첫 토큰 지연(TTFT)과 전체 지연 시간(초)
+        self.latency_metrics = collections.deque(maxlen=200)
+        self._latency_lock = threading.Lock()
+        # 검색 경로(hybrid/vector/lexical)별 최근 검색 지연 시간(초, 질문 임베딩 포함)
+        self.retrieval_metrics = collections.defaultdict(lambda: collections.deque(maxlen=200))
+        self._embed_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='embed-query')
+        # 검색된 청크를 합치고 중복을 버린 뒤 토큰 예산까지만 프롬프트에 넣음
+        self.context_builder = ContextBuilder(
+            max_tokens=CONTEXT_MAX_TOKENS,
+            duplicate_threshold=CONTEXT_DUPLICATE_THRESHOLD
+        )
+        self.prompt_token_metrics = collections.deque(maxlen=200)
+        # 단계별 소요 시간(구간), 토큰/임베딩/캐시/오류 카운터 (METRICS_ENABLED=false이면 기록하지 않음)
+        self.metrics = get_registry()
+
         try:
+            start = time.perf_counter()
             if self.new_db:
                 self.logger.info("새 DB를 생성합니다...")
-                self.db = load_db.DataLoader().set_db(self.embeddings)
+                db = self.data_loader.set_db(self.embeddings)
             else:
                 self.logger.info("기존 DB를 로드합니다...")
-                self.db = load_db.DataLoader().get_db(self.embeddings)
-                
-            self.retriever = self.db.as_retriever(search_kwargs={"k": 4})  # 더 많은 문서 검색
-            self.retrieval_qa_chain = self.get_retrieval_qa()
-            self.logger.info("HelpDesk 초기화 완료")
+                db = self.data_loader.get_db(self.embeddings)
+
+            self.set_db(db, self.index_store.current_version())
+            self.startup_metrics['index_load_seconds'] = time.perf_counter() - start
+            self.logger.info(f"HelpDesk 초기화 완료 (인덱스 로드 {self.startup_metrics['index_load_seconds']:.2f}초)")
         except Exception as e:
             self.logger.error(f"HelpDesk 초기화 중 오류 발생: {e}")
             raise
 
+    def set_db(self, db, index_version):
+        """DB와 이를 사용하는 retriever, 체인을 교체"""
+        retriever = db.as_retriever(search_kwargs={"k": 4})  # 더 많은 문서 검색
+        searcher = HybridSearcher(
+            db,
+            vector_backend=self.get_search_backend(db, index_version),
+            lexical_index=self.get_lexical_index(db, index_version),
+            rrf_k=HYBRID_RRF_K
+        )
+        with self._db_lock:
+            previous = getattr(self, 'searcher', None)
+            self.db = db
+            self.searcher = searcher
+            self.retriever = retriever
+            self._retrieval_qa_chain = None
+            self.index_version = index_version
+            self._index_mtime = self.index_store.pointer_mtime()
+        # 이전 버전의 벡터 인덱스 파일을 놓음 (진행 중인 검색은 끝난 뒤에 닫힘)
+        if previous is not None and previous is not searcher:
+            previous.close()
+
+    def get_index(self):
+        """추론 중 DB가 교체되어도 일관되도록 (검색기, 인덱스 버전)을 함께 읽음"""
+        with self._db_lock:
+            return self.searcher, self.index_version
+
+    def get_index_directory(self, index_version):
+        return self.index_store.version_path(index_version) if index_version else self.index_store.root
+
+    def get_lexical_index(self, db, index_version):
+        """버전 디렉토리의 BM25 어휘 인덱스 (없으면 컬렉션으로 메모리에 만듦, 실패하면 None)"""
+        if not LEXICAL_INDEX_ENABLED:
+            return None
+        try:
+            start = time.perf_counter()
+            index = lexical_index.load_or_build(db, self.get_index_directory(index_version))
+            self.logger.info(f"어휘 인덱스 로드 완료: {index.count}개 청크 ({time.perf_counter() - start:.2f}초)")
+            return index
+        except Exception as e:
+            self.logger.error(f"어휘 인덱스를 열지 못해 벡터 검색만 사용합니다: {e}")
+            return None
+
+    def get_search_backend(self, db, index_version):
+        """RETRIEVER_BACKEND가 numpy이면 빌드 때 내보낸 메모리 매핑 벡터 인덱스를, 아니면 Chroma를 사용"""
+        if RETRIEVER_BACKEND != 'numpy':
+            return db
+        directory = self.get_index_directory(index_version)
+        try:
+            start = time.perf_counter()
+            index = vector_index.load(db, directory, dtype=VECTOR_INDEX_DTYPE, preload=VECTOR_INDEX_PRELOAD)
+            if index is None:
+                self.logger.warning("사용할 수 있는 NumPy 벡터 인덱스가 없어 Chroma로 검색합니다. (다음 빌드에서 내보냄)")
+                return db
+            self.logger.info(
+                f"NumPy 벡터 인덱스 로드 완료: {index.count}개 청크 ({index.dtype}, {time.perf_counter() - start:.2f}초)"
+            )
+            return index
+        except Exception as e:
+            self.logger.error(f"NumPy 벡터 인덱스를 열지 못해 Chroma로 검색합니다: {e}")
+            return db
+
+    def reload_db_if_changed(self):
+        """현재 인덱스 버전이 바뀌었으면 재시작 없이 새 버전을 다시 엶
+
+        포인터 파일은 INDEX_RELOAD_INTERVAL초마다 한 번만 확인합니다.
+        """
+        now = time.monotonic()
+        if now - self._last_reload_check < INDEX_RELOAD_INTERVAL:
+            return False
+        self._last_reload_check = now
+        if self.index_store.pointer_mtime() == self._index_mtime:
+            return False
+
+        with self._reload_lock:
+            version = self.index_store.current_version()
+            if version == self.index_version:
+                self._index_mtime = self.index_store.pointer_mtime()
+                return False
+            try:
+                self.logger.info(f"새 인덱스 버전 {version}을(를) 로드합니다. (이전 버전: {self.index_version})")
+                db = self.data_loader.get_db(self.embeddings)
+                self.set_db(db, version)
+                return True
+            except Exception as e:
+                self.logger.error(f"새 인덱스 버전 로드 중 오류 발생, 기존 버전을 계속 사용합니다: {e}")
+                return False
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            with self._init_lock:
+                if self._llm is None:
+                    self._llm = self.get_llm()
+        return self._llm
+
+    @property
+    def retrieval_qa_chain(self):
+        chain = self._retrieval_qa_chain
+        if chain is None:
+            with self._init_lock:
+                if self._retrieval_qa_chain is None:
+                    self._retrieval_qa_chain = self.get_retrieval_qa()
+                chain = self._retrieval_qa_chain
+        return chain
+
+    def start_rebuild(self, incremental=None):
+        """백그라운드 스레드에서 새 인덱스 버전 빌드
+
+        빌드가 끝나 승격되면 다음 질문부터 새 버전이 자동으로 로드됩니다.
+        이미 빌드 중이면 False를 반환합니다.
+        """
+        with self._rebuild_lock:
+            if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+                return False
+            self.rebuild_status = {'state': 'running', 'started_at': time.time(), 'finished_at': None, 'error': None}
+            self._rebuild_thread = threading.Thread(
+                target=self._run_rebuild, args=(incremental,), name='index-rebuild', daemon=True
+            )
+            self._rebuild_thread.start()
+            return True
+
+    def _run_rebuild(self, incremental):
+        try:
+            self.logger.info("백그라운드 DB 재빌드 시작...")
+            load_db.DataLoader().set_db(self.embeddings, incremental=incremental)
+            self.rebuild_status.update({'state': 'done', 'finished_at': time.time()})
+            # 다음 확인 주기를 기다리지 않고 바로 새 버전 로드
+            self._last_reload_check = 0.0
+            self.reload_db_if_changed()
+            self.logger.info("백그라운드 DB 재빌드 완료")
+        except Exception as e:
+            self.logger.error(f"백그라운드 DB 재빌드 중 오류 발생: {e}")
+            self.rebuild_status.update({'state': 'failed', 'finished_at': time.time(), 'error': str(e)})
+
     def get_template(self):
         template = """
         주어진 텍스트 조각을 기반으로 질문에 답변해 주세요:
@@ -61,18 +273,11 @@ class HelpDesk():
         )
         return prompt
 
-    def get_embeddings(self) -> OpenAIEmbeddings:
-        """OpenAI 임베딩 객체 생성"""
+    def get_embeddings(self) -> CachedEmbeddings:
+        """OpenAI 임베딩 객체 생성 (디스크 캐시로 감쌈)"""
         try:
             self.logger.info("OpenAI 임베딩 초기화 중...")
-            # 모델명 지정 및 차원 크기 설정으로 최적화
-            embeddings = OpenAIEmbeddings(
-                model="text-embedding-3-small",  # 더 효율적인 임베딩 모델
-                dimensions=1024,  # 임베딩 차원 지정
-                retry_min_seconds=1,
-                retry_max_seconds=60,
-                show_progress_bar=True
-            )
+            embeddings = create_embeddings()
             self.logger.info("임베딩 초기화 완료")
             return embeddings
         except Exception as e:
@@ -114,24 +319,541 @@ class HelpDesk():
             self.logger.error(f"RetrievalQA 체인 생성 중 오류 발생: {e}")
             raise
 
-    def retrieval_qa_inference(self, question, verbose=True):
-        """주어진 질문에 대한 답변 및 소스 문서 반환"""
+    def retrieval_qa_inference(self, question, verbose=True, raise_errors=False, use_cache=True):
+        """주어진 질문에 대한 답변 및 소스 문서 반환
+
+        같은 질문이나 임베딩이 매우 비슷한 질문은 답변 캐시에서 바로 반환합니다.
+        캐시에 없는 같은 질문이 동시에 들어오면 한 번만 계산하여 결과를 공유합니다.
+        여러 스레드(Streamlit 세션)에서 동시에 호출해도 안전합니다.
+        오류가 나면 안내 문구를 답변으로 반환하며, raise_errors=True이면 예외를 그대로 올립니다.
+        use_cache=False이면 답변 캐시를 읽지도 쓰지도 않습니다 (평가용).
+        """
+        try:
+            with self.metrics.span('qa.request', mode='sync') as span:
+                self.metrics.inc('qa_requests_total', mode='sync')
+                self.reload_db_if_changed()
+                self.logger.info(f"질문에 대한 추론 시작: '{question[:50]}...'")
+                start = time.perf_counter()
+                searcher, index_version = self.get_index()
+
+                cached = self.get_cached_answer(question, index_version) if use_cache else None
+                if cached is not None:
+                    span.set(cache='exact')
+                    self.logger.info(f"답변 캐시 적중 ({(time.perf_counter() - start) * 1000:.1f}ms)")
+                    return cached
+
+                # 캐시를 쓰지 않는 호출은 캐시를 쓰는 호출과 결과를 공유하지 않음
+                key = (normalize_question(question), index_version) + (() if use_cache else ('no-cache',))
+                (result, sources), shared = self.singleflight.do(
+                    key, lambda: self._compute_answer(question, searcher, index_version, start, use_cache)
+                )
+                if shared:
+                    span.set(shared=True)
+                    self.logger.info(f"진행 중인 동일 질문의 결과를 공유했습니다 ({(time.perf_counter() - start) * 1000:.1f}ms)")
+
+                if verbose:
+                    print(sources)
+
+                self.logger.info(f"추론 완료 ({(time.perf_counter() - start) * 1000:.1f}ms)")
+                return result, sources
+        except Exception as e:
+            self.logger.error(f"추론 중 오류 발생: {e}")
+            if raise_errors:
+                raise
+            error_msg = "죄송합니다. 질문 처리 중 오류가 발생했습니다."
+            return error_msg, "오류가 발생했습니다. 잠시 후 다시 시도해 주세요."
+
+    def _prepare_answer(self, question, searcher, index_version, start, use_cache=True):
+        """질문을 임베딩하여 유사 질문 캐시를 확인하고, 없으면 문서 검색
+
+        (캐시된 답변, 질문 벡터, 검색 문서)를 반환하며 캐시에 있으면 문서는 None입니다.
+        질문 임베딩은 한 번만 계산하여 캐시 조회와 문서 검색에 함께 사용합니다.
+        """
+        vector = self.embed_query_with_fallback(question, searcher)
+        if use_cache and self.answer_cache is not None and vector is not None:
+            cached = self.get_similar_answer(vector, index_version)
+            if cached is not None:
+                self.logger.info(f"유사 질문 답변 캐시 적중 ({(time.perf_counter() - start) * 1000:.1f}ms)")
+                return cached, vector, None
+        return None, vector, self.retrieve(question, vector, searcher, start)
+
+    def _compute_answer(self, question, searcher, index_version, start, use_cache=True):
+        """유사 질문 캐시를 확인하고 없으면 검색 후 LLM으로 답변 생성"""
+        cached, vector, docs = self._prepare_answer(question, searcher, index_version, start, use_cache)
+        if cached is not None:
+            return cached
+
+        answer = self.answer_from_docs(question, docs)
+        sources = self.list_top_k_sources(answer, k=2)
+        if self.startup_metrics['first_query_seconds'] is None:
+            # 클라이언트 생성까지 포함한 첫 질문 지연 시간
+            self.startup_metrics['first_query_seconds'] = time.perf_counter() - start
+
+        if use_cache and self.answer_cache is not None:
+            self.answer_cache.put(question, vector, (answer["result"], sources), index_version)
+        return answer["result"], sources
+
+    def stream_retrieval_qa_inference(self, question):
+        """답변을 토큰 단위로 스트리밍하는 제너레이터
+
+        ("token", 텍스트)를 생성되는 대로 반환한 뒤 마지막에 ("sources", 소스 문자열)을
+        반환합니다. 캐시된 답변은 한 번에 하나의 토큰으로 반환합니다.
+        캐시에 없는 같은 질문이 동시에 스트리밍되면 답변을 한 번만 생성하여 같은 토큰을 함께 보냅니다.
+        첫 토큰까지의 시간(TTFT)과 전체 시간은 latency_metrics에 기록됩니다.
+        """
+        start = time.perf_counter()
+        first_token_at = None
+        cached = False
+        events = None
+        self.metrics.inc('qa_requests_total', mode='stream')
         try:
-            self.logger.info(f"질문에 대한 추론 시작: '{question[:50]}...'")
-            # __call__ 대신 invoke 메서드 사용
-            answer = self.retrieval_qa_chain.invoke({"query": question})
-            sources = self.list_top_k_sources(answer, k=2)
-            
+            self.reload_db_if_changed()
+            self.logger.info(f"질문에 대한 스트리밍 추론 시작: '{question[:50]}...'")
+            searcher, index_version = self.get_index()
+
+            answer = self.get_cached_answer(question, index_version)
+            if answer is not None:
+                events = iter([("cached", None), ("token", answer[0]), ("sources", answer[1])])
+            else:
+                key = (normalize_question(question), index_version)
+                events, shared = self.singleflight.stream(
+                    key, lambda: self._stream_answer(question, searcher, index_version, start)
+                )
+                if shared:
+                    self.logger.info("진행 중인 동일 질문의 스트리밍 답변을 공유합니다.")
+
+            for kind, value in events:
+                if kind == "cached":
+                    cached = True
+                    continue
+                if first_token_at is None and kind == "token":
+                    first_token_at = time.perf_counter()
+                yield kind, value
+        except Exception as e:
+            self.metrics.inc('errors_total', stage='qa.stream')
+            self.logger.error(f"스트리밍 추론 중 오류 발생: {e}")
+            if first_token_at is None:
+                yield "token", "죄송합니다. 질문 처리 중 오류가 발생했습니다."
+            yield "sources", "오류가 발생했습니다. 잠시 후 다시 시도해 주세요."
+        finally:
+            # 공유 스트림에서 빠져나가야 마지막 호출이 끊길 때 생성이 중단됨
+            if hasattr(events, 'close'):
+                events.close()
+            self.record_latency(start, first_token_at, cached)
+
+    def _stream_answer(self, question, searcher, index_version, start):
+        """캐시 확인/검색 후 LLM 답변을 스트리밍하는 원본 제너레이터 (오류는 그대로 발생)
+
+        유사 질문 캐시에 적중하면 ("cached", None)을 먼저 반환합니다.
+        """
+        # yield를 포함하지 않는 준비 단계만 하나의 구간으로 묶음 (LLM 스트리밍은 따로 측정)
+        with self.metrics.span('qa.prepare', mode='stream'):
+            cached, vector, docs = self._prepare_answer(question, searcher, index_version, start)
+            if cached is None:
+                context_docs = self.prepare_context(question, docs)
+        if cached is not None:
+            yield "cached", None
+            yield "token", cached[0]
+            yield "sources", cached[1]
+            return
+
+        tokens = []
+        llm_start = time.perf_counter()
+        for chunk in self.llm.stream(self.build_prompt(question, context_docs)):
+            if not chunk.content:
+                continue
+            tokens.append(chunk.content)
+            yield "token", chunk.content
+
+        result = "".join(tokens)
+        self.metrics.observe('llm_stream_seconds', time.perf_counter() - llm_start)
+        self.metrics.inc('completion_tokens_total', self.context_builder.count_tokens(result))
+        sources = self.list_top_k_sources({"source_documents": docs}, k=2)
+        if self.startup_metrics['first_query_seconds'] is None:
+            self.startup_metrics['first_query_seconds'] = time.perf_counter() - start
+        if self.answer_cache is not None:
+            self.answer_cache.put(question, vector, (result, sources), index_version)
+        yield "sources", sources
+
+    def prepare_context(self, question, docs):
+        """검색 결과를 프롬프트용 문서로 정리하고 프롬프트 토큰 수를 기록
+
+        소스 목록은 원래 검색 결과로 만들고, 프롬프트에는 정리된 문서만 넣습니다.
+        """
+        with self.metrics.span('qa.prompt'):
+            context_docs, stats = self.context_builder.build(docs)
+            prompt_tokens = self.context_builder.count_tokens(self.build_prompt(question, context_docs))
+        with self._latency_lock:
+            self.prompt_token_metrics.append(prompt_tokens)
+        self.metrics.inc('prompt_tokens_total', prompt_tokens)
+        self.logger.info(
+            f"프롬프트 {prompt_tokens} 토큰 (검색 {stats['retrieved']}개 → 병합 {stats['merged']}개, "
+            f"중복 제거 {stats['duplicates']}개, 사용 {stats['packed']}개, 컨텍스트 {stats['context_tokens']} 토큰)"
+        )
+        return context_docs
+
+    def build_prompt(self, question, docs):
+        """"stuff" 체인과 같은 방식으로 문서를 이어 붙여 프롬프트 생성"""
+        context = "\n\n".join(doc.page_content for doc in docs)
+        return self.prompt.format(context=context, question=question)
+
+    def create_memory(self):
+        """대화 세션마다 하나씩 사용할 토큰 제한 대화 기록 생성"""
+        return ConversationMemory(
+            self.context_builder.count_tokens,
+            max_history_tokens=CONVERSATION_HISTORY_MAX_TOKENS,
+            summary_max_tokens=CONVERSATION_SUMMARY_MAX_TOKENS
+        )
+
+    def build_condense_prompt(self, question, memory):
+        return (
+            "다음 대화 요약과 최근 대화를 참고하여, 마지막 후속 질문을 이전 대화 없이도 이해할 수 있는 "
+            "하나의 독립적인 질문으로 다시 작성해 주세요. 질문만 출력하세요.\n"
+            f"대화 요약:\n{memory.summary or '(없음)'}\n"
+            f"최근 대화:\n{memory.history_text() or '(없음)'}\n"
+            f"후속 질문: {question}\n"
+            "독립적인 질문:"
+        )
+
+    def condense_question(self, question, memory):
+        """이전 대화를 반영한 독립적인 검색 질문 반환
+
+        대화 기록이 비어 있으면 LLM을 호출하지 않고 질문을 그대로 사용합니다.
+        프롬프트에는 요약과 토큰 창 안의 최근 대화만 들어가므로 대화가 길어져도 크기가 일정합니다.
+        """
+        if memory is None or memory.is_empty():
+            return question
+        try:
+            prompt = self.build_condense_prompt(question, memory)
+            with self.metrics.span('qa.condense'):
+                standalone = self.llm.invoke(prompt).content.strip()
+            self.logger.info(
+                f"후속 질문 재작성 ({self.context_builder.count_tokens(prompt)} 토큰): "
+                f"'{question[:50]}' → '{standalone[:50]}'"
+            )
+            return standalone or question
+        except Exception as e:
+            self.logger.warning(f"후속 질문 재작성 실패, 원래 질문으로 검색합니다: {e}")
+            return question
+
+    def summarize_history(self, summary, turns, max_tokens):
+        """기존 요약에 새로 밀려난 대화만 덧붙여 요약 갱신 (전체 대화를 다시 요약하지 않음)"""
+        prompt = (
+            f"다음은 지금까지의 대화 요약과 요약에 새로 포함할 대화입니다. "
+            f"두 내용을 합쳐 {max_tokens} 토큰 이내의 한국어 요약으로 갱신해 주세요.\n"
+            f"기존 요약:\n{summary or '(없음)'}\n"
+            f"새 대화:\n{turns}\n"
+            "갱신된 요약:"
+        )
+        try:
+            with self.metrics.span('conversation.summarize'):
+                updated = self.llm.invoke(prompt).content.strip()
+        except Exception as e:
+            # 요약에 실패해도 대화는 계속되도록 밀려난 대화를 그대로 덧붙임
+            self.logger.warning(f"대화 요약 실패, 이전 대화를 잘라서 보관합니다: {e}")
+            updated = f"{summary}\n{turns}".strip()
+        # LLM이 길이 제한을 지키지 않아도 요약 크기가 늘어나지 않도록 잘라냄
+        return self.context_builder.truncate(updated, max_tokens)
+
+    def update_memory(self, memory, question, answer):
+        """답변이 끝난 대화 한 턴을 기록 (창을 넘은 턴이 있으면 요약을 한 번 갱신)"""
+        if memory is None:
+            return
+        folded = memory.add_turn(
+            question, answer,
+            lambda summary, turns: self.summarize_history(summary, turns, memory.summary_max_tokens)
+        )
+        if folded:
+            self.logger.info(f"오래된 대화 {folded}턴을 요약에 반영했습니다 (최근 대화 {memory.history_tokens} 토큰)")
+
+    def conversational_inference(self, question, memory, verbose=False):
+        """이전 대화를 고려한 답변 및 소스 문서 반환
+
+        후속 질문을 독립적인 질문으로 바꿔 검색/답변한 뒤 대화 기록을 갱신합니다.
+        """
+        standalone = self.condense_question(question, memory)
+        result, sources = self.retrieval_qa_inference(standalone, verbose=verbose)
+        self.update_memory(memory, question, result)
+        return result, sources
+
+    def stream_conversational_inference(self, question, memory):
+        """stream_retrieval_qa_inference의 대화형 버전 (스트리밍이 끝나면 대화 기록 갱신)"""
+        standalone = self.condense_question(question, memory)
+        tokens = []
+        for kind, value in self.stream_retrieval_qa_inference(standalone):
+            if kind == "token":
+                tokens.append(value)
+            yield kind, value
+        self.update_memory(memory, question, "".join(tokens))
+
+    def record_latency(self, start, first_token_at, cached):
+        total = time.perf_counter() - start
+        ttft = first_token_at - start if first_token_at is not None else None
+        with self._latency_lock:
+            self.latency_metrics.append({'ttft_seconds': ttft, 'total_seconds': total, 'cached': cached})
+        if ttft is not None:
+            self.metrics.observe('ttft_seconds', ttft)
+        self.metrics.observe('response_seconds', total, mode='stream')
+        ttft_text = f"{ttft:.2f}초" if ttft is not None else "-"
+        self.logger.info(f"스트리밍 추론 완료 (첫 토큰 {ttft_text}, 전체 {total:.2f}초, 캐시 {cached})")
+
+    def get_latency_stats(self):
+        """최근 스트리밍 응답의 TTFT/전체 지연 시간 중앙값 (기록이 없으면 None)"""
+        with self._latency_lock:
+            records = list(self.latency_metrics)
+        ttfts = sorted(r['ttft_seconds'] for r in records if r['ttft_seconds'] is not None)
+        totals = sorted(r['total_seconds'] for r in records)
+        if not totals:
+            return None
+        return {
+            'count': len(totals),
+            'prompt_tokens_p50': self.get_prompt_tokens_p50(),
+            'ttft_p50_seconds': ttfts[len(ttfts) // 2] if ttfts else None,
+            'total_p50_seconds': totals[len(totals) // 2],
+        }
+
+    def get_prompt_tokens_p50(self):
+        with self._latency_lock:
+            values = sorted(self.prompt_token_metrics)
+        return values[len(values) // 2] if values else None
+
+    async def aretrieval_qa_inference(self, question, verbose=False):
+        """retrieval_qa_inference의 비동기 버전
+
+        임베딩과 벡터 검색은 스레드에서, LLM 호출은 체인의 ainvoke로 수행하므로
+        이벤트 루프를 막지 않습니다. 같은 이벤트 루프에서 같은 질문이 동시에 들어오면 하나의
+        태스크 결과를 공유합니다 (Streamlit 세션처럼 루프가 여러 개이면 루프마다 따로 계산).
+        """
+        self.metrics.inc('qa_requests_total', mode='async')
+        try:
+            await asyncio.to_thread(self.reload_db_if_changed)
+            searcher, index_version = self.get_index()
+
+            cached = self.get_cached_answer(question, index_version)
+            if cached is not None:
+                return cached
+
+            key = (asyncio.get_running_loop(), normalize_question(question), index_version)
+            with self._async_inflight_lock:
+                task = self._async_inflight.get(key)
+                if task is None:
+                    task = asyncio.ensure_future(self._acompute_answer(question, searcher, index_version))
+                    self._async_inflight[key] = task
+                    task.add_done_callback(lambda _: self._release_async_inflight(key))
+            result, sources = await asyncio.shield(task)
+
             if verbose:
                 print(sources)
-                
-            self.logger.info("추론 완료")
-            return answer["result"], sources
+            return result, sources
         except Exception as e:
-            self.logger.error(f"추론 중 오류 발생: {e}")
+            self.metrics.inc('errors_total', stage='qa.async')
+            self.logger.error(f"비동기 추론 중 오류 발생: {e}")
             error_msg = "죄송합니다. 질문 처리 중 오류가 발생했습니다."
             return error_msg, "오류가 발생했습니다. 잠시 후 다시 시도해 주세요."
 
+    def _release_async_inflight(self, key):
+        with self._async_inflight_lock:
+            self._async_inflight.pop(key, None)
+
+    async def _acompute_answer(self, question, searcher, index_version):
+        start = time.perf_counter()
+        cached, vector, docs = await asyncio.to_thread(self._prepare_answer, question, searcher, index_version, start)
+        if cached is not None:
+            return cached
+
+        context_docs = self.prepare_context(question, docs)
+        with self.metrics.span('qa.llm', mode='async'):
+            output = await self.retrieval_qa_chain.combine_documents_chain.ainvoke(
+                {"input_documents": context_docs, "question": question}
+            )
+        self.metrics.inc('completion_tokens_total', self.context_builder.count_tokens(output["output_text"]))
+        sources = self.list_top_k_sources({"source_documents": docs}, k=2)
+        if self.startup_metrics['first_query_seconds'] is None:
+            self.startup_metrics['first_query_seconds'] = time.perf_counter() - start
+        if self.answer_cache is not None:
+            self.answer_cache.put(question, vector, (output["output_text"], sources), index_version)
+        return output["output_text"], sources
+
+    def batch_retrieval_qa_inference(self, questions, max_concurrency=None):
+        """여러 질문을 한 번에 처리
+
+        질문 임베딩은 한 번의 요청으로, 벡터 검색은 한 번의 Chroma 쿼리로 묶고
+        LLM 호출은 max_concurrency(기본 INFERENCE_BATCH_CONCURRENCY)개까지 동시에 보냅니다.
+        결과는 입력 순서대로 {"result", "sources", "error"} 딕셔너리 목록으로 반환하며,
+        실패한 질문만 error에 오류 메시지가 담깁니다.
+        """
+        max_concurrency = max_concurrency or INFERENCE_BATCH_CONCURRENCY
+        results = [None] * len(questions)
+        self.metrics.inc('qa_requests_total', len(questions), mode='batch')
+        self.reload_db_if_changed()
+        searcher, index_version = self.get_index()
+
+        # 1. 정확히 같은 질문은 캐시에서, 나머지는 정규화한 질문 단위로 중복 제거
+        pending = collections.OrderedDict()
+        for i, question in enumerate(questions):
+            cached = self.get_cached_answer(question, index_version)
+            if cached is not None:
+                results[i] = {"result": cached[0], "sources": cached[1], "error": None}
+            else:
+                pending.setdefault(normalize_question(question), []).append(i)
+
+        if pending:
+            keys = list(pending)
+            texts = [questions[pending[key][0]] for key in keys]
+            try:
+                answers = self._batch_answer(texts, searcher, index_version, max_concurrency)
+            except Exception as e:
+                self.logger.error(f"일괄 추론 중 오류 발생: {e}")
+                answers = [e] * len(texts)
+
+            for key, answer in zip(keys, answers):
+                if isinstance(answer, Exception):
+                    item = {"result": None, "sources": None, "error": f"{type(answer).__name__}: {answer}"}
+                else:
+                    item = {"result": answer[0], "sources": answer[1], "error": None}
+                for i in pending[key]:
+                    results[i] = dict(item)
+
+        self.logger.info(
+            f"일괄 추론 완료: {len(questions)}건 중 캐시 {len(questions) - sum(len(v) for v in pending.values())}건, "
+            f"오류 {sum(1 for r in results if r['error'])}건"
+        )
+        return results
+
+    def _batch_answer(self, questions, searcher, index_version, max_concurrency):
+        """질문 목록의 (답변, 소스) 또는 예외를 입력 순서대로 반환"""
+        answers = [None] * len(questions)
+        start = time.perf_counter()
+        try:
+            with self.metrics.span('qa.embed_query', mode='batch', count=len(questions)):
+                vectors = self.embeddings.embed_documents(questions)
+            self.metrics.inc('embeddings_total', len(questions), kind='query')
+        except Exception as e:
+            if searcher.lexical_index is None:
+                raise
+            self.metrics.inc('embedding_fallbacks_total', reason='error')
+            self.logger.warning(f"질문 임베딩 실패, 어휘 검색만으로 답변합니다: {e}")
+            vectors = [None] * len(questions)
+
+        todo = []
+        for i, (question, vector) in enumerate(zip(questions, vectors)):
+            cached = None
+            if self.answer_cache is not None and vector is not None:
+                cached = self.get_similar_answer(vector, index_version)
+            if cached is not None:
+                answers[i] = cached
+            else:
+                todo.append(i)
+        if not todo:
+            return answers
+
+        k = self.retriever.search_kwargs.get("k", 4)
+        with self.metrics.span('qa.search', mode='batch', count=len(todo)):
+            searched = searcher.search_batch([questions[i] for i in todo], [vectors[i] for i in todo], k=k)
+        elapsed = (time.perf_counter() - start) / len(todo)
+        for _, path in searched:
+            self.record_retrieval(path, elapsed)
+            self.metrics.inc('retrieval_path_total', path=path)
+        docs_list = [docs for docs, _ in searched]
+        inputs = [{"input_documents": self.prepare_context(questions[i], docs), "question": questions[i]}
+                  for i, docs in zip(todo, docs_list)]
+        with self.metrics.span('qa.llm', mode='batch', count=len(todo)):
+            outputs = self.retrieval_qa_chain.combine_documents_chain.batch(
+                inputs, config={"max_concurrency": max_concurrency}, return_exceptions=True
+            )
+        for i, docs, output in zip(todo, docs_list, outputs):
+            if isinstance(output, Exception):
+                self.metrics.inc('errors_total', stage='qa.llm')
+                answers[i] = output
+                continue
+            self.metrics.inc('completion_tokens_total', self.context_builder.count_tokens(output["output_text"]))
+            sources = self.list_top_k_sources({"source_documents": docs}, k=2)
+            answers[i] = (output["output_text"], sources)
+            if self.answer_cache is not None:
+                self.answer_cache.put(questions[i], vectors[i], answers[i], index_version)
+        return answers
+
+    def embed_query_with_fallback(self, question, searcher):
+        """질문 임베딩 (어휘 인덱스가 있으면 EMBEDDING_QUERY_TIMEOUT초 안에 끝나지 않거나 실패할 때 None)"""
+        self.metrics.inc('embeddings_total', kind='query')
+        with self.metrics.span('qa.embed_query') as span:
+            if searcher.lexical_index is None:
+                return self.embeddings.embed_query(question)
+            future = self._embed_executor.submit(self.embeddings.embed_query, question)
+            try:
+                return future.result(timeout=EMBEDDING_QUERY_TIMEOUT)
+            except FutureTimeoutError:
+                span.set(fallback='timeout')
+                self.metrics.inc('embedding_fallbacks_total', reason='timeout')
+                self.logger.warning(f"질문 임베딩이 {EMBEDDING_QUERY_TIMEOUT}초 안에 끝나지 않아 어휘 검색만으로 답변합니다.")
+            except Exception as e:
+                span.set(fallback='error')
+                self.metrics.inc('embedding_fallbacks_total', reason='error')
+                self.logger.warning(f"질문 임베딩 실패, 어휘 검색만으로 답변합니다: {e}")
+            return None
+
+    def retrieve(self, question, vector, searcher, start):
+        """벡터/어휘 검색 결과를 병합하여 문서 검색 (vector가 None이면 어휘 검색만)
+
+        start부터 검색이 끝날 때까지의 시간을 검색 경로별로 기록합니다.
+        """
+        with self.metrics.span('qa.search') as span:
+            docs, path = searcher.search(question, vector, k=self.retriever.search_kwargs.get("k", 4))
+            span.set(path=path, documents=len(docs))
+        self.record_retrieval(path, time.perf_counter() - start)
+        self.metrics.inc('retrieval_path_total', path=path)
+        return docs
+
+    def record_retrieval(self, path, seconds):
+        with self._latency_lock:
+            self.retrieval_metrics[path].append(seconds)
+
+    def get_retrieval_stats(self):
+        """검색 경로별 건수와 지연 시간 중앙값(ms)"""
+        with self._latency_lock:
+            records = {path: sorted(values) for path, values in self.retrieval_metrics.items() if values}
+        return {
+            path: {'count': len(values), 'p50_ms': values[len(values) // 2] * 1000}
+            for path, values in records.items()
+        }
+
+    def get_cached_answer(self, question, index_version):
+        """정규화한 질문 텍스트가 같은 캐시 항목 조회 (임베딩 없이)"""
+        if self.answer_cache is None:
+            return None
+        cached = self.answer_cache.get(question, index_version)
+        if cached is not None:
+            self.metrics.inc('answer_cache_hits_total', tier='exact')
+        return cached
+
+    def get_similar_answer(self, vector, index_version):
+        """질문 임베딩이 매우 비슷한 캐시 항목 조회 (정확히 같은 질문이 없을 때)"""
+        cached = self.answer_cache.get_similar(vector, index_version)
+        if cached is not None:
+            self.metrics.inc('answer_cache_hits_total', tier='semantic')
+        else:
+            self.metrics.inc('answer_cache_misses_total')
+        return cached
+
+    def answer_from_docs(self, question, docs):
+        """검색한 문서로 RetrievalQA 체인의 문서 결합 단계를 실행하여 답변 생성
+
+        RetrievalQA.invoke와 같은 형식({"result", "source_documents"})으로 반환합니다.
+        """
+        context_docs = self.prepare_context(question, docs)
+        with self.metrics.span('qa.llm'):
+            output = self.retrieval_qa_chain.combine_documents_chain.invoke(
+                {"input_documents": context_docs, "question": question}
+            )
+        self.metrics.inc('completion_tokens_total', self.context_builder.count_tokens(output["output_text"]))
+        return {"query": question, "result": output["output_text"], "source_documents": docs}
+
+    def get_answer_cache_stats(self):
+        """답변 캐시 적중률 등 통계 (캐시를 쓰지 않으면 None)"""
+        if self.answer_cache is None:
+            return None
+        return self.answer_cache.get_stats()
+
     def list_top_k_sources(self, answer, k=2):
         """소스 문서 목록 반환"""
         try:
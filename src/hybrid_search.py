@@ -0,0 +1,100 @@
+import logging
+
+from langchain_core.documents import Document
+
+from vector_index import NumpyVectorIndex
+
+VECTOR = 'vector'
+LEXICAL = 'lexical'
+HYBRID = 'hybrid'
+
+
+def document_key(doc):
+    """결과 병합 시 같은 청크를 찾기 위한 키"""
+    return doc.id or (doc.metadata.get('source'), doc.page_content)
+
+
+def reciprocal_rank_fusion(result_lists, k=4, rrf_k=60):
+    """여러 순위 목록을 RRF(1 / (rrf_k + 순위)의 합)로 병합하여 상위 k개 반환"""
+    scores, docs = {}, {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = document_key(doc)
+            docs.setdefault(key, doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+    ranked = sorted(scores, key=lambda key: scores[key], reverse=True)
+    return [docs[key] for key in ranked[:k]]
+
+
+class HybridSearcher:
+    """벡터 검색과 BM25 어휘 검색을 묶은 검색기
+
+    질문 벡터가 있으면 두 결과를 RRF로 병합하고, 임베딩이 실패하거나 늦어 벡터가
+    없으면 어휘 검색만으로 답합니다. 어휘 인덱스가 없으면 벡터 검색만 사용합니다.
+    search()는 (문서 목록, 사용한 경로)를 반환합니다.
+    """
+
+    def __init__(self, db, vector_backend=None, lexical_index=None, rrf_k=60, fetch_k=20):
+        self.db = db
+        self.vector_backend = vector_backend or db
+        self.lexical_index = lexical_index
+        self.rrf_k = rrf_k
+        self.fetch_k = fetch_k
+        self.logger = logging.getLogger(__name__)
+
+    def get_documents(self, ids):
+        """청크 ID 순서대로 Chroma에서 본문과 메타데이터 조회"""
+        if not ids:
+            return []
+        response = self.db._collection.get(ids=list(ids), include=['documents', 'metadatas'])
+        found = {
+            chunk_id: Document(page_content=text, metadata=metadata or {}, id=chunk_id)
+            for chunk_id, text, metadata in zip(response['ids'], response['documents'], response['metadatas'])
+        }
+        return [found[chunk_id] for chunk_id in ids if chunk_id in found]
+
+    def close(self):
+        """NumPy 벡터 인덱스의 파일과 행렬을 놓음 (Chroma와 BM25는 놓을 것이 없음)"""
+        if isinstance(self.vector_backend, NumpyVectorIndex):
+            self.vector_backend.close()
+
+    def lexical_search(self, question, k):
+        return self.get_documents([chunk_id for chunk_id, _ in self.lexical_index.search(question, k)])
+
+    def vector_search(self, vectors, k):
+        """여러 질문 벡터를 한 번에 검색 (Chroma 쿼리 한 번 또는 행렬 곱 한 번)"""
+        if isinstance(self.vector_backend, NumpyVectorIndex):
+            return self.vector_backend.search_batch(vectors, k=k)
+        response = self.db._collection.query(
+            query_embeddings=vectors, n_results=k, include=['documents', 'metadatas']
+        )
+        return [
+            [Document(page_content=text, metadata=metadata or {}, id=chunk_id)
+             for chunk_id, text, metadata in zip(ids, texts, metadatas)]
+            for ids, texts, metadatas in zip(response['ids'], response['documents'], response['metadatas'])
+        ]
+
+    def search(self, question, vector, k=4):
+        return self.search_batch([question], [vector], k)[0]
+
+    def search_batch(self, questions, vectors, k=4):
+        """질문별 (문서 목록, 경로) 목록 (벡터가 None인 질문은 어휘 검색만 사용)"""
+        if self.lexical_index is None and any(vector is None for vector in vectors):
+            raise ValueError("질문 임베딩 없이 검색하려면 어휘 인덱스가 필요합니다.")
+
+        fetch_k = max(k, self.fetch_k) if self.lexical_index is not None else k
+        with_vector = [i for i, vector in enumerate(vectors) if vector is not None]
+        vector_results = dict(zip(with_vector, self.vector_search([vectors[i] for i in with_vector], fetch_k))) \
+            if with_vector else {}
+
+        results = []
+        for i, question in enumerate(questions):
+            if self.lexical_index is None:
+                results.append((vector_results[i][:k], VECTOR))
+            elif i not in vector_results:
+                results.append((self.lexical_search(question, k), LEXICAL))
+            else:
+                lexical = self.lexical_search(question, fetch_k)
+                fused = reciprocal_rank_fusion([vector_results[i], lexical], k=k, rrf_k=self.rrf_k)
+                results.append((fused, HYBRID))
+        return results
@@ -0,0 +1,75 @@
+import os
+import json
+import hashlib
+import logging
+from typing import Dict, List, Optional
+
+MANIFEST_FILE_NAME = 'manifest.json'
+
+
+def get_source_key(doc) -> str:
+    """문서의 소스 키 (GitBook URL 또는 Confluence 페이지 URL/ID)"""
+    metadata = doc.metadata or {}
+    return str(metadata.get('source') or metadata.get('id') or '')
+
+
+def hash_documents(docs, salt='') -> str:
+    """같은 소스에 속한 문서들의 내용과 메타데이터로 해시 생성
+
+    salt(예: 분할 설정의 지문)가 바뀌면 내용이 같아도 다른 해시가 됩니다.
+    """
+    h = hashlib.sha256(salt.encode('utf-8'))
+    for doc in docs:
+        h.update(doc.page_content.encode('utf-8'))
+        h.update(json.dumps(doc.metadata, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+    return h.hexdigest()
+
+
+class IndexManifest:
+    """소스 → 콘텐츠 해시 → 청크 ID 매핑을 관리하는 매니페스트
+
+    Chroma 디렉토리 안에 JSON 파일로 저장되며, 증분 재색인 시
+    추가/변경/삭제된 소스를 판별하는 데 사용합니다.
+    """
+
+    def __init__(self, persist_directory):
+        self.path = os.path.join(persist_directory, MANIFEST_FILE_NAME)
+        self.logger = logging.getLogger(__name__)
+        self.entries: Dict[str, dict] = {}
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def load(self):
+        """매니페스트 파일 로드 (없으면 빈 상태)"""
+        if not self.exists():
+            self.entries = {}
+            return self
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('sources', {})
+            self.logger.info(f"매니페스트 로드 완료: {len(self.entries)}개 소스")
+        except Exception as e:
+            self.logger.warning(f"매니페스트 로드 중 오류, 빈 상태로 시작합니다: {e}")
+            self.entries = {}
+        return self
+
+    def save(self):
+        """임시 파일에 기록 후 교체하여 원자적으로 저장"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'sources': self.entries}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def get(self, source) -> Optional[dict]:
+        return self.entries.get(source)
+
+    def update(self, source, content_hash, chunk_ids: List[str]):
+        self.entries[source] = {'hash': content_hash, 'chunk_ids': list(chunk_ids)}
+
+    def remove(self, source):
+        return self.entries.pop(source, None)
+
+    def sources(self):
+        return set(self.entries.keys())
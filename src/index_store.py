@@ -0,0 +1,148 @@
+import os
+import shutil
+import logging
+from datetime import datetime, timezone
+
+from vector_index import VECTOR_INDEX_DIRECTORY_NAME
+from lexical_index import LEXICAL_INDEX_DIRECTORY_NAME
+
+CURRENT_FILE_NAME = 'CURRENT'
+BUILDING_FILE_NAME = 'BUILDING'
+VERSIONS_DIRECTORY_NAME = 'versions'
+
+
+class IndexStore:
+    """버전별 Chroma 디렉토리와 `CURRENT` 포인터를 관리하는 저장소
+
+    빌드는 항상 새 버전 디렉토리에서 진행되고, 검증이 끝나면 포인터 파일을
+    원자적으로 교체하여 승격합니다. 서비스 중인 인스턴스는 포인터가 바뀐 것을
+    보고 새 버전을 다시 열며, 이전 버전 몇 개는 즉시 롤백할 수 있도록 보관합니다.
+    """
+
+    def __init__(self, root, keep_versions=3):
+        self.root = root
+        self.versions_directory = os.path.join(root, VERSIONS_DIRECTORY_NAME)
+        self.keep_versions = max(1, keep_versions)
+        self.logger = logging.getLogger(__name__)
+
+    def _read_pointer(self, name):
+        path = os.path.join(self.root, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read().strip() or None
+
+    def _write_pointer(self, name, value):
+        """임시 파일에 쓴 뒤 os.replace로 원자적으로 교체"""
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, name)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(value)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _remove_pointer(self, name):
+        path = os.path.join(self.root, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def version_path(self, version):
+        return os.path.join(self.versions_directory, version)
+
+    def list_versions(self):
+        """버전 목록 (오래된 순)"""
+        if not os.path.isdir(self.versions_directory):
+            return []
+        return sorted(
+            name for name in os.listdir(self.versions_directory)
+            if os.path.isdir(os.path.join(self.versions_directory, name))
+        )
+
+    def current_version(self):
+        return self._read_pointer(CURRENT_FILE_NAME)
+
+    def current_path(self):
+        """현재 서비스 중인 버전의 디렉토리
+
+        포인터가 없으면 버전 관리 이전 구조(루트에 바로 Chroma가 있는 경우)로 보고 루트를 반환합니다.
+        """
+        version = self.current_version()
+        return self.version_path(version) if version else self.root
+
+    def pointer_mtime(self):
+        """포인터 파일 수정 시각 (변경 감지용, 없으면 None)"""
+        try:
+            return os.stat(os.path.join(self.root, CURRENT_FILE_NAME)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def building_version(self):
+        """진행 중인 빌드 버전 (없으면 None)"""
+        version = self._read_pointer(BUILDING_FILE_NAME)
+        if version and os.path.isdir(self.version_path(version)):
+            return version
+        return None
+
+    def create_version(self, copy_from=None):
+        """새 빌드용 버전 디렉토리 생성
+
+        copy_from이 주어지면 그 디렉토리를 복사하여 증분 빌드의 출발점으로 사용합니다.
+        """
+        version = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+        path = self.version_path(version)
+        os.makedirs(self.versions_directory, exist_ok=True)
+        if copy_from and os.path.isdir(copy_from):
+            # 버전 관리 이전 구조의 루트를 복사할 때 버전 디렉토리/포인터는 제외하고,
+            # 벡터/어휘 인덱스는 새 컬렉션 기준으로 다시 만들므로 복사하지 않음
+            ignore = shutil.ignore_patterns(
+                VERSIONS_DIRECTORY_NAME, CURRENT_FILE_NAME, BUILDING_FILE_NAME, '*.tmp',
+                VECTOR_INDEX_DIRECTORY_NAME, LEXICAL_INDEX_DIRECTORY_NAME
+            )
+            shutil.copytree(copy_from, path, ignore=ignore)
+            self.logger.info(f"증분 빌드를 위해 {copy_from}을(를) 새 버전 {version}으로 복사했습니다.")
+        else:
+            os.makedirs(path)
+        self._write_pointer(BUILDING_FILE_NAME, version)
+        return version
+
+    def discard(self, version):
+        """검증에 실패한 빌드 버전 삭제"""
+        if self.building_version() == version:
+            self._remove_pointer(BUILDING_FILE_NAME)
+        shutil.rmtree(self.version_path(version), ignore_errors=True)
+
+    def promote(self, version):
+        """버전을 현재 버전으로 승격하고 오래된 버전 정리"""
+        if not os.path.isdir(self.version_path(version)):
+            raise ValueError(f"존재하지 않는 인덱스 버전입니다: {version}")
+        self._write_pointer(CURRENT_FILE_NAME, version)
+        if self.building_version() == version:
+            self._remove_pointer(BUILDING_FILE_NAME)
+        self.logger.info(f"인덱스 버전 {version}을(를) 현재 버전으로 승격했습니다.")
+        self.prune()
+
+    def rollback(self, version=None):
+        """지정한 버전(없으면 현재 직전 버전)으로 되돌림"""
+        versions = self.list_versions()
+        current = self.current_version()
+        if version is None:
+            older = [v for v in versions if current is None or v < current]
+            if not older:
+                raise ValueError("되돌릴 이전 인덱스 버전이 없습니다.")
+            version = older[-1]
+        self._write_pointer(CURRENT_FILE_NAME, version)
+        self.logger.info(f"인덱스 버전 {version}(으)로 롤백했습니다.")
+        return version
+
+    def prune(self):
+        """현재 버전과 진행 중인 빌드를 제외하고 최근 keep_versions개만 보관"""
+        current = self.current_version()
+        building = self.building_version()
+        versions = [v for v in self.list_versions() if v <= (current or '')]
+        for version in versions[:-self.keep_versions]:
+            if version in (current, building):
+                continue
+            shutil.rmtree(self.version_path(version), ignore_errors=True)
+            self.logger.info(f"오래된 인덱스 버전 삭제: {version}")
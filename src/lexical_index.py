@@ -0,0 +1,175 @@
+import os
+import re
+import json
+import time
+import shutil
+import logging
+import threading
+import unicodedata
+import collections
+
+import numpy as np
+
+LEXICAL_INDEX_DIRECTORY_NAME = 'lexical_index'
+META_FILE_NAME = 'meta.json'
+VOCABULARY_FILE_NAME = 'vocabulary.json'
+IDS_FILE_NAME = 'ids.json'
+POSTINGS_FILE_NAME = 'postings.npz'
+
+
+def tokenize(text):
+    """BM25용 토큰 목록
+
+    한국어는 띄어쓰기와 조사 때문에 단어 단위 일치가 잘 되지 않으므로, 영문/숫자로만
+    이루어진 단어는 그대로 두고 나머지 단어는 글자 2-gram으로 나눕니다 (2글자 이하는 그대로).
+    """
+    text = unicodedata.normalize('NFKC', text).lower()
+    tokens = []
+    for word in re.findall(r'\w+', text):
+        if len(word) <= 2 or word.isascii():
+            tokens.append(word)
+        else:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+class BM25Index:
+    """글자 n-gram 토큰의 역색인으로 BM25 점수를 계산하는 어휘 검색 인덱스
+
+    포스팅은 CSR 형태의 NumPy 배열(용어별 청크 번호와 빈도)로 저장하고,
+    검색 결과는 Chroma 청크 ID로 반환합니다.
+    """
+
+    def __init__(self, ids, vocabulary, indptr, doc_indices, term_frequencies, doc_lengths, k1=1.2, b=0.75):
+        self.ids = ids
+        self.vocabulary = {term: i for i, term in enumerate(vocabulary)}
+        self.indptr = indptr
+        self.doc_indices = doc_indices
+        self.term_frequencies = term_frequencies
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        self.count = len(ids)
+        self.average_length = float(doc_lengths.mean()) if self.count else 0.0
+        document_frequencies = np.diff(indptr)
+        # BM25 idf (음수가 되지 않도록 +1)
+        self.idf = np.log(1 + (self.count - document_frequencies + 0.5) / (document_frequencies + 0.5))
+        self._norms = self.k1 * (1 - self.b + self.b * doc_lengths / (self.average_length or 1.0))
+
+    @classmethod
+    def build(cls, records):
+        """(청크 ID, 본문) 목록으로 인덱스 생성"""
+        ids, doc_lengths = [], []
+        postings = collections.defaultdict(list)
+        for doc_index, (chunk_id, text) in enumerate(records):
+            counts = collections.Counter(tokenize(text or ''))
+            ids.append(chunk_id)
+            doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                postings[term].append((doc_index, tf))
+
+        vocabulary = sorted(postings)
+        indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        for i, term in enumerate(vocabulary):
+            indptr[i + 1] = indptr[i] + len(postings[term])
+        doc_indices = np.empty(indptr[-1], dtype=np.int32)
+        term_frequencies = np.empty(indptr[-1], dtype=np.float32)
+        for i, term in enumerate(vocabulary):
+            entries = postings[term]
+            doc_indices[indptr[i]:indptr[i + 1]] = [doc for doc, _ in entries]
+            term_frequencies[indptr[i]:indptr[i + 1]] = [tf for _, tf in entries]
+        return cls(ids, vocabulary, indptr, doc_indices, term_frequencies,
+                   np.asarray(doc_lengths, dtype=np.float32))
+
+    @classmethod
+    def build_from_collection(cls, collection, page_size=5000):
+        def records():
+            for offset in range(0, collection.count(), page_size):
+                page = collection.get(include=['documents'], limit=page_size, offset=offset)
+                yield from zip(page['ids'], page['documents'])
+        return cls.build(records())
+
+    def save(self, directory):
+        """프로세스/스레드별 임시 디렉토리에 쓴 뒤 교체"""
+        tmp_directory = f"{directory.rstrip('/')}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        os.makedirs(tmp_directory)
+        vocabulary = sorted(self.vocabulary, key=self.vocabulary.get)
+        with open(os.path.join(tmp_directory, VOCABULARY_FILE_NAME), 'w', encoding='utf-8') as f:
+            json.dump(vocabulary, f, ensure_ascii=False)
+        with open(os.path.join(tmp_directory, IDS_FILE_NAME), 'w', encoding='utf-8') as f:
+            json.dump(self.ids, f)
+        np.savez(
+            os.path.join(tmp_directory, POSTINGS_FILE_NAME),
+            indptr=self.indptr, doc_indices=self.doc_indices,
+            term_frequencies=self.term_frequencies, doc_lengths=self.doc_lengths
+        )
+        with open(os.path.join(tmp_directory, META_FILE_NAME), 'w', encoding='utf-8') as f:
+            json.dump({'count': self.count, 'terms': len(vocabulary)}, f)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(tmp_directory, directory)
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, VOCABULARY_FILE_NAME), 'r', encoding='utf-8') as f:
+            vocabulary = json.load(f)
+        with open(os.path.join(directory, IDS_FILE_NAME), 'r', encoding='utf-8') as f:
+            ids = json.load(f)
+        with np.load(os.path.join(directory, POSTINGS_FILE_NAME)) as data:
+            return cls(ids, vocabulary, data['indptr'], data['doc_indices'],
+                       data['term_frequencies'], data['doc_lengths'])
+
+    @classmethod
+    def read_meta(cls, directory):
+        path = os.path.join(directory, META_FILE_NAME)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def search(self, query, k=4):
+        """상위 k개 (청크 ID, 점수) 목록 (일치하는 용어가 없으면 빈 목록)"""
+        if not self.count:
+            return []
+        scores = np.zeros(self.count, dtype=np.float32)
+        matched = False
+        for term in set(tokenize(query)):
+            i = self.vocabulary.get(term)
+            if i is None:
+                continue
+            matched = True
+            start, end = self.indptr[i], self.indptr[i + 1]
+            docs = self.doc_indices[start:end]
+            tf = self.term_frequencies[start:end]
+            scores[docs] += self.idf[i] * tf * (self.k1 + 1) / (tf + self._norms[docs])
+        if not matched:
+            return []
+        k = min(k, self.count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(self.ids[i], float(scores[i])) for i in top if scores[i] > 0]
+
+
+def build_and_save(collection, persist_directory):
+    """컬렉션 전체로 BM25 인덱스를 만들어 버전 디렉토리에 저장"""
+    start = time.perf_counter()
+    index = BM25Index.build_from_collection(collection)
+    index.save(os.path.join(persist_directory, LEXICAL_INDEX_DIRECTORY_NAME))
+    logging.getLogger(__name__).info(
+        f"어휘 인덱스 생성 완료: 청크 {index.count}개, 용어 {len(index.vocabulary)}개 ({time.perf_counter() - start:.2f}초)"
+    )
+    return index
+
+
+def load_or_build(db, persist_directory):
+    """버전 디렉토리의 BM25 인덱스를 열고, 없거나 컬렉션과 맞지 않으면 메모리에만 만듦
+
+    서비스 중인 버전 디렉토리는 여러 프로세스가 함께 읽으므로 여기서는 저장하지 않습니다.
+    저장은 승격 전에 빌더(DataLoader)만 합니다.
+    """
+    directory = os.path.join(persist_directory, LEXICAL_INDEX_DIRECTORY_NAME)
+    meta = BM25Index.read_meta(directory)
+    if meta is not None and meta['count'] == db._collection.count():
+        return BM25Index.load(directory)
+    logging.getLogger(__name__).warning(f"저장된 어휘 인덱스가 없거나 컬렉션과 맞지 않아 메모리에 만듭니다: {directory}")
+    return BM25Index.build_from_collection(db._collection)
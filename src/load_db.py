@@ -1,9 +1,11 @@
 import sys
 import logging
-import shutil
+from concurrent.futures import Future
 import os
+import hashlib
+import collections
+import threading
 import tqdm
-import requests
 import xml.etree.ElementTree as ET
 from typing import List, Optional
 from bs4 import BeautifulSoup
@@ -14,92 +16,229 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from config import (CONFLUENCE_SPACE_NAME, CONFLUENCE_SPACE_KEY,
                    CONFLUENCE_USERNAME, CONFLUENCE_API_KEY, PERSIST_DIRECTORY,
-                   GITBOOK_DOMAIN, GITBOOK_SITEMAP, DOCUMENT_SOURCE)
+                   GITBOOK_DOMAIN, GITBOOK_SITEMAP, DOCUMENT_SOURCE,
+                   INCREMENTAL_INDEX, GITBOOK_CONCURRENCY,
+                   GITBOOK_REQUESTS_PER_SECOND, GITBOOK_CACHE_DIRECTORY,
+                   CONFLUENCE_CONCURRENCY,
+                   EMBEDDING_BATCH_SIZE, EMBEDDING_MAX_TOKENS_PER_REQUEST,
+                   EMBEDDING_MAX_CONCURRENCY, EMBEDDING_INITIAL_CONCURRENCY,
+                   EMBEDDING_QUARANTINE_PATH, PIPELINE_DOCUMENT_QUEUE_SIZE,
+                   PIPELINE_CHUNK_QUEUE_SIZE, PIPELINE_WRITE_QUEUE_SIZE,
+                   SPLIT_WORKERS, SPLIT_PARALLEL_MIN_DOCUMENTS,
+                   CHUNK_DEDUP_ENABLED, CHUNK_DEDUP_THRESHOLD, CHUNK_DEDUP_NUM_PERM,
+                   CHUNK_DEDUP_BANDS, CHUNK_DEDUP_SHINGLE_SIZE,
+                   SNAPSHOT_DIRECTORY, PATH_NAME_SPLITTER,
+                   INDEX_KEEP_VERSIONS, INDEX_MIN_CHUNKS, INDEX_VALIDATION_QUERY,
+                   RETRIEVER_BACKEND, VECTOR_INDEX_DTYPE, LEXICAL_INDEX_ENABLED)
 
-# 최신 패키지 사용
-from langchain_community.document_loaders import ConfluenceLoader, WebBaseLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_text_splitters import MarkdownHeaderTextSplitter
 # Chroma 패키지를 권장 방식으로 변경
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
 
+from crawler import ConcurrentCrawler
+from crawl_cache import CrawlCache
+from confluence_sync import ConfluenceSync, STATE_FILE_NAME as CONFLUENCE_STATE_FILE_NAME
+from pipeline import StreamingPipeline, Stage
+from embedding_scheduler import EmbeddingScheduler
+from build_journal import BuildJournal
+from index_store import IndexStore
+import vector_index
+import lexical_index
+from index_manifest import IndexManifest, get_source_key, hash_documents
+from metrics import get_registry
+import document_splitter
+from document_splitter import ParallelSplitter, sectioned_text
+from chunk_dedup import ChunkDeduplicator, join_sources, split_sources
+from snapshot_store import SnapshotStore
+
+# 인덱스 버전 디렉토리에 저장하는 GitBook 조건부 요청 검증자 파일 이름
+GITBOOK_CACHE_STATE_FILE_NAME = 'gitbook_cache_state.json'
+
+
 class GitBookLoader:
     """GitBook 문서를 로드하는 클래스"""
+
+    SITEMAP_NAMESPACES = {'ns': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
     
-    def __init__(self, sitemap_url):
+    def __init__(self, sitemap_url, concurrency=GITBOOK_CONCURRENCY,
+                 requests_per_second=GITBOOK_REQUESTS_PER_SECOND, crawler=None,
+                 cache_directory=GITBOOK_CACHE_DIRECTORY, cache_state_path=None):
         self.sitemap_url = sitemap_url
         self.logger = logging.getLogger(__name__)
+        # 모든 요청이 하나의 keep-alive 세션과 워커 풀을 공유
+        self.crawler = crawler or ConcurrentCrawler(
+            concurrency=concurrency,
+            requests_per_second=requests_per_second
+        )
+        # 조건부 요청을 위한 URL별 검증자/본문 캐시 (None이면 항상 새로 받음)
+        self.cache = CrawlCache(cache_directory, cache_state_path) if cache_directory else None
+        self.stats = collections.Counter()
+        self.urls = []
+        # 본문을 받지 못한 페이지와 사이트맵을 끝까지 읽지 못했는지 여부 (기존 청크를 지우지 않기 위해 사용)
+        self.failed_urls = set()
+        self.listing_failed = False
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def get_sitemap_entries(self, sitemap_url=None, visited=None):
+        """사이트맵에서 (URL, lastmod) 목록 추출 (사이트맵 인덱스는 재귀적으로 따라감)"""
+        sitemap_url = sitemap_url or self.sitemap_url
+        visited = visited if visited is not None else set()
+        if sitemap_url in visited:
+            return []
+        visited.add(sitemap_url)
+
+        response = self.crawler.fetch(sitemap_url)
+        root = ET.fromstring(response.content)
+
+        entries = []
+        # 사이트맵 인덱스: 하위 사이트맵을 모두 읽음
+        for loc in root.findall('./ns:sitemap/ns:loc', self.SITEMAP_NAMESPACES):
+            try:
+                entries.extend(self.get_sitemap_entries(loc.text.strip(), visited))
+            except Exception as e:
+                self.logger.error(f"하위 사이트맵 처리 중 오류 발생 ({loc.text}): {e}")
+                self.listing_failed = True
+
+        for url in root.findall('./ns:url', self.SITEMAP_NAMESPACES):
+            loc = url.find('ns:loc', self.SITEMAP_NAMESPACES)
+            lastmod = url.find('ns:lastmod', self.SITEMAP_NAMESPACES)
+            if loc is None or not loc.text:
+                continue
+            entries.append((loc.text.strip(), lastmod.text.strip() if lastmod is not None and lastmod.text else None))
+        return entries
     
     def get_urls_from_sitemap(self):
         """사이트맵 XML에서 모든 URL을 추출"""
+        return [url for url, _ in self._get_sitemap_entries_safe()]
+
+    def _get_sitemap_entries_safe(self):
+        self.listing_failed = False
         try:
             self.logger.info(f"사이트맵에서 URL 목록 가져오는 중: {self.sitemap_url}")
-            response = requests.get(self.sitemap_url)
-            response.raise_for_status()
-            
-            # XML 파싱
-            root = ET.fromstring(response.content)
-            
-            # XML 네임스페이스 처리
-            namespaces = {'ns': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
-            
-            # URL 추출
-            urls = []
-            for url in root.findall('.//ns:url/ns:loc', namespaces):
-                urls.append(url.text)
-            
-            self.logger.info(f"사이트맵에서 {len(urls)}개 URL을 찾았습니다.")
-            return urls
+            # 여러 사이트맵에 중복으로 나오는 URL은 한 번만 사용
+            entries = list(dict(self.get_sitemap_entries()).items())
+            self.logger.info(f"사이트맵에서 {len(entries)}개 URL을 찾았습니다.")
+            return entries
         
         except Exception as e:
             self.logger.error(f"사이트맵 처리 중 오류 발생: {e}")
+            self.listing_failed = True
             return []
+
+    def build_document(self, url, html):
+        """HTML을 WebBaseLoader와 같은 방식으로 파싱하여 Document 생성"""
+        soup = BeautifulSoup(html, 'html.parser')
+        metadata = {'source': url}
+        if title := soup.find('title'):
+            metadata['title'] = title.get_text()
+        if description := soup.find('meta', attrs={'name': 'description'}):
+            metadata['description'] = description.get('content', 'No description found.')
+        if html_tag := soup.find('html'):
+            metadata['language'] = html_tag.get('lang', 'No language found.')
+
+        # 메타데이터 보강
+        path_parts = urlparse(url).path.strip('/').split('/')
+        metadata.update({
+            'source': url,
+            'title': path_parts[-1].replace('-', ' ').title() if path_parts else 'Untitled',
+            'space_key': 'gitbook',
+            'content_type': 'GitBook Page'
+        })
+        # h1~h3을 마크다운 헤더 줄로 남겨 헤더 기준 분할이 페이지 구간을 나눌 수 있게 함
+        return Document(page_content=sectioned_text(soup), metadata=metadata)
+
+    def fetch_html(self, url, lastmod=None):
+        """조건부 요청으로 페이지 HTML 가져오기
+
+        사이트맵 lastmod가 이전과 같으면 요청을 생략하고, 그렇지 않으면
+        ETag/Last-Modified 검증자를 보내 304 응답 시 저장된 본문을 재사용합니다.
+        """
+        if self.cache is None:
+            self._count('fetched')
+            return self.crawler.fetch(url).text
+
+        entry = self.cache.get(url)
+        if entry and lastmod and entry.get('lastmod') == lastmod:
+            body = self.cache.read_body(url)
+            if body is not None:
+                self._count('skipped')
+                return body
+
+        headers = self.cache.conditional_headers(url) if entry else {}
+        response = self.crawler.fetch(url, headers=headers)
+        if response.status_code == 304:
+            body = self.cache.read_body(url)
+            if body is not None:
+                self.cache.touch(url, lastmod)
+                self._count('not_modified')
+                return body
+            # 본문이 유실된 경우 조건 없이 다시 요청
+            response = self.crawler.fetch(url)
+
+        self.cache.store(
+            url, response.text, lastmod=lastmod,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified')
+        )
+        self._count('fetched')
+        return response.text
+
+    def fetch_page(self, url, lastmod=None):
+        """단일 페이지를 가져와 Document로 변환"""
+        metrics = get_registry()
+        with metrics.span('index.crawl_page', source='gitbook'):
+            doc = self.build_document(url, self.fetch_html(url, lastmod))
+        metrics.inc('pages_fetched_total', source='gitbook')
+        return doc
+
+    def iter_documents(self, urls, lastmods=None):
+        """페이지를 병렬로 가져오며 완료되는 순서대로 Document 반환"""
+        lastmods = lastmods or {}
+        handler = lambda url: self.fetch_page(url, lastmods.get(url))
+        for url, doc, error in tqdm.tqdm(self.crawler.crawl(urls, handler), total=len(urls)):
+            if error is not None:
+                get_registry().inc('errors_total', stage='index.crawl_page')
+                self.logger.error(f"페이지 로드 중 오류 발생 ({url}): {error}")
+                self.failed_urls.add(url)
+                continue
+            yield doc
     
-    def load(self):
-        """모든 GitBook 페이지를 로드하여 Document 객체 리스트로 반환"""
-        urls = self.get_urls_from_sitemap()
+    def iter_load(self):
+        """사이트맵의 모든 페이지를 병렬로 가져오며 완료되는 대로 Document 반환"""
+        entries = self._get_sitemap_entries_safe()
         
-        if not urls:
+        if not entries:
             self.logger.warning("URL을 찾을 수 없습니다.")
-            return []
-        
-        all_docs = []
-        # 배치 크기
-        batch_size = 10
-        
-        for i in tqdm.tqdm(range(0, len(urls), batch_size)):
-            batch_urls = urls[i:i+batch_size]
-            try:
-                # WebBaseLoader를 사용하여 여러 URL을 한 번에 로드
-                loader = WebBaseLoader(batch_urls)
-                docs = loader.load()
-                
-                # 메타데이터 보강
-                for j, doc in enumerate(docs):
-                    url = batch_urls[j]
-                    parsed_url = urlparse(url)
-                    path_parts = parsed_url.path.strip('/').split('/')
-                    
-                    # 메타데이터 설정
-                    if 'metadata' not in doc.__dict__:
-                        doc.metadata = {}
-                    
-                    doc.metadata.update({
-                        'source': url,
-                        'title': path_parts[-1].replace('-', ' ').title() if path_parts else 'Untitled',
-                        'space_key': 'gitbook',
-                        'content_type': 'GitBook Page'
-                    })
-                
-                all_docs.extend(docs)
-                self.logger.info(f"배치 {i//batch_size + 1}/{(len(urls)-1)//batch_size + 1} 처리 완료 ({len(docs)}개 문서)")
-            
-            except Exception as e:
-                self.logger.error(f"배치 {i//batch_size + 1} 로드 중 오류 발생: {e}")
+            return
+
+        urls = self.urls = [url for url, _ in entries]
+        self.logger.info(f"{len(urls)}개 페이지를 동시성 {self.crawler.concurrency}로 로드합니다.")
+        self.stats.clear()
+        self.failed_urls = set()
+        count = 0
+        for doc in self.iter_documents(urls, dict(entries)):
+            count += 1
+            yield doc
+        if self.cache is not None:
+            self.cache.save()
         
-        self.logger.info(f"총 {len(all_docs)}개 GitBook 문서를 로드했습니다.")
-        return all_docs
+        self.logger.info(
+            f"총 {count}개 GitBook 문서를 로드했습니다. "
+            f"(다운로드 {self.stats['fetched']}, 304 {self.stats['not_modified']}, "
+            f"lastmod 동일로 생략 {self.stats['skipped']})"
+        )
+    
+    def load(self):
+        """모든 GitBook 페이지를 로드하여 Document 객체 리스트로 반환"""
+        docs = list(self.iter_load())
+
+        # 완료 순서와 무관하게 사이트맵 순서로 정렬
+        order = {url: i for i, url in enumerate(self.urls)}
+        return sorted(docs, key=lambda doc: order.get(doc.metadata['source'], len(order)))
 
 class DataLoader():
     """Create, load, save the DB using the confluence Loader"""
@@ -111,7 +250,8 @@ class DataLoader():
         space_key=CONFLUENCE_SPACE_KEY,
         persist_directory=PERSIST_DIRECTORY,
         gitbook_sitemap=GITBOOK_SITEMAP,
-        document_source=DOCUMENT_SOURCE
+        document_source=DOCUMENT_SOURCE,
+        incremental=INCREMENTAL_INDEX
     ):
 
         self.confluence_url = confluence_url
@@ -119,179 +259,660 @@ class DataLoader():
         self.api_key = api_key
         self.space_key = space_key
         self.persist_directory = persist_directory
+        self.index_store = IndexStore(persist_directory, keep_versions=INDEX_KEEP_VERSIONS)
         self.gitbook_sitemap = gitbook_sitemap
         self.document_source = document_source.lower()
+        self.incremental = incremental
+        # 증분 로딩 시 본문을 다시 받지 않았지만 여전히 존재하는 소스
+        self.retained_sources = set()
+        # 이 접두사로 시작하는 소스는 이번 빌드에서 보지 못해도 삭제하지 않음 (목록을 믿을 수 없는 경우)
+        self.protected_source_prefixes = set()
+        self.confluence_sync = None
+        # 동기화 상태(Confluence 페이지 버전, GitBook 검증자)를 읽고 쓸 인덱스 버전 디렉토리 (빌드 중에만 설정)
+        self.build_directory = None
+        self.pipeline = None
+        self.skipped_chunks = 0
+        self.dedup_stats = collections.Counter()
+        self.snapshot_store = None
+        self.splitter_fingerprint = document_splitter.splitter_fingerprint()
+        self._splitters = None
+        # 빌드 단계별 소요 시간(구간)과 청크/임베딩 카운터
+        self.metrics = get_registry()
         
         # 로깅 설정
         logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
         self.logger = logging.getLogger(__name__)
 
-    def load_from_confluence_loader(self):
-        """Load HTML files from Confluence"""
-        self.logger.info("Confluence에서 문서 로딩 중...")
-        loader = ConfluenceLoader(
+    def get_state_directory(self):
+        """동기화 상태를 둘 디렉토리 (빌드 중이면 빌드 버전, 아니면 현재 버전)
+
+        상태를 인덱스 버전과 함께 두므로 롤백하면 그 버전을 만들 때의 상태로 함께 돌아가고,
+        증분 빌드는 복사해 온 현재 버전의 상태에서 출발합니다.
+        """
+        return self.build_directory or self.index_store.current_path()
+
+    def get_gitbook_loader(self):
+        return GitBookLoader(
+            sitemap_url=self.gitbook_sitemap,
+            cache_directory=GITBOOK_CACHE_DIRECTORY,
+            cache_state_path=os.path.join(self.get_state_directory(), GITBOOK_CACHE_STATE_FILE_NAME)
+        )
+
+    def prune_gitbook_cache(self):
+        """남아 있는 어떤 인덱스 버전도 참조하지 않는 GitBook 본문 삭제"""
+        if not GITBOOK_CACHE_DIRECTORY:
+            return
+        state_paths = [
+            os.path.join(self.index_store.version_path(version), GITBOOK_CACHE_STATE_FILE_NAME)
+            for version in self.index_store.list_versions()
+        ]
+        state_paths.append(os.path.join(self.index_store.root, GITBOOK_CACHE_STATE_FILE_NAME))
+        try:
+            removed = CrawlCache(GITBOOK_CACHE_DIRECTORY, state_paths[-1]).prune(state_paths)
+            if removed:
+                self.logger.info(f"사용하지 않는 GitBook 본문 캐시 {removed}개를 삭제했습니다.")
+        except OSError as e:
+            self.logger.warning(f"GitBook 본문 캐시 정리 중 오류: {e}")
+
+    def get_confluence_sync(self):
+        return ConfluenceSync(
             url=self.confluence_url,
             username=self.username,
             api_key=self.api_key,
-            space_key=self.space_key
+            space_key=self.space_key,
+            state_path=os.path.join(self.get_state_directory(), CONFLUENCE_STATE_FILE_NAME),
+            concurrency=CONFLUENCE_CONCURRENCY
         )
 
-        docs = loader.load()
-        self.logger.info(f"{len(docs)}개 문서를 Confluence에서 로드했습니다.")
-        return docs
-
-    def load_from_gitbook_loader(self):
-        """GitBook에서 문서 로드"""
-        self.logger.info("GitBook에서 문서 로딩 중...")
-        loader = GitBookLoader(sitemap_url=self.gitbook_sitemap)
-        docs = loader.load()
-        self.logger.info(f"{len(docs)}개 문서를 GitBook에서 로드했습니다.")
-        return docs
-
-    def load_documents(self):
-        """설정된 문서 소스에 따라 문서 로드"""
-        all_docs = []
-        
+    def retain_gitbook_failures(self, loader):
+        """받지 못한 GitBook 페이지의 기존 청크를 유지하고, 사이트맵을 읽지 못했으면 GitBook 소스를 삭제하지 않음"""
+        if loader.failed_urls:
+            self.logger.warning(f"받지 못한 GitBook 페이지 {len(loader.failed_urls)}개는 기존 청크를 유지합니다.")
+            self.retained_sources.update(loader.failed_urls)
+        if loader.listing_failed:
+            url = urlparse(self.gitbook_sitemap)
+            self.protected_source_prefixes.add(f"{url.scheme}://{url.netloc}/")
+
+    def get_snapshot_store(self):
+        """원본 페이지/청크 스냅숏 저장소 (SNAPSHOT_DIRECTORY가 비어 있으면 None)"""
+        if self.snapshot_store is None and SNAPSHOT_DIRECTORY:
+            self.snapshot_store = SnapshotStore(SNAPSHOT_DIRECTORY, PATH_NAME_SPLITTER)
+        return self.snapshot_store
+
+    def iter_documents(self, incremental=False):
+        """설정된 문서 소스에서 문서를 받는 대로 하나씩 반환 (스트리밍 색인용)
+
+        document_source가 snapshot이면 네트워크 없이 스냅숏 저장소의 페이지를 반환합니다.
+        스냅숏에는 삭제 여부를 판단할 최신 페이지 목록이 없으므로 이때는 어떤 소스도 지우지 않습니다.
+        """
+        self.retained_sources = set()
+        self.protected_source_prefixes = set()
+
+        if self.document_source == 'snapshot':
+            snapshot_store = self.get_snapshot_store()
+            if snapshot_store is None:
+                raise ValueError("SNAPSHOT_DIRECTORY가 설정되지 않아 스냅숏에서 문서를 읽을 수 없습니다.")
+            self.logger.info(f"스냅숏에서 문서 {len(snapshot_store.entries)}개를 읽습니다.")
+            self.protected_source_prefixes.add('')
+            yield from snapshot_store.iter_documents()
+            return
+
         if self.document_source in ['confluence', 'both']:
-            confluence_docs = self.load_from_confluence_loader()
-            all_docs.extend(confluence_docs)
-            self.logger.info(f"Confluence 문서 {len(confluence_docs)}개 로드 완료")
-        
+            self.logger.info("Confluence에서 문서 로딩 중...")
+            self.confluence_sync = self.get_confluence_sync()
+            yield from self.confluence_sync.iter_sync(full=not incremental)
+            result = self.confluence_sync.result
+            self.retained_sources.update(result.unchanged_sources)
+            snapshot_store = self.get_snapshot_store()
+            if snapshot_store is not None and result.unchanged_pages:
+                yield from self.iter_unchanged_confluence_pages(snapshot_store, result.unchanged_pages)
+            if result.deleted_sources:
+                self.logger.info(f"삭제된 Confluence 페이지 {len(result.deleted_sources)}개의 청크를 제거합니다.")
+
         if self.document_source in ['gitbook', 'both']:
-            gitbook_docs = self.load_from_gitbook_loader()
-            all_docs.extend(gitbook_docs)
-            self.logger.info(f"GitBook 문서 {len(gitbook_docs)}개 로드 완료")
-        
-        self.logger.info(f"총 {len(all_docs)}개 문서를 로드했습니다.")
-        return all_docs
+            self.logger.info("GitBook에서 문서 로딩 중...")
+            loader = self.get_gitbook_loader()
+            yield from loader.iter_load()
+            self.retain_gitbook_failures(loader)
+
+    def iter_unchanged_confluence_pages(self, snapshot_store, unchanged_pages):
+        """버전이 그대로인 Confluence 페이지를 스냅숏에서 읽어 반환
+
+        스냅숏에 아직 없는 페이지는 본문을 한 번 받아 저장해 두므로 이후 스냅숏만으로
+        전체 문서를 다시 색인할 수 있습니다. 반환한 페이지는 콘텐츠 해시가 같으면 임베딩 없이
+        유지되고, 분할 설정이 바뀌었으면 다시 분할됩니다. 본문을 받지 못한 페이지는
+        retained_sources에 남아 기존 청크가 유지됩니다.
+        """
+        missing_ids = [page_id for page_id, source in unchanged_pages.items()
+                       if source not in snapshot_store.entries]
+        if missing_ids:
+            self.logger.info(f"스냅숏이 없는 Confluence 페이지 {len(missing_ids)}개의 본문을 받아 저장합니다.")
+            for doc in self.confluence_sync.iter_pages(missing_ids):
+                try:
+                    snapshot_store.put_page(get_source_key(doc), doc)
+                except OSError as e:
+                    self.logger.warning(f"페이지 스냅숏 저장 중 오류 ({get_source_key(doc)}): {e}")
+
+        for source in unchanged_pages.values():
+            doc = snapshot_store.get_page(source)
+            if doc is not None:
+                self.retained_sources.discard(source)
+                yield doc
+
+    def get_splitters(self):
+        """마크다운 헤더 분할기와 문자 단위 분할기 (한 번만 생성하여 재사용)"""
+        if self._splitters is None:
+            self._splitters = document_splitter.create_splitters()
+        return self._splitters
+
+    def get_parallel_splitter(self):
+        """여러 프로세스로 분할할 분할기 (SPLIT_WORKERS가 1 이하이면 None)"""
+        if SPLIT_WORKERS <= 1:
+            return None
+        return ParallelSplitter(SPLIT_WORKERS)
+
+    def split_document(self, doc):
+        """단일 문서를 청크로 분할"""
+        return self.number_chunks(document_splitter.split_with(self.get_splitters(), doc))
+
+    def get_snapshot_chunks(self, source):
+        """같은 페이지를 현재 분할 설정으로 분할해 둔 청크 (스냅숏이 없으면 None)"""
+        if self.snapshot_store is None:
+            return None
+        return self.snapshot_store.get_chunks(source, self.splitter_fingerprint)
+
+    def number_chunks(self, splitted_docs):
+        """소스 안에서의 청크 순번을 메타데이터(chunk_index)에 기록
+
+        검색 후 같은 페이지의 이웃한 청크를 하나로 합칠 때 사용합니다.
+        """
+        counters = collections.Counter()
+        for doc in splitted_docs:
+            source = get_source_key(doc)
+            doc.metadata['chunk_index'] = counters[source]
+            counters[source] += 1
+        return splitted_docs
 
     def split_docs(self, docs):
         """문서를 적절한 크기로 분할하여 처리합니다.
         
         1. 먼저 마크다운 헤더를 기준으로 분할
         2. 그 다음 RecursiveCharacterTextSplitter로 더 작은 청크로 분할
-        3. 토큰 수가 너무 많은 문서를 검사하고 추가로 분할
+        3. 문서가 SPLIT_PARALLEL_MIN_DOCUMENTS개 이상이면 여러 프로세스에 나누어 분할
+           (결과는 입력 순서대로 합치므로 직렬 분할과 같음)
         """
         self.logger.info("문서 분할 시작...")
-        
-        # 마크다운 헤더 기준으로 분할
-        headers_to_split_on = [
-            ("#", "Titre 1"),
-            ("##", "Sous-titre 1"),
-            ("###", "Sous-titre 2"),
-        ]
-
-        markdown_splitter = MarkdownHeaderTextSplitter(headers_to_split_on=headers_to_split_on)
+        docs = list(docs)
 
-        # Split based on markdown and add original metadata
-        md_docs = []
-        for doc in docs:
-            md_doc = markdown_splitter.split_text(doc.page_content)
-            for i in range(len(md_doc)):
-                md_doc[i].metadata = md_doc[i].metadata | doc.metadata
-            md_docs.extend(md_doc)
-        
-        self.logger.info(f"마크다운 헤더 분할 후 {len(md_docs)}개 문서로 나뉘었습니다.")
-
-        # 청크 크기를 좀 더 작게 설정 (512 -> 300)하여 토큰 수를 제한
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=300,  # 청크 크기 축소
-            chunk_overlap=20,
-            separators=["\n\n", "\n", "(?<=\. )", " ", ""],
-            length_function=len  # 단순 문자 길이 기준
-        )
+        parallel_splitter = self.get_parallel_splitter() if len(docs) >= SPLIT_PARALLEL_MIN_DOCUMENTS else None
+        if parallel_splitter is not None:
+            self.logger.info(f"{parallel_splitter.workers}개 프로세스로 {len(docs)}개 문서를 분할합니다.")
+            try:
+                chunk_lists = parallel_splitter.map(docs)
+            finally:
+                parallel_splitter.shutdown()
+        else:
+            splitters = self.get_splitters()
+            chunk_lists = [document_splitter.split_with(splitters, doc) for doc in docs]
 
-        splitted_docs = splitter.split_documents(md_docs)
+        splitted_docs = self.number_chunks([chunk for chunks in chunk_lists for chunk in chunks])
         self.logger.info(f"문서 분할 완료: 총 {len(splitted_docs)}개 청크 생성")
         
         return splitted_docs
 
-    def save_to_db_batch(self, splitted_docs, embeddings, batch_size=100):
-        """문서를 배치로 나누어 임베딩 후 Chroma DB에 저장합니다.
-        
-        Args:
-            splitted_docs: 분할된 문서 리스트
-            embeddings: 임베딩 함수
-            batch_size: 한 번에 처리할 문서 수
+    def assign_chunk_ids(self, splitted_docs):
+        """소스, 소스 내 순번, 내용의 해시로 결정적인 청크 ID 생성
+
+        같은 입력은 항상 같은 ID가 되므로 중단된 빌드를 이어갈 때 이미 저장된
+        청크를 식별할 수 있습니다.
         """
-        self.logger.info(f"총 {len(splitted_docs)}개 문서를 {batch_size}개씩 배치로 처리하여 DB 저장 시작...")
-        
-        # Chroma 컬렉션 생성
+        counters = collections.Counter()
+        ids = []
+        for doc in splitted_docs:
+            source = get_source_key(doc)
+            key = f"{source}\x00{counters[source]}\x00{doc.page_content}"
+            ids.append(hashlib.sha256(key.encode('utf-8')).hexdigest()[:32])
+            counters[source] += 1
+        return ids
+
+    def create_deduplicator(self):
+        return ChunkDeduplicator(
+            threshold=CHUNK_DEDUP_THRESHOLD,
+            num_perm=CHUNK_DEDUP_NUM_PERM,
+            bands=CHUNK_DEDUP_BANDS,
+            shingle_size=CHUNK_DEDUP_SHINGLE_SIZE
+        )
+
+    def load_deduplicator(self, db, batch_size=5000):
+        """컬렉션에 이미 있는 청크를 등록한 중복 제거 색인과 청크별로 기록된 소스 목록
+
+        증분 빌드에서 바뀐 페이지의 청크가 바뀌지 않은 페이지의 청크와 겹치는지 확인하는 데 사용합니다.
+        """
+        deduplicator = self.create_deduplicator()
+        stored_sources = {}
+        total = db._collection.count()
+        for offset in range(0, total, batch_size):
+            batch = db._collection.get(include=['documents', 'metadatas'], limit=batch_size, offset=offset)
+            for chunk_id, text, metadata in zip(batch['ids'], batch['documents'], batch['metadatas']):
+                deduplicator.add(chunk_id, text or '')
+                stored_sources[chunk_id] = split_sources((metadata or {}).get('sources'))
+        if total:
+            self.logger.info(f"중복 제거 색인에 기존 청크 {len(deduplicator)}개를 등록했습니다.")
+        return deduplicator, stored_sources
+
+    def update_chunk_sources(self, db, chunk_sources, batch_size=1000):
+        """청크 메타데이터의 병합된 소스 목록(sources)을 갱신 (컬렉션에 없는 청크는 건너뜀)"""
+        ids = list(chunk_sources)
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            existing = db._collection.get(ids=batch, include=[])['ids']
+            if existing:
+                db._collection.update(
+                    ids=existing,
+                    metadatas=[{'sources': join_sources(chunk_sources[chunk_id])} for chunk_id in existing]
+                )
+
+    def load_from_db(self, embeddings, directory=None):
+        """Chroma DB에서 청크 로드 (directory가 없으면 현재 서비스 중인 버전)"""
+        directory = directory or self.index_store.current_path()
+        self.logger.info(f"DB에서 문서 로드 중... ({directory})")
         db = Chroma(
-            persist_directory=self.persist_directory,
+            persist_directory=directory,
             embedding_function=embeddings
         )
-        
-        # 배치 처리
-        for i in tqdm.tqdm(range(0, len(splitted_docs), batch_size)):
-            batch = splitted_docs[i:i+batch_size]
-            
-            # 배치 내 문서에서 텍스트, 메타데이터 추출
-            texts = [doc.page_content for doc in batch]
-            metadatas = [doc.metadata for doc in batch]
-            
-            try:
-                # 임베딩 생성 및 추가
-                db.add_texts(texts=texts, metadatas=metadatas)
-                self.logger.info(f"배치 {i//batch_size + 1}/{(len(splitted_docs)-1)//batch_size + 1} 처리 완료")
-            except Exception as e:
-                self.logger.error(f"배치 {i//batch_size + 1} 처리 중 오류 발생: {e}")
-                # 배치 크기를 절반으로 줄여 재시도
-                half_batch_size = batch_size // 2
-                if half_batch_size > 0:
-                    self.logger.info(f"배치 크기를 {half_batch_size}로 줄여 재시도합니다.")
-                    for j in range(i, min(i+batch_size, len(splitted_docs)), half_batch_size):
-                        smaller_batch = splitted_docs[j:j+half_batch_size]
-                        texts = [doc.page_content for doc in smaller_batch]
-                        metadatas = [doc.metadata for doc in smaller_batch]
-                        try:
-                            db.add_texts(texts=texts, metadatas=metadatas)
-                            self.logger.info(f"작은 배치 처리 완료: {j}-{j+len(smaller_batch)}")
-                        except Exception as e2:
-                            self.logger.error(f"작은 배치 처리 중에도 오류 발생: {e2}")
-                            # 개별 문서 단위로 처리
-                            for k, doc in enumerate(smaller_batch):
-                                try:
-                                    db.add_texts([doc.page_content], [doc.metadata])
-                                    self.logger.info(f"개별 문서 처리 완료: {j+k}")
-                                except Exception as e3:
-                                    self.logger.error(f"문서 {j+k} 처리 실패: {e3}, 건너뜁니다.")
-        
-        # Chroma 0.4.x 이상에서는 자동으로 저장되므로 persist() 메서드 호출 불필요
-        # 하지만 명시적으로 저장한다는 의미로 주석으로 유지
-        # db.persist()
-        self.logger.info("모든 문서가 DB에 저장되었습니다.")
         return db
 
-    def load_from_db(self, embeddings):
-        """Chroma DB에서 청크 로드"""
-        self.logger.info("DB에서 문서 로드 중...")
-        db = Chroma(
-            persist_directory=self.persist_directory,
-            embedding_function=embeddings
+    def get_embedding_scheduler(self, embeddings):
+        return EmbeddingScheduler(
+            embeddings,
+            max_tokens_per_request=EMBEDDING_MAX_TOKENS_PER_REQUEST,
+            max_batch_size=EMBEDDING_BATCH_SIZE,
+            max_concurrency=EMBEDDING_MAX_CONCURRENCY,
+            initial_concurrency=EMBEDDING_INITIAL_CONCURRENCY,
+            quarantine_path=EMBEDDING_QUARANTINE_PATH
+        )
+
+    def write_batch(self, db, docs, ids, vectors):
+        """미리 계산한 임베딩과 함께 청크를 Chroma 컬렉션에 저장"""
+        db._collection.upsert(
+            ids=ids,
+            embeddings=vectors,
+            metadatas=[doc.metadata for doc in docs],
+            documents=[doc.page_content for doc in docs]
         )
+
+    def sync_db(self, db, docs, manifest, embeddings, journal=None, committed_ids=None):
+        """문서 스트림을 분할 → 임베딩 → 저장 파이프라인으로 흘려보내며 색인 갱신
+
+        매니페스트와 해시가 같은 소스는 건너뛰고, 변경된 소스는 다시 분할·임베딩하며,
+        스트림에 나타나지 않은 소스의 청크는 마지막에 제거합니다.
+        docs는 리스트뿐 아니라 제너레이터도 가능하며, 문서가 도착하는 대로 처리됩니다.
+        journal이 주어지면 저장된 배치를 기록하고, committed_ids에 있거나 이미
+        컬렉션에 있는 청크는 다시 임베딩하지 않습니다 (중단된 빌드 재개).
+        """
+        committed_ids = committed_ids if committed_ids is not None else set()
+        resuming = bool(committed_ids)
+        seen_sources = set()
+        updates = {}
+        failed_sources = set()
+        failed_ids = set()
+        self.skipped_chunks = 0
+
+        # 같거나 거의 같은 청크는 먼저 나온 청크(대표) 하나만 임베딩하고, 다른 소스는 대표 청크
+        # ID를 자신의 청크로 매니페스트에 기록함. 청크는 참조하는 소스가 모두 사라질 때만 삭제
+        chunk_sources = collections.defaultdict(set)
+        for source in manifest.sources():
+            for chunk_id in manifest.get(source)['chunk_ids']:
+                chunk_sources[chunk_id].add(source)
+        deduplicator, stored_sources = self.load_deduplicator(db) if CHUNK_DEDUP_ENABLED else (None, {})
+
+        # 처음 SPLIT_PARALLEL_MIN_DOCUMENTS개 문서는 이 스레드에서 분할하고, 그보다 많으면
+        # 이후 문서는 프로세스 풀에 맡긴 뒤 도착 순서대로 결과를 꺼냄 (작은 증분 빌드는 풀을 만들지 않음)
+        parallel_splitter = self.get_parallel_splitter()
+        max_pending_splits = SPLIT_WORKERS * 4
+        pending_splits = collections.deque()
+        split_count = 0
+
+        def split_stage(doc):
+            nonlocal split_count
+            source = get_source_key(doc)
+            if source in seen_sources:
+                self.logger.warning(f"중복된 소스를 건너뜁니다: {source}")
+                return []
+            seen_sources.add(source)
+
+            # 분할 설정이 바뀌면 내용이 같아도 다시 분할·임베딩
+            content_hash = hash_documents([doc], salt=self.splitter_fingerprint)
+            entry = manifest.get(source)
+            if entry and entry['hash'] == content_hash:
+                return []
+
+            # 같은 페이지를 같은 설정으로 분할해 둔 스냅숏이 있으면 재사용
+            chunks = self.get_snapshot_chunks(source)
+            split_count += 1
+            if chunks is None and parallel_splitter is not None and split_count > SPLIT_PARALLEL_MIN_DOCUMENTS:
+                future = parallel_splitter.submit([doc])
+            else:
+                if chunks is None:
+                    with self.metrics.span('index.split'):
+                        chunks = self.split_document(doc)
+                if not pending_splits:
+                    return emit_chunks(source, content_hash, entry, chunks)
+                # 먼저 맡긴 분할 결과보다 앞서지 않도록 순서대로 대기
+                future = Future()
+                future.set_result([chunks])
+            pending_splits.append((source, content_hash, entry, future))
+            return collect_splits()
+
+        def collect_splits(wait=False):
+            """끝난 분할 결과를 앞에서부터 순서대로 꺼냄 (대기 중인 작업이 많으면 가장 오래된 것을 기다림)"""
+            outputs = []
+            while pending_splits and (wait or pending_splits[0][3].done()
+                                      or len(pending_splits) > max_pending_splits):
+                source, content_hash, entry, future = pending_splits.popleft()
+                chunks = self.number_chunks(future.result()[0])
+                outputs.extend(emit_chunks(source, content_hash, entry, chunks))
+            return outputs
+
+        def emit_chunks(source, content_hash, entry, chunks):
+            if self.snapshot_store is not None:
+                try:
+                    self.snapshot_store.put_chunks(source, self.splitter_fingerprint, chunks)
+                except OSError as e:
+                    self.logger.warning(f"청크 스냅숏 저장 중 오류 ({source}): {e}")
+            ids = self.assign_chunk_ids(chunks)
+            self.metrics.inc('chunks_total', len(chunks))
+            old_ids = entry['chunk_ids'] if entry else []
+            if deduplicator is None:
+                records = list(zip(chunks, ids))
+            else:
+                # 수정된 페이지의 새 청크가 같은 페이지의 이전 청크와 유사하다고 판정되지 않도록 제외
+                previous_ids = set(old_ids)
+                records, kept_ids = [], []
+                for chunk, chunk_id in zip(chunks, ids):
+                    kind, kept_id = deduplicator.deduplicate(chunk_id, chunk.page_content, exclude=previous_ids)
+                    kept_ids.append(kept_id)
+                    if kind is None:
+                        records.append((chunk, chunk_id))
+                    else:
+                        self.metrics.inc('chunks_deduplicated_total', kind=kind)
+                ids = list(dict.fromkeys(kept_ids))
+            updates[source] = (content_hash, ids)
+
+            for chunk_id in old_ids:
+                chunk_sources[chunk_id].discard(source)
+            for chunk_id in ids:
+                chunk_sources[chunk_id].add(source)
+
+            outputs = []
+            # 새 ID와 겹치거나 다른 소스가 참조하는 청크는 그대로 두고 나머지만 삭제
+            stale_ids = [chunk_id for chunk_id in old_ids if not chunk_sources[chunk_id]]
+            for chunk_id in stale_ids:
+                del chunk_sources[chunk_id]
+                if deduplicator is not None:
+                    deduplicator.discard(chunk_id)
+            if stale_ids:
+                outputs.append(('delete', stale_ids))
+
+            if deduplicator is not None:
+                for chunk, chunk_id in records:
+                    stored_sources[chunk_id] = set(chunk_sources[chunk_id])
+                    chunk.metadata['sources'] = join_sources(stored_sources[chunk_id])
+
+            count = len(records)
+            records = [record for record in records if record[1] not in committed_ids]
+            if resuming and records:
+                # 저널에 기록되기 전에 중단된 배치도 컬렉션에 있으면 건너뜀
+                existing = set(db._collection.get(ids=[chunk_id for _, chunk_id in records], include=[])['ids'])
+                records = [record for record in records if record[1] not in existing]
+            self.skipped_chunks += count - len(records)
+            outputs.extend(('chunk', record) for record in records)
+            return outputs
+
+        # 토큰 수 기준으로 배치를 채워 여러 임베딩 요청을 동시에 보냄
+        scheduler = self.get_embedding_scheduler(embeddings)
+        packer = scheduler.packer()
+        in_flight = []
+
+        def submit(records):
+            future = scheduler.submit(
+                [doc.page_content for doc, _ in records],
+                [chunk_id for _, chunk_id in records]
+            )
+            in_flight.append((records, future))
+
+        def collect(wait=False):
+            """완료된 임베딩 요청을 저장 단계로 넘김"""
+            outputs = []
+            remaining = []
+            for records, future in in_flight:
+                if not wait and not future.done():
+                    remaining.append((records, future))
+                    continue
+                ok = []
+                for record, vector in zip(records, future.result()):
+                    if vector is None:
+                        failed_sources.add(get_source_key(record[0]))
+                        failed_ids.add(record[1])
+                    else:
+                        ok.append((record, vector))
+                if ok:
+                    outputs.append(('write', ok))
+            in_flight[:] = remaining
+            return outputs
+
+        def embed_stage(item):
+            kind, payload = item
+            if kind == 'delete':
+                return [item] + collect()
+            batch = packer.add(payload, payload[0].page_content)
+            if batch:
+                submit(batch)
+            return collect()
+
+        def embed_flush():
+            batch = packer.flush()
+            if batch:
+                submit(batch)
+            return collect(wait=True)
+
+        def write_stage(item):
+            kind, payload = item
+            if kind == 'delete':
+                db.delete(ids=payload)
+            else:
+                ids = [chunk_id for (_, chunk_id), _ in payload]
+                with self.metrics.span('index.write', size=len(ids)):
+                    self.write_batch(
+                        db,
+                        [doc for (doc, _), _ in payload],
+                        ids,
+                        [vector for _, vector in payload]
+                    )
+                if journal is not None:
+                    journal.record(ids)
+            return []
+
+        pipeline = StreamingPipeline(
+            [
+                Stage('split', split_stage, flush=lambda: collect_splits(wait=True)),
+                Stage('embed', embed_stage, flush=embed_flush),
+                Stage('write', write_stage),
+            ],
+            queue_sizes=[PIPELINE_DOCUMENT_QUEUE_SIZE, PIPELINE_CHUNK_QUEUE_SIZE, PIPELINE_WRITE_QUEUE_SIZE]
+        )
+        try:
+            pipeline.run(docs)
+        finally:
+            scheduler.shutdown()
+            if parallel_splitter is not None:
+                parallel_splitter.shutdown()
+            for stage in pipeline.stages:
+                self.metrics.inc('index_stage_busy_seconds_total', stage.stats.busy_seconds, stage=stage.name)
+        scheduler.log_stats()
+        self.pipeline = pipeline
+
+        # 임베딩에 실패한 청크가 있는 (또는 그 청크를 대표로 참조하는) 소스는 해시를 비워 다음 빌드에서 다시 처리
+        for chunk_id in failed_ids:
+            failed_sources.update(chunk_sources.get(chunk_id, ()))
+        for source, (content_hash, ids) in updates.items():
+            manifest.update(source, None if source in failed_sources else content_hash, ids)
+
+        removed_sources = manifest.sources() - seen_sources - self.retained_sources
+        if not seen_sources and not self.retained_sources:
+            # 로딩 실패로 빈 결과가 온 경우 기존 색인을 모두 지우지 않도록 보호
+            self.logger.warning("로드된 문서가 없어 기존 청크를 유지합니다.")
+            removed_sources = set()
+        protected = {source for source in removed_sources
+                     if any(source.startswith(prefix) for prefix in self.protected_source_prefixes)}
+        if protected:
+            self.logger.warning(f"목록을 확인하지 못한 소스 {len(protected)}개는 삭제하지 않고 유지합니다.")
+            removed_sources -= protected
+            self.retained_sources |= protected
+
+        stale_ids = []
+        for source in removed_sources:
+            for chunk_id in manifest.remove(source)['chunk_ids']:
+                chunk_sources[chunk_id].discard(source)
+                if not chunk_sources[chunk_id]:
+                    del chunk_sources[chunk_id]
+                    stale_ids.append(chunk_id)
+        if stale_ids:
+            db.delete(ids=stale_ids)
+
+        if deduplicator is not None:
+            # 저장 후에 중복으로 판정된 소스가 생긴 대표 청크의 병합된 소스 목록 갱신
+            changed = {
+                chunk_id: sources for chunk_id, sources in chunk_sources.items()
+                if sources and chunk_id not in failed_ids and stored_sources.get(chunk_id) != sources
+            }
+            if changed:
+                self.update_chunk_sources(db, changed)
+            self.dedup_stats = collections.Counter(deduplicator.stats)
+            self.logger.info(f"중복 제거: {deduplicator.summary()}, 소스 목록 갱신 {len(changed)}개 청크")
+
+        self.logger.info(
+            f"증분 색인: 변경/추가 {len(updates)}개, 삭제 {len(removed_sources)}개, "
+            f"유지 {len(seen_sources) - len(updates) + len(self.retained_sources)}개 소스"
+        )
+        if self.skipped_chunks:
+            self.logger.info(f"이미 저장된 청크 {self.skipped_chunks}개는 다시 임베딩하지 않았습니다.")
+        manifest.save()
         return db
 
-    def set_db(self, embeddings):
-        """Create, save, and load db"""
+    def validate_db(self, db):
+        """승격 전 새 인덱스 검증 (청크 수와 샘플 쿼리)"""
+        count = db._collection.count()
+        if count < INDEX_MIN_CHUNKS:
+            raise ValueError(f"청크 수가 너무 적습니다: {count}개 (최소 {INDEX_MIN_CHUNKS}개)")
+        results = db.similarity_search(INDEX_VALIDATION_QUERY, k=1)
+        if not results:
+            raise ValueError("샘플 쿼리 결과가 없습니다.")
+        self.logger.info(f"인덱스 검증 완료: 청크 {count}개, 샘플 쿼리 결과 '{results[0].metadata.get('title', '')}'")
+
+    def set_db(self, embeddings, incremental=None, resume=False):
+        """Create, save, and load db
+
+        빌드는 항상 새 버전 디렉토리에서 진행되고, 검증을 통과하면 현재 버전으로
+        승격되므로 서비스 중인 인덱스는 빌드 중에도 그대로 유지됩니다.
+        incremental이 True이면 현재 버전을 복사한 뒤 변경된 문서만 반영하고,
+        False이면 빈 디렉토리에 전체를 다시 색인합니다.
+        resume이 True이고 중단된 빌드가 있으면 같은 모드로 이어서 진행하며,
+        이미 저장된 청크는 다시 임베딩하지 않습니다.
+        """
+        if incremental is None:
+            incremental = self.incremental
         try:
-            if os.path.exists(self.persist_directory):
-                shutil.rmtree(self.persist_directory)
-                self.logger.info(f"기존 DB 디렉토리 삭제: {self.persist_directory}")
-        except Exception as e:
-            self.logger.warning(f"DB 디렉토리 삭제 중 오류: {e}")
+            with self.metrics.span('index.build', incremental=incremental, resume=resume):
+                return self._set_db(embeddings, incremental, resume)
+        finally:
+            self.build_directory = None
+            # /metrics가 없는 단독 빌드에서도 카운터가 남도록 JSONL 내보내기에 현재 값을 기록
+            self.metrics.export_snapshot()
 
-        # 디렉토리 생성
-        os.makedirs(self.persist_directory, exist_ok=True)
-        
-        # Load docs from selected sources
-        docs = self.load_documents()
+    def _set_db(self, embeddings, incremental, resume):
+        committed_ids = set()
+        version = self.index_store.building_version()
+        journal = BuildJournal(self.index_store.version_path(version)) if version else None
+
+        if resume and journal is not None and journal.in_progress():
+            incremental = journal.read_state().get('incremental', incremental)
+            committed_ids = journal.committed_ids()
+            self.logger.info(
+                f"중단된 빌드 {version}을(를) 이어서 진행합니다. (저장 완료된 청크 {len(committed_ids)}개)"
+            )
+        else:
+            if resume:
+                self.logger.info("이어서 진행할 빌드가 없어 새로 빌드합니다.")
+            if version:
+                # 이어가지 않는 이전 빌드는 버림
+                self.index_store.discard(version)
+
+            current_path = self.index_store.current_path()
+            if incremental and not IndexManifest(current_path).exists():
+                self.logger.info("매니페스트가 없어 전체 재색인을 수행합니다.")
+                incremental = False
+
+            version = self.index_store.create_version(copy_from=current_path if incremental else None)
+            journal = BuildJournal(self.index_store.version_path(version))
+            journal.start(incremental)
 
-        # Split Docs
-        splitted_docs = self.split_docs(docs)
+        build_directory = self.build_directory = self.index_store.version_path(version)
+        self.logger.info(f"인덱스 버전 {version} 빌드 중: {build_directory}")
+        manifest = IndexManifest(build_directory).load()
+        db = self.load_from_db(embeddings, build_directory)
 
-        # Save to DB using batch processing
-        db = self.save_to_db_batch(splitted_docs, embeddings)
+        # Load, split, embed and save only what changed, streaming page by page
+        docs = self.iter_documents(incremental=incremental)
+        snapshot_store = self.get_snapshot_store()
+        if snapshot_store is not None:
+            # 받은 페이지를 스냅숏으로 남겨 분할/임베딩 설정을 바꿔도 다시 크롤링하지 않게 함
+            docs = snapshot_store.record(docs)
+        try:
+            with self.metrics.span('index.sync'):
+                db = self.sync_db(db, docs, manifest, embeddings, journal=journal, committed_ids=committed_ids)
+        except Exception:
+            # 이미 받은 페이지는 남기되 보지 못한 소스는 지우지 않음
+            if snapshot_store is not None:
+                snapshot_store.save()
+            raise
+        if snapshot_store is not None:
+            snapshot_store.finish(self.retained_sources)
+        journal.finish()
+
+        try:
+            with self.metrics.span('index.validate'):
+                self.validate_db(db)
+        except Exception as e:
+            self.logger.error(f"인덱스 검증 실패, 버전 {version}을(를) 폐기합니다: {e}")
+            self.index_store.discard(version)
+            raise
+
+        if RETRIEVER_BACKEND == 'numpy':
+            # 승격 전에 검색용 행렬을 만들어 두어 서비스 쪽에서 바로 열 수 있게 함
+            try:
+                with self.metrics.span('index.export_vectors'):
+                    vector_index.export_collection(
+                        db._collection,
+                        os.path.join(build_directory, vector_index.VECTOR_INDEX_DIRECTORY_NAME),
+                        dtype=VECTOR_INDEX_DTYPE
+                    )
+            except Exception as e:
+                self.logger.warning(f"벡터 인덱스 내보내기 실패, 이 버전은 Chroma로 검색합니다: {e}")
+        if LEXICAL_INDEX_ENABLED:
+            try:
+                with self.metrics.span('index.build_lexical'):
+                    lexical_index.build_and_save(db._collection, build_directory)
+            except Exception as e:
+                self.logger.warning(f"어휘 인덱스 생성 실패, 이 버전은 서비스가 메모리에 만듭니다: {e}")
+        # 색인이 성공한 뒤에만 Confluence 동기화 시점을 기록 (승격 전에 새 버전 디렉토리에 저장)
+        if self.confluence_sync is not None:
+            self.confluence_sync.save_state()
+        self.index_store.promote(version)
+        self.prune_gitbook_cache()
+
+        if hasattr(embeddings, 'log_stats'):
+            embeddings.log_stats()
 
         return db
 
@@ -302,4 +923,15 @@ class DataLoader():
 
 
 if __name__ == "__main__":
-    pass
+    import argparse
+    from help_desk import create_embeddings
+
+    parser = argparse.ArgumentParser(description="Chroma DB 생성")
+    parser.add_argument("--full", action="store_true", help="기존 DB를 지우고 전체를 다시 색인")
+    parser.add_argument("--resume", action="store_true", help="중단된 빌드가 있으면 이어서 진행")
+    parser.add_argument("--from-snapshots", action="store_true",
+                        help="크롤링하지 않고 저장된 스냅숏에서 다시 색인 (네트워크 접근 없음)")
+    args = parser.parse_args()
+
+    loader = DataLoader(document_source='snapshot') if args.from_snapshots else DataLoader()
+    loader.set_db(create_embeddings(), incremental=False if args.full else None, resume=args.resume)
@@ -0,0 +1,262 @@
+import os
+import json
+import time
+import random
+import bisect
+import logging
+import threading
+import contextvars
+
+# 지연 시간 히스토그램 경계 (초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+SPAN_METRIC_NAME = 'span_duration_seconds'
+
+_current_span = contextvars.ContextVar('metrics_current_span', default=None)
+
+
+class Histogram:
+    """누적 버킷 히스토그램 (Prometheus histogram과 같은 형태)"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        total, result = 0, []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+class Span:
+    """시간을 재는 구간 (with 문으로 사용)
+
+    같은 스레드/태스크 안에서 중첩된 구간은 같은 trace_id와 부모 span_id를 가집니다.
+    끝나면 구간 이름별 지연 시간 히스토그램에 기록되고, 예외로 끝나면 오류로 집계됩니다.
+    """
+
+    __slots__ = ('registry', 'name', 'attributes', 'trace_id', 'span_id', 'parent_id',
+                 'started_at', '_start', '_token')
+
+    def __init__(self, registry, name, attributes):
+        self.registry = registry
+        self.name = name
+        self.attributes = attributes
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        parent = _current_span.get()
+        self.trace_id = parent.trace_id if parent is not None else f'{random.getrandbits(64):016x}'
+        self.parent_id = parent.span_id if parent is not None else None
+        self.span_id = f'{random.getrandbits(64):016x}'
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        duration = time.perf_counter() - self._start
+        _current_span.reset(self._token)
+        self.registry.finish_span(self, duration, exc)
+        return False
+
+
+class _NoopSpan:
+    """계측이 꺼져 있을 때 사용하는 아무 일도 하지 않는 구간"""
+
+    __slots__ = ()
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class MetricsRegistry:
+    """카운터, 히스토그램, 구간(span)을 모으는 저장소
+
+    enabled=False이면 모든 기록 메서드가 바로 반환하고 span()은 공유된 빈 구간을
+    돌려주므로 계측 코드를 그대로 두어도 비용이 거의 없습니다.
+    끝난 구간은 add_exporter()로 등록한 내보내기(export_span 메서드를 가진 객체)에 전달됩니다.
+    """
+
+    def __init__(self, enabled=True, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self.counters = {}
+        self.histograms = {}
+        self.exporters = []
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def add_exporter(self, exporter):
+        self.exporters.append(exporter)
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def span(self, name, **attributes):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attributes)
+
+    def finish_span(self, span, duration, error=None):
+        self.observe(SPAN_METRIC_NAME, duration, span=span.name)
+        if error is not None:
+            self.inc('errors_total', stage=span.name)
+        if not self.exporters:
+            return
+        record = {
+            'type': 'span',
+            'name': span.name,
+            'trace_id': span.trace_id,
+            'span_id': span.span_id,
+            'parent_id': span.parent_id,
+            'start': span.started_at,
+            'duration_ms': duration * 1000,
+            'attributes': span.attributes,
+        }
+        if error is not None:
+            record['error'] = repr(error)
+        for exporter in self.exporters:
+            try:
+                exporter.export_span(record)
+            except Exception as e:
+                self.logger.warning(f"구간 내보내기 중 오류 발생: {e}")
+
+    def export_snapshot(self):
+        """스냅숏을 기록할 수 있는 내보내기(write_snapshot 메서드)에 현재 값을 기록"""
+        if not self.enabled:
+            return
+        for exporter in self.exporters:
+            if hasattr(exporter, 'write_snapshot'):
+                exporter.write_snapshot(self)
+
+    def snapshot(self):
+        """현재 카운터와 히스토그램 값 (이름, 레이블 순으로 정렬)"""
+        with self._lock:
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+            histograms = [
+                {'name': name, 'labels': dict(labels), 'buckets': list(histogram.buckets),
+                 'counts': histogram.cumulative_counts(), 'sum': histogram.sum, 'count': histogram.count}
+                for (name, labels), histogram in sorted(self.histograms.items())
+            ]
+        return {'counters': counters, 'histograms': histograms}
+
+
+def format_labels(labels, extra=None):
+    items = list(labels.items()) + (list(extra.items()) if extra else [])
+    if not items:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in items)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(items, escaped)) + '}'
+
+
+def render_prometheus(registry, prefix='helpdesk_'):
+    """Prometheus 텍스트 형식 (서버의 /metrics 응답)"""
+    snapshot = registry.snapshot()
+    lines, typed = [], set()
+    for counter in snapshot['counters']:
+        name = prefix + counter['name']
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name}{format_labels(counter['labels'])} {counter['value']}")
+    for histogram in snapshot['histograms']:
+        name = prefix + histogram['name']
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} histogram")
+        labels = histogram['labels']
+        bounds = [str(bound) for bound in histogram['buckets']] + ['+Inf']
+        for bound, count in zip(bounds, histogram['counts']):
+            lines.append(f"{name}_bucket{format_labels(labels, {'le': bound})} {count}")
+        lines.append(f"{name}_sum{format_labels(labels)} {histogram['sum']}")
+        lines.append(f"{name}_count{format_labels(labels)} {histogram['count']}")
+    return '\n'.join(lines) + '\n'
+
+
+class JsonlExporter:
+    """끝난 구간을 JSON Lines 파일에 한 줄씩 기록하는 내보내기
+
+    write_snapshot()을 호출하면 그 시점의 카운터/히스토그램도 한 줄로 기록합니다.
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8', buffering=1)
+        self._lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+
+    def export_span(self, record):
+        self.write(record)
+
+    def write_snapshot(self, registry):
+        self.write({'type': 'snapshot', 'time': time.time(), **registry.snapshot()})
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """설정(METRICS_ENABLED, METRICS_JSONL_PATH)에 따라 만든 프로세스 공용 저장소"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                from config import METRICS_ENABLED, METRICS_JSONL_PATH
+                registry = MetricsRegistry(enabled=METRICS_ENABLED)
+                if METRICS_ENABLED and METRICS_JSONL_PATH:
+                    registry.add_exporter(JsonlExporter(METRICS_JSONL_PATH))
+                _registry = registry
+    return _registry
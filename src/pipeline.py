@@ -0,0 +1,133 @@
+import time
+import queue
+import logging
+import threading
+
+_SENTINEL = object()
+
+
+class StageStats:
+    """단계별 처리량 카운터"""
+
+    def __init__(self, name):
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.busy_seconds = 0.0
+
+    def summary(self, elapsed):
+        rate = self.items_in / elapsed if elapsed > 0 else 0.0
+        return (
+            f"{self.name}: 입력 {self.items_in}개, 출력 {self.items_out}개, "
+            f"작업 시간 {self.busy_seconds:.1f}초, 처리량 {rate:.1f}개/초"
+        )
+
+
+class Stage:
+    """파이프라인 단계
+
+    fn은 입력 항목 하나를 받아 출력 항목들을 반환(또는 yield)하고,
+    flush는 입력이 끝난 뒤 남은 출력(예: 마지막 배치)을 반환합니다.
+    """
+
+    def __init__(self, name, fn, flush=None):
+        self.name = name
+        self.fn = fn
+        self.flush = flush
+        self.stats = StageStats(name)
+
+
+class StreamingPipeline:
+    """크기 제한 큐로 연결된 스레드 단계들의 파이프라인
+
+    각 단계는 별도 스레드에서 실행되며, 큐가 가득 차면 앞 단계가 기다리므로
+    (backpressure) 메모리 사용량이 전체 코퍼스 크기와 무관하게 유지됩니다.
+    어느 단계에서든 오류가 나면 남은 항목을 버리고 run()에서 다시 발생시킵니다.
+    """
+
+    def __init__(self, stages, queue_sizes=None):
+        self.stages = stages
+        queue_sizes = queue_sizes or [64] * len(stages)
+        self.queues = [queue.Queue(maxsize=size) for size in queue_sizes]
+        self.logger = logging.getLogger(__name__)
+        self.source_count = 0
+        self.elapsed = 0.0
+        self._error = None
+        self._error_lock = threading.Lock()
+
+    def _fail(self, error):
+        with self._error_lock:
+            if self._error is None:
+                self._error = error
+
+    def _run_stage(self, stage, in_queue, out_queue):
+        def emit(outputs):
+            for output in outputs or ():
+                stage.stats.items_out += 1
+                if out_queue is not None:
+                    out_queue.put(output)
+
+        while True:
+            item = in_queue.get()
+            if item is _SENTINEL:
+                break
+            if self._error is not None:
+                # 오류 발생 후에는 앞 단계가 막히지 않도록 남은 항목을 비우기만 함
+                continue
+            stage.stats.items_in += 1
+            start = time.perf_counter()
+            try:
+                emit(stage.fn(item))
+            except Exception as e:
+                self.logger.error(f"파이프라인 단계 '{stage.name}' 처리 중 오류 발생: {e}")
+                self._fail(e)
+            stage.stats.busy_seconds += time.perf_counter() - start
+
+        if stage.flush is not None and self._error is None:
+            start = time.perf_counter()
+            try:
+                emit(stage.flush())
+            except Exception as e:
+                self.logger.error(f"파이프라인 단계 '{stage.name}' 마무리 중 오류 발생: {e}")
+                self._fail(e)
+            stage.stats.busy_seconds += time.perf_counter() - start
+
+        if out_queue is not None:
+            out_queue.put(_SENTINEL)
+
+    def run(self, source):
+        """source의 항목을 첫 단계에 공급하고 모든 단계가 끝날 때까지 대기"""
+        start = time.perf_counter()
+        threads = []
+        for i, stage in enumerate(self.stages):
+            out_queue = self.queues[i + 1] if i + 1 < len(self.queues) else None
+            thread = threading.Thread(
+                target=self._run_stage, args=(stage, self.queues[i], out_queue),
+                name=f"pipeline-{stage.name}", daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+
+        try:
+            for item in source:
+                if self._error is not None:
+                    break
+                self.source_count += 1
+                self.queues[0].put(item)
+        except Exception as e:
+            self.logger.error(f"파이프라인 입력 처리 중 오류 발생: {e}")
+            self._fail(e)
+        finally:
+            self.queues[0].put(_SENTINEL)
+            for thread in threads:
+                thread.join()
+            self.elapsed = time.perf_counter() - start
+
+        self.log_stats()
+        if self._error is not None:
+            raise self._error
+
+    def log_stats(self):
+        self.logger.info(f"파이프라인 완료: 입력 {self.source_count}개, {self.elapsed:.1f}초")
+        for stage in self.stages:
+            self.logger.info(stage.stats.summary(self.elapsed))
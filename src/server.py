@@ -0,0 +1,325 @@
+import os
+import sys
+import json
+import asyncio
+import logging
+import argparse
+import threading
+from http import HTTPStatus
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import (
+    SERVER_HOST, SERVER_PORT, SERVER_MAX_CONCURRENCY, SERVER_QUEUE_TIMEOUT,
+    SERVER_REQUEST_TIMEOUT, SERVER_MAX_BODY_BYTES
+)
+from metrics import get_registry, render_prometheus
+
+HEADER_READ_TIMEOUT = 10.0
+KEEP_ALIVE_TIMEOUT = 15.0
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class HelpDeskServer:
+    """HelpDesk를 HTTP로 제공하는 표준 라이브러리 asyncio 서버
+
+    - POST /ask: {"question": "..."} → {"result", "sources"} JSON 응답,
+      "stream": true 이거나 Accept가 text/event-stream이면 SSE로 토큰을 스트리밍
+    - GET /ready: 인덱스 로드가 끝난 뒤에만 200, 그 전에는 503
+    - GET /health: 프로세스가 살아 있으면 항상 200
+    - GET /metrics: 단계별 소요 시간과 카운터 (Prometheus 텍스트 형식)
+
+    인덱스는 시작할 때 한 번만 열고 모든 요청이 공유합니다. 동시에 처리하는 질문 수는
+    max_concurrency로 제한하며, 자리가 나지 않거나 처리 시간이 초과되면 503/504로 응답합니다.
+    질문은 max_concurrency개 스레드의 전용 풀에서 처리하고, 자리는 응답이 아니라 처리 스레드가
+    끝날 때 돌려주므로 시간이 초과되거나 클라이언트가 끊겨도 실제 LLM 호출 수가 한도를 넘지 않습니다.
+    """
+
+    def __init__(self, host=SERVER_HOST, port=SERVER_PORT, max_concurrency=SERVER_MAX_CONCURRENCY,
+                 queue_timeout=SERVER_QUEUE_TIMEOUT, request_timeout=SERVER_REQUEST_TIMEOUT,
+                 model_factory=None):
+        self.host = host
+        self.port = port
+        self.queue_timeout = queue_timeout
+        self.request_timeout = request_timeout
+        self.model_factory = model_factory or self.create_model
+        self.logger = logging.getLogger(__name__)
+        self.metrics = get_registry()
+
+        self.model = None
+        self.load_error = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='ask')
+        self._server = None
+
+    @staticmethod
+    def create_model():
+        from help_desk import HelpDesk
+        return HelpDesk(new_db=False)
+
+    async def load_model(self):
+        """인덱스를 백그라운드에서 열어 두고, 끝나면 준비 완료로 표시"""
+        try:
+            self.model = await asyncio.to_thread(self.model_factory)
+            self.logger.info("인덱스 로드 완료, 요청을 받을 준비가 되었습니다.")
+        except Exception as e:
+            self.load_error = str(e)
+            self.logger.error(f"인덱스 로드 중 오류 발생: {e}")
+
+    async def start(self):
+        self._server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.logger.info(f"HelpDesk 서버 시작: http://{self.host}:{self.port}")
+        asyncio.ensure_future(self.load_model())
+        return self._server
+
+    async def serve_forever(self):
+        server = await self.start()
+        async with server:
+            await server.serve_forever()
+
+    async def handle_connection(self, reader, writer):
+        """연결 하나에서 keep-alive 요청을 차례로 처리"""
+        try:
+            first = True
+            while True:
+                timeout = HEADER_READ_TIMEOUT if first else KEEP_ALIVE_TIMEOUT
+                try:
+                    request = await asyncio.wait_for(self.read_request(reader), timeout)
+                except asyncio.TimeoutError:
+                    if first:
+                        await self.send_json(writer, HTTPStatus.REQUEST_TIMEOUT, {'error': '요청 시간 초과'}, False)
+                    break
+                except HTTPError as e:
+                    await self.send_json(writer, e.status, {'error': e.message}, False)
+                    break
+                if request is None:
+                    break
+                first = False
+                keep_alive = await self.dispatch(request, writer)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            self.logger.error(f"요청 처리 중 오류 발생: {e}")
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def read_request(self, reader):
+        """요청 줄, 헤더, 본문을 읽어 딕셔너리로 반환 (연결이 닫혔으면 None)"""
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode('latin-1').strip().split(' ', 2)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, '잘못된 요청 줄입니다.')
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length') or 0)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, '잘못된 Content-Length입니다.')
+        if length < 0:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, '잘못된 Content-Length입니다.')
+        if length > SERVER_MAX_BODY_BYTES:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, '요청 본문이 너무 큽니다.')
+        body = await reader.readexactly(length) if length else b''
+
+        keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+        return {
+            'method': method,
+            'path': urlsplit(target).path,
+            'headers': headers,
+            'body': body,
+            'keep_alive': keep_alive,
+        }
+
+    async def dispatch(self, request, writer):
+        """경로별 처리 후 연결을 유지할지 반환"""
+        method, path, keep_alive = request['method'], request['path'], request['keep_alive']
+        if path == '/health' and method == 'GET':
+            await self.send_json(writer, HTTPStatus.OK, {'status': 'ok'}, keep_alive)
+        elif path == '/ready' and method == 'GET':
+            if self.model is not None:
+                body = {'status': 'ready', 'index_version': self.model.index_version}
+                await self.send_json(writer, HTTPStatus.OK, body, keep_alive)
+            else:
+                body = {'status': 'failed' if self.load_error else 'loading', 'error': self.load_error}
+                await self.send_json(writer, HTTPStatus.SERVICE_UNAVAILABLE, body, keep_alive)
+        elif path == '/metrics' and method == 'GET':
+            data = render_prometheus(self.metrics).encode('utf-8')
+            writer.write(self.build_head(HTTPStatus.OK, 'text/plain; version=0.0.4; charset=utf-8', len(data), keep_alive) + data)
+            await writer.drain()
+        elif path == '/ask' and method == 'POST':
+            return await self.handle_ask(request, writer)
+        elif path in ('/health', '/ready', '/ask', '/metrics'):
+            await self.send_json(writer, HTTPStatus.METHOD_NOT_ALLOWED, {'error': '허용되지 않은 메서드입니다.'}, keep_alive)
+        else:
+            await self.send_json(writer, HTTPStatus.NOT_FOUND, {'error': '존재하지 않는 경로입니다.'}, keep_alive)
+        return keep_alive
+
+    async def handle_ask(self, request, writer):
+        keep_alive = request['keep_alive']
+        if self.model is None:
+            await self.send_json(writer, HTTPStatus.SERVICE_UNAVAILABLE, {'error': '인덱스를 로드하는 중입니다.'}, keep_alive)
+            return keep_alive
+
+        try:
+            payload = json.loads(request['body'] or b'{}')
+            question = str(payload.get('question', '')).strip()
+        except (ValueError, AttributeError):
+            question, payload = '', {}
+        if not question:
+            await self.send_json(writer, HTTPStatus.BAD_REQUEST, {'error': 'question 필드가 필요합니다.'}, keep_alive)
+            return keep_alive
+
+        stream = bool(payload.get('stream')) or 'text/event-stream' in request['headers'].get('accept', '')
+
+        # 동시 처리 한도: 자리가 날 때까지 queue_timeout초만 기다림
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            await self.send_json(writer, HTTPStatus.SERVICE_UNAVAILABLE, {'error': '요청이 많아 처리할 수 없습니다.'}, keep_alive)
+            return keep_alive
+
+        if stream:
+            await self.stream_answer(question, writer)
+            return False
+        answer = self.run_in_slot(lambda: self.model.retrieval_qa_inference(question, verbose=False))
+        try:
+            # 시간이 초과되어도 처리 스레드는 취소할 수 없으므로 자리는 스레드가 끝날 때 반환됨
+            result, sources = await asyncio.wait_for(asyncio.shield(answer), self.request_timeout)
+        except asyncio.TimeoutError:
+            await self.send_json(writer, HTTPStatus.GATEWAY_TIMEOUT, {'error': '답변 생성 시간이 초과되었습니다.'}, keep_alive)
+            return keep_alive
+        await self.send_json(writer, HTTPStatus.OK, {'result': result, 'sources': sources}, keep_alive)
+        return keep_alive
+
+    def run_in_slot(self, fn):
+        """잡아 둔 동시 처리 자리에서 fn을 전용 스레드 풀로 실행하고, 스레드가 끝나면 자리를 반환"""
+        loop = asyncio.get_running_loop()
+
+        def release(_):
+            try:
+                loop.call_soon_threadsafe(self._semaphore.release)
+            except RuntimeError:
+                # 서버가 종료되어 이벤트 루프가 닫힌 경우
+                pass
+
+        try:
+            future = self._executor.submit(fn)
+        except Exception:
+            self._semaphore.release()
+            raise
+        future.add_done_callback(release)
+        return asyncio.wrap_future(future, loop=loop)
+
+    async def stream_answer(self, question, writer):
+        """HelpDesk 스트리밍 제너레이터를 스레드에서 돌리며 SSE 이벤트로 전달
+
+        시간이 초과되거나 클라이언트가 끊기면 바로 응답을 닫고, 생성 스레드는 다음 토큰에서
+        중단 신호를 보고 끝납니다. 동시 처리 자리는 생성 스레드가 끝날 때 반환됩니다.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        cancelled = threading.Event()
+
+        def emit(item):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                # 응답이 끝난 뒤 이벤트 루프가 닫힌 경우
+                pass
+
+        def produce():
+            events = self.model.stream_retrieval_qa_inference(question)
+            try:
+                for event in events:
+                    if cancelled.is_set():
+                        break
+                    emit(event)
+            except Exception as e:
+                emit(('error', str(e)))
+            finally:
+                events.close()
+                emit(None)
+
+        self.run_in_slot(produce)
+        deadline = loop.time() + self.request_timeout
+        try:
+            self.metrics.inc('http_responses_total', status=HTTPStatus.OK.value, stream=True)
+            writer.write(self.build_head(HTTPStatus.OK, 'text/event-stream; charset=utf-8', None, False, {
+                'Cache-Control': 'no-cache',
+            }))
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), max(0.0, deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    self.metrics.inc('errors_total', stage='server.stream_timeout')
+                    writer.write(self.build_event('error', '답변 생성 시간이 초과되었습니다.'))
+                    break
+                if event is None:
+                    writer.write(self.build_event('done', ''))
+                    break
+                writer.write(self.build_event(*event))
+                await writer.drain()
+            await writer.drain()
+        finally:
+            # 클라이언트가 끊기거나 시간이 초과되면 생성 중단 (자리는 스레드가 끝날 때 반환)
+            cancelled.set()
+
+    @staticmethod
+    def build_event(kind, data):
+        return f"event: {kind}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode('utf-8')
+
+    @staticmethod
+    def build_head(status, content_type, length, keep_alive, extra=None):
+        lines = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            f"Content-Type: {content_type}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if length is not None:
+            lines.append(f"Content-Length: {length}")
+        for name, value in (extra or {}).items():
+            lines.append(f"{name}: {value}")
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    async def send_json(self, writer, status, body, keep_alive):
+        self.metrics.inc('http_responses_total', status=status.value, stream=False)
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        writer.write(self.build_head(status, 'application/json; charset=utf-8', len(data), keep_alive) + data)
+        await writer.drain()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="HelpDesk HTTP 서버")
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        asyncio.run(HelpDeskServer(host=args.host, port=args.port).serve_forever())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,160 @@
+import logging
+import threading
+
+
+class _Call:
+    """진행 중인 계산 하나와 그 결과를 기다리는 호출들"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class _Stream:
+    """진행 중인 이벤트 스트림 하나와 지금까지 받은 이벤트 (나중에 합류한 호출은 처음부터 다시 받음)"""
+
+    def __init__(self, events):
+        self.events = events
+        self.buffer = []
+        self.done = False
+        self.error = None
+        self.pulling = False
+        self.consumers = 0
+        self.condition = threading.Condition()
+
+
+_PULL = object()
+
+
+class SingleFlight:
+    """같은 키로 동시에 들어온 호출을 하나의 계산으로 합치는 도우미
+
+    먼저 들어온 호출만 fn을 실행하고, 그동안 같은 키로 들어온 호출은 그 결과
+    (또는 예외)를 그대로 공유합니다. 계산이 끝나면 키는 즉시 해제되므로 결과를
+    보관하지는 않습니다.
+
+    stream()은 같은 방식으로 이벤트 제너레이터를 공유합니다. 원본 제너레이터는 한 번만
+    실행되고, 다음 이벤트가 필요한 호출이 차례로 하나씩 꺼내 모든 호출에 같은 이벤트를 전달합니다.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._calls = {}
+        self._streams = {}
+        self._lock = threading.Lock()
+        self.stats = {'executed': 0, 'shared': 0}
+
+    def do(self, key, fn):
+        """fn() 결과와 다른 호출의 결과를 공유했는지 여부를 반환"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.stats['shared'] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.stats['executed'] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            if call.waiters:
+                self.logger.info(f"진행 중인 동일 요청 {call.waiters}건이 결과를 공유했습니다.")
+            call.done.set()
+        return call.result, False
+
+    def stream(self, key, fn):
+        """fn()이 반환하는 이벤트 제너레이터를 같은 키의 진행 중인 호출과 공유
+
+        (이벤트 제너레이터, 다른 호출의 스트림을 공유하는지 여부)를 반환합니다.
+        원본의 예외는 모든 호출에 전달되며, 모든 호출이 제너레이터를 닫으면 원본도 닫힙니다.
+        """
+        with self._lock:
+            stream = self._streams.get(key)
+            shared = stream is not None
+            if shared:
+                self.stats['shared'] += 1
+            else:
+                stream = _Stream(fn())
+                self._streams[key] = stream
+                self.stats['executed'] += 1
+            stream.consumers += 1
+        return self._consume(key, stream), shared
+
+    def _consume(self, key, stream):
+        index = 0
+        try:
+            while True:
+                with stream.condition:
+                    while index >= len(stream.buffer) and not stream.done and stream.pulling:
+                        stream.condition.wait()
+                    if index < len(stream.buffer):
+                        event = stream.buffer[index]
+                    elif stream.done:
+                        if stream.error is not None:
+                            raise stream.error
+                        return
+                    else:
+                        # 다음 이벤트는 이 호출이 원본에서 꺼냄
+                        stream.pulling = True
+                        event = _PULL
+                if event is _PULL:
+                    self._pull(key, stream)
+                    continue
+                index += 1
+                yield event
+        finally:
+            self._release(key, stream)
+
+    def _pull(self, key, stream):
+        error = None
+        try:
+            event = next(stream.events)
+        except StopIteration:
+            event = _PULL
+        except BaseException as e:
+            event, error = _PULL, e
+        if event is _PULL:
+            # 끝난 스트림에는 새 호출이 합류하지 않도록 키를 먼저 해제
+            with self._lock:
+                if self._streams.get(key) is stream:
+                    del self._streams[key]
+        with stream.condition:
+            if event is _PULL:
+                stream.done = True
+                stream.error = error
+            else:
+                stream.buffer.append(event)
+            stream.pulling = False
+            stream.condition.notify_all()
+
+    def _release(self, key, stream):
+        with self._lock:
+            stream.consumers -= 1
+            last = stream.consumers == 0
+            if last and self._streams.get(key) is stream:
+                del self._streams[key]
+        if last:
+            if not stream.done:
+                self.logger.info("모든 호출이 스트림을 닫아 생성을 중단합니다.")
+            stream.events.close()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls) + len(self._streams)
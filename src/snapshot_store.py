@@ -0,0 +1,194 @@
+import os
+import gzip
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+
+from langchain_core.documents import Document
+
+from index_manifest import get_source_key
+
+OBJECT_DIRECTORY_NAME = 'objects'
+
+
+def serialize_documents(docs):
+    """Document 목록을 키 순서가 고정된 JSON 바이트로 변환 (같은 내용은 항상 같은 바이트)"""
+    records = [{'page_content': doc.page_content, 'metadata': doc.metadata} for doc in docs]
+    return json.dumps(records, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+
+
+def deserialize_documents(data):
+    return [Document(page_content=record['page_content'], metadata=record['metadata'])
+            for record in json.loads(data.decode('utf-8'))]
+
+
+class SnapshotStore:
+    """크롤링한 원본 페이지와 분할된 청크를 내용 해시로 저장하는 스냅숏 저장소
+
+    페이지와 청크 목록은 직렬화한 JSON의 SHA-256을 이름으로 하는 gzip 객체
+    (objects/ab/<해시>.json.gz)로 저장되므로 같은 내용은 한 번만 기록됩니다.
+    매니페스트(JSON Lines)에는 소스마다 페이지 해시, 청크 해시, 청크를 만든 분할 설정의
+    지문이 한 줄씩 기록되며, 매니페스트만 있으면 네트워크 없이 문서를 다시 읽을 수 있습니다.
+    """
+
+    def __init__(self, directory, manifest_path, compresslevel=6):
+        self.directory = directory
+        self.object_directory = os.path.join(directory, OBJECT_DIRECTORY_NAME)
+        self.manifest_path = manifest_path
+        self.compresslevel = compresslevel
+        self.logger = logging.getLogger(__name__)
+        self.entries = {}
+        self.seen_sources = set()
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """매니페스트 로드 (기록 도중 중단된 줄은 무시)"""
+        self.entries = {}
+        if not os.path.exists(self.manifest_path):
+            return self
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self.entries[entry['source']] = entry
+        return self
+
+    def save(self):
+        """임시 파일에 기록 후 교체하여 원자적으로 저장 (소스 순서로 정렬)"""
+        directory = os.path.dirname(self.manifest_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.manifest_path + '.tmp'
+        with self._lock:
+            entries = [self.entries[source] for source in sorted(self.entries)]
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        os.replace(tmp_path, self.manifest_path)
+
+    def _object_path(self, digest):
+        return os.path.join(self.object_directory, digest[:2], digest + '.json.gz')
+
+    def put_object(self, data):
+        """바이트를 gzip 객체로 저장하고 SHA-256 해시 반환 (이미 있으면 기록하지 않음)"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(gzip.compress(data, compresslevel=self.compresslevel))
+            os.replace(tmp_path, path)
+        return digest
+
+    def read_object(self, digest):
+        with open(self._object_path(digest), 'rb') as f:
+            return gzip.decompress(f.read())
+
+    def put_page(self, source, doc):
+        """원본 페이지 저장 (페이지가 바뀌면 이전 청크 기록은 버림)"""
+        digest = self.put_object(serialize_documents([doc]))
+        with self._lock:
+            self.seen_sources.add(source)
+            entry = self.entries.get(source)
+            if entry is None or entry['page'] != digest:
+                self.entries[source] = {
+                    'source': source,
+                    'page': digest,
+                    'chunks': None,
+                    'splitter': None,
+                    'fetched_at': datetime.now(timezone.utc).isoformat(),
+                }
+        return digest
+
+    def put_chunks(self, source, splitter, chunks):
+        """저장된 페이지를 splitter 설정(지문)으로 분할한 청크 저장"""
+        with self._lock:
+            entry = self.entries.get(source)
+        if entry is None:
+            return None
+        digest = self.put_object(serialize_documents(chunks))
+        with self._lock:
+            entry['chunks'] = digest
+            entry['splitter'] = splitter
+        return digest
+
+    def get_chunks(self, source, splitter):
+        """저장된 페이지를 같은 설정으로 분할한 청크가 있으면 반환 (없으면 None)
+
+        페이지 내용이 바뀌면 put_page()가 청크 기록을 비우므로 항상 현재 페이지의 청크입니다.
+        """
+        with self._lock:
+            entry = self.entries.get(source)
+        if entry is None or entry['splitter'] != splitter or not entry['chunks']:
+            return None
+        try:
+            return deserialize_documents(self.read_object(entry['chunks']))
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"저장된 청크를 읽지 못해 다시 분할합니다 ({source}): {e}")
+            return None
+
+    def record(self, docs):
+        """문서 스트림을 그대로 흘려보내며 각 페이지를 저장"""
+        for doc in docs:
+            source = get_source_key(doc)
+            try:
+                self.put_page(source, doc)
+            except OSError as e:
+                self.logger.warning(f"페이지 스냅숏 저장 중 오류 ({source}): {e}")
+            yield doc
+
+    def get_page(self, source):
+        """저장된 페이지 (없거나 읽지 못하면 None)"""
+        with self._lock:
+            entry = self.entries.get(source)
+        if entry is None:
+            return None
+        try:
+            return deserialize_documents(self.read_object(entry['page']))[0]
+        except (OSError, ValueError) as e:
+            self.logger.error(f"페이지 스냅숏을 읽지 못했습니다 ({source}): {e}")
+            return None
+
+    def iter_documents(self):
+        """매니페스트의 모든 페이지를 소스 순서로 반환 (네트워크 접근 없음)"""
+        for source in sorted(self.entries):
+            doc = self.get_page(source)
+            if doc is not None:
+                yield doc
+
+    def finish(self, retained_sources=()):
+        """이번 빌드에서 보지 못했고 유지되지도 않은 소스를 지우고 매니페스트와 객체 정리
+
+        받은 페이지가 하나도 없으면 (로딩 실패) 기존 기록을 그대로 둡니다.
+        """
+        with self._lock:
+            if self.seen_sources:
+                keep = self.seen_sources | set(retained_sources)
+                for source in [source for source in self.entries if source not in keep]:
+                    del self.entries[source]
+            self.seen_sources = set()
+        self.save()
+        removed = self.prune()
+        self.logger.info(f"스냅숏 저장 완료: 페이지 {len(self.entries)}개, 정리한 객체 {removed}개")
+
+    def prune(self):
+        """매니페스트가 참조하지 않는 객체 삭제"""
+        with self._lock:
+            referenced = {digest for entry in self.entries.values()
+                          for digest in (entry['page'], entry['chunks']) if digest}
+        removed = 0
+        if not os.path.isdir(self.object_directory):
+            return removed
+        for prefix in os.listdir(self.object_directory):
+            prefix_directory = os.path.join(self.object_directory, prefix)
+            for name in os.listdir(prefix_directory):
+                if name.endswith('.json.gz') and name[:-len('.json.gz')] not in referenced:
+                    os.remove(os.path.join(prefix_directory, name))
+                    removed += 1
+        return removed
@@ -62,11 +62,15 @@ st.markdown("""
 
 @st.cache_resource
 def get_model():
-    """모델 로드 (캐싱)"""
+    """모델 로드 (캐싱)
+
+    저장된 인덱스를 그대로 열고, DB 재빌드는 사이드바에서 명시적으로 요청할 때만
+    백그라운드에서 수행합니다.
+    """
     try:
         with st.spinner("모델을 로드하는 중..."):
             logger.info("HelpDesk 모델 초기화 중...")
-            model = HelpDesk(new_db=True, verbose=True)
+            model = HelpDesk(new_db=False, verbose=True)
             logger.info("HelpDesk 모델 초기화 완료")
             return model
     except Exception as e:
@@ -96,11 +100,54 @@ with st.sidebar:
     
     # 고급 설정
     with st.expander("고급 설정"):
-        new_db = st.checkbox("새 DB 생성", value=False, help="체크하면 다음 세션에서 데이터베이스를 새로 생성합니다")
+        full_rebuild = st.checkbox("전체 재색인", value=False, help="체크하면 변경된 문서만이 아니라 전체 문서를 다시 색인합니다")
+
+        if st.button("새 DB 생성", help="백그라운드에서 새 인덱스를 빌드하고, 완료되면 자동으로 교체합니다"):
+            sidebar_model = get_model()
+            if sidebar_model is not None:
+                if sidebar_model.start_rebuild(incremental=False if full_rebuild else None):
+                    st.info("백그라운드에서 DB 빌드를 시작했습니다.")
+                else:
+                    st.warning("이미 DB 빌드가 진행 중입니다.")
         
         if st.button("세션 초기화"):
             st.session_state.clear()
             st.experimental_rerun()
+
+    # 시작 지표 및 DB 빌드 상태
+    with st.expander("시작 지표"):
+        sidebar_model = get_model()
+        if sidebar_model is not None:
+            metrics = sidebar_model.startup_metrics
+            index_load = metrics['index_load_seconds']
+            first_query = metrics['first_query_seconds']
+            cache_stats = sidebar_model.get_answer_cache_stats()
+            cache_line = (
+                f"{cache_stats['hit_rate'] * 100:.1f}% (정확 {cache_stats['exact_hits']}, "
+                f"유사 {cache_stats['semantic_hits']}, 미스 {cache_stats['misses']})"
+                if cache_stats else '사용 안 함'
+            )
+            latency = sidebar_model.get_latency_stats()
+            latency_line = (
+                f"첫 토큰 {latency['ttft_p50_seconds'] or 0:.2f}초 / 전체 {latency['total_p50_seconds']:.2f}초 "
+                f"/ 프롬프트 {latency['prompt_tokens_p50'] or 0} 토큰 ({latency['count']}건)"
+                if latency else '-'
+            )
+            retrieval = sidebar_model.get_retrieval_stats()
+            retrieval_line = ", ".join(
+                f"{path} {stats['p50_ms']:.0f}ms ({stats['count']}건)" for path, stats in retrieval.items()
+            ) or '-'
+            st.markdown(f"""
+            - 인덱스 버전: `{sidebar_model.index_version or '-'}`
+            - 인덱스 로드 시간: {f'{index_load:.2f}초' if index_load is not None else '-'}
+            - 첫 질문 응답 시간: {f'{first_query:.2f}초' if first_query is not None else '-'}
+            - 응답 지연 (중앙값): {latency_line}
+            - 검색 경로별 지연 (중앙값): {retrieval_line}
+            - 답변 캐시 적중률: {cache_line}
+            - DB 빌드 상태: {sidebar_model.rebuild_status['state']}
+            """)
+            if sidebar_model.rebuild_status['error']:
+                st.error(sidebar_model.rebuild_status['error'])
     
     st.markdown("---")
     # st.markdown("© 2024 RAG-Confluence-Chatbot")
@@ -120,6 +167,10 @@ with st.spinner("준비 중..."):
 if "messages" not in st.session_state:
     st.session_state["messages"] = [{"role": "assistant", "content": "안녕하세요! FETA GitBook기반의 서비스 이용안내 도우미입니다. 질문이 있으시면 언제든지 물어보세요. 무엇을 도와드릴까요?", "id": str(uuid.uuid4())}]
 
+# 후속 질문을 이해하기 위한 세션별 대화 기록 (최근 대화 + 오래된 대화 요약)
+if "memory" not in st.session_state:
+    st.session_state["memory"] = model.create_memory()
+
 # 메시지 표시 - 고유 ID를 사용하여 각 메시지를 식별
 for i, msg in enumerate(st.session_state.messages):
     # 메시지에 ID가 없으면 추가
@@ -177,42 +228,49 @@ if prompt := st.chat_input("질문을 입력하세요..."):
         </div>
         """, unsafe_allow_html=True)
     
-    # 응답 생성 표시
-    with st.spinner("답변 생성 중..."):
-        try:
-            logger.info(f"질문 처리 중: {prompt}")
-            # 답변 생성
-            result, sources = model.retrieval_qa_inference(prompt)
-            
-            # 응답 메시지에 고유 ID 추가
-            assistant_msg_id = str(uuid.uuid4())
-            response = f"{result}\n\n{sources}"
-            st.session_state.messages.append({"role": "assistant", "content": response, "id": assistant_msg_id})
-            
-            # 응답 메시지 표시
-            msg_index = len(st.session_state.messages) - 1
-            with stylable_container(
-                key=f"ai_msg_{msg_index}_{assistant_msg_id}",  # 메시지 인덱스와 고유 ID 모두 사용
-                css_styles="""
-                {
-                    border-radius: 10px;
-                    margin-bottom: 15px;
-                    padding: 10px;
-                }
-                """):
-                st.markdown(f"""
-                <div class="chat-message assistant">
-                    <div class="avatar">
-                        🤖
-                    </div>
-                    <div class="content">
-                        {response}
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-                
-            logger.info("답변 생성 완료")
-            
-        except Exception as e:
-            logger.error(f"답변 생성 중 오류 발생: {e}")
-            st.error(f"죄송합니다. 답변 생성 중 오류가 발생했습니다: {str(e)}")
+    # 응답 메시지 (토큰이 도착하는 대로 갱신)
+    assistant_msg_id = str(uuid.uuid4())
+    msg_index = len(st.session_state.messages)
+    with stylable_container(
+        key=f"ai_msg_{msg_index}_{assistant_msg_id}",  # 메시지 인덱스와 고유 ID 모두 사용
+        css_styles="""
+        {
+            border-radius: 10px;
+            margin-bottom: 15px;
+            padding: 10px;
+        }
+        """):
+        placeholder = st.empty()
+
+    def render_assistant(content):
+        placeholder.markdown(f"""
+        <div class="chat-message assistant">
+            <div class="avatar">
+                🤖
+            </div>
+            <div class="content">
+                {content}
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    try:
+        logger.info(f"질문 처리 중: {prompt}")
+        render_assistant("답변 생성 중...")
+        # 답변을 토큰 단위로 받아 바로 표시
+        result, sources = "", ""
+        for kind, text in model.stream_conversational_inference(prompt, st.session_state.memory):
+            if kind == "token":
+                result += text
+                render_assistant(result + "▌")
+            elif kind == "sources":
+                sources = text
+
+        response = f"{result}\n\n{sources}"
+        render_assistant(response)
+        st.session_state.messages.append({"role": "assistant", "content": response, "id": assistant_msg_id})
+        logger.info("답변 생성 완료")
+        
+    except Exception as e:
+        logger.error(f"답변 생성 중 오류 발생: {e}")
+        st.error(f"죄송합니다. 답변 생성 중 오류가 발생했습니다: {str(e)}")
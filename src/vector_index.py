@@ -0,0 +1,226 @@
+import os
+import json
+import shutil
+import logging
+import threading
+import contextlib
+
+import numpy as np
+from langchain_core.documents import Document
+
+VECTOR_INDEX_DIRECTORY_NAME = 'vector_index'
+META_FILE_NAME = 'meta.json'
+VECTORS_FILE_NAME = 'vectors.npy'
+SCALES_FILE_NAME = 'scales.npy'
+DOCUMENTS_FILE_NAME = 'documents.jsonl'
+OFFSETS_FILE_NAME = 'offsets.npy'
+SUPPORTED_DTYPES = ('float16', 'int8')
+
+
+def export_collection(collection, directory, dtype='float16', page_size=5000):
+    """Chroma 컬렉션을 메모리 매핑용 행렬과 메타데이터 파일로 내보냄
+
+    - vectors.npy: 정규화한 임베딩 (float16, 또는 행별 스케일을 둔 int8)
+    - documents.jsonl / offsets.npy: 청크 본문과 메타데이터, 각 줄의 바이트 위치
+    프로세스/스레드별 임시 디렉토리에 모두 쓴 뒤 교체하므로, 중간에 실패해도 기존 내보내기는
+    유지되고 동시에 내보내는 쪽과 임시 파일이 섞이지 않습니다.
+    """
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"지원하지 않는 벡터 형식입니다: {dtype} (float16 또는 int8)")
+    logger = logging.getLogger(__name__)
+    count = collection.count()
+    tmp_directory = f"{directory.rstrip('/')}.{os.getpid()}.{threading.get_ident()}.tmp"
+    shutil.rmtree(tmp_directory, ignore_errors=True)
+    os.makedirs(tmp_directory)
+
+    vectors = None
+    scales = np.ones(count, dtype=np.float32)
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    row = 0
+    with open(os.path.join(tmp_directory, DOCUMENTS_FILE_NAME), 'wb') as f:
+        for offset in range(0, count, page_size):
+            page = collection.get(
+                include=['embeddings', 'documents', 'metadatas'], limit=page_size, offset=offset
+            )
+            embeddings = np.asarray(page['embeddings'], dtype=np.float32)
+            if not len(embeddings):
+                break
+            if vectors is None:
+                vectors = np.lib.format.open_memmap(
+                    os.path.join(tmp_directory, VECTORS_FILE_NAME), mode='w+',
+                    dtype=np.dtype(dtype), shape=(count, embeddings.shape[1])
+                )
+            # 내적만으로 코사인 유사도를 구할 수 있도록 정규화
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.where(norms == 0, 1, norms)
+            end = row + len(embeddings)
+            if dtype == 'int8':
+                page_scales = np.abs(embeddings).max(axis=1) / 127.0
+                page_scales[page_scales == 0] = 1.0
+                vectors[row:end] = np.round(embeddings / page_scales[:, None]).astype(np.int8)
+                scales[row:end] = page_scales
+            else:
+                vectors[row:end] = embeddings.astype(np.float16)
+
+            for i, (chunk_id, text, metadata) in enumerate(zip(page['ids'], page['documents'], page['metadatas'])):
+                line = json.dumps({'id': chunk_id, 'text': text, 'metadata': metadata or {}}, ensure_ascii=False)
+                f.write(line.encode('utf-8') + b'\n')
+                offsets[row + i + 1] = f.tell()
+            row = end
+
+    if vectors is not None:
+        vectors.flush()
+        del vectors
+    np.save(os.path.join(tmp_directory, SCALES_FILE_NAME), scales[:row])
+    np.save(os.path.join(tmp_directory, OFFSETS_FILE_NAME), offsets[:row + 1])
+    with open(os.path.join(tmp_directory, META_FILE_NAME), 'w', encoding='utf-8') as f:
+        json.dump({'dtype': dtype, 'count': row}, f)
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_directory, directory)
+    logger.info(f"벡터 인덱스 내보내기 완료: {row}개 청크 ({dtype}) → {directory}")
+    return row
+
+
+class NumpyVectorIndex:
+    """메모리 매핑한 행렬의 내적으로 top-k를 찾는 벡터 인덱스
+
+    행렬은 np.load(mmap_mode='r')로 열어 필요한 페이지만 메모리에 올라오고,
+    청크 본문은 결과로 선택된 행만 오프셋으로 찾아 읽습니다.
+    preload=True이면 행렬을 float32로 한 번 풀어 메모리에 두어, 질문마다 형 변환하는
+    비용 없이 BLAS 행렬 곱 한 번으로 검색합니다 (메모리 대신 지연 시간을 택함).
+    HelpDesk가 사용하는 similarity_search_by_vector와 같은 형태로 검색합니다.
+
+    close()는 진행 중인 검색이 끝난 뒤에 파일과 행렬을 놓습니다. 인덱스 교체 직전에
+    검색기를 가져간 요청이 close() 뒤에 검색하면 파일을 다시 열어 답하고 곧바로 닫습니다.
+    """
+
+    def __init__(self, directory, block_size=65536, preload=False):
+        self.directory = directory
+        self.block_size = block_size
+        self.preload = preload
+        with open(os.path.join(directory, META_FILE_NAME), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.dtype = meta['dtype']
+        self.count = meta['count']
+        self._file_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._active = 0
+        self._closed = False
+        self._open()
+
+    def _open(self):
+        if self.count:
+            self.vectors = np.load(os.path.join(self.directory, VECTORS_FILE_NAME), mmap_mode='r')
+        else:
+            self.vectors = np.empty((0, 0), dtype=np.float32)
+        self.scales = np.load(os.path.join(self.directory, SCALES_FILE_NAME))
+        self.offsets = np.load(os.path.join(self.directory, OFFSETS_FILE_NAME))
+        self._documents_file = open(os.path.join(self.directory, DOCUMENTS_FILE_NAME), 'rb')
+        self._dense = None
+        if self.preload and self.count:
+            self._dense = np.asarray(self.vectors, dtype=np.float32)
+            if self.dtype == 'int8':
+                self._dense *= self.scales[:, None]
+
+    def _release_resources(self):
+        self._documents_file.close()
+        # 메모리 매핑과 미리 올린 행렬은 참조를 끊어야 해제됨
+        self.vectors = self.scales = self.offsets = self._dense = None
+
+    @contextlib.contextmanager
+    def _in_use(self):
+        with self._state_lock:
+            if self._closed and self._active == 0:
+                self._open()
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._state_lock:
+                self._active -= 1
+                if self._closed and self._active == 0:
+                    self._release_resources()
+
+    @property
+    def closed(self):
+        with self._state_lock:
+            return self._closed and self._active == 0
+
+    @classmethod
+    def exists(cls, directory):
+        return os.path.exists(os.path.join(directory, META_FILE_NAME))
+
+    def scores(self, queries):
+        """(질문 수, 청크 수) 유사도 행렬 (블록 단위로 계산하여 임시 메모리 제한)"""
+        queries = np.asarray(queries, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+        if self._dense is not None:
+            return queries @ self._dense.T
+        result = np.empty((len(queries), self.count), dtype=np.float32)
+        for start in range(0, self.count, self.block_size):
+            end = min(start + self.block_size, self.count)
+            block = np.asarray(self.vectors[start:end], dtype=np.float32)
+            result[:, start:end] = queries @ block.T
+        if self.dtype == 'int8':
+            result *= self.scales[None, :]
+        return result
+
+    def top_k(self, queries, k=4):
+        """질문별 상위 k개 (행 번호, 점수) 목록"""
+        if not self.count:
+            return [[] for _ in queries]
+        scores = self.scores(queries)
+        k = min(k, self.count)
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row_scores, rows in zip(scores, candidates):
+            rows = rows[np.argsort(-row_scores[rows], kind='stable')]
+            results.append([(int(row), float(row_scores[row])) for row in rows])
+        return results
+
+    def get_document(self, row):
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        with self._file_lock:
+            self._documents_file.seek(start)
+            record = json.loads(self._documents_file.read(end - start))
+        return Document(page_content=record['text'], metadata=record['metadata'], id=record['id'])
+
+    def similarity_search_by_vector(self, embedding, k=4):
+        with self._in_use():
+            return [self.get_document(row) for row, _ in self.top_k([embedding], k)[0]]
+
+    def search_batch(self, embeddings, k=4):
+        """여러 질문 벡터를 한 번의 행렬 곱으로 검색"""
+        with self._in_use():
+            return [[self.get_document(row) for row, _ in hits] for hits in self.top_k(embeddings, k)]
+
+    def close(self):
+        """문서 파일과 행렬을 놓음 (진행 중인 검색이 있으면 마지막 검색이 끝날 때 놓음)"""
+        with self._state_lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._active == 0:
+                self._release_resources()
+
+
+def load(db, persist_directory, dtype='float16', preload=False):
+    """빌드 때 버전 디렉토리에 내보낸 벡터 인덱스를 엶 (없거나 컬렉션과 맞지 않으면 None)
+
+    서비스 중인 버전 디렉토리는 여러 프로세스가 함께 읽으므로 여기서는 다시 내보내지 않습니다.
+    내보내기는 승격 전에 빌더(DataLoader)만 합니다.
+    """
+    logger = logging.getLogger(__name__)
+    directory = os.path.join(persist_directory, VECTOR_INDEX_DIRECTORY_NAME)
+    if not NumpyVectorIndex.exists(directory):
+        logger.warning(f"내보낸 벡터 인덱스가 없습니다: {directory}")
+        return None
+    count = db._collection.count()
+    with open(os.path.join(directory, META_FILE_NAME), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta['count'] != count or meta['dtype'] != dtype:
+        logger.warning(f"벡터 인덱스가 컬렉션과 맞지 않습니다. ({meta['count']}/{count}개, {meta['dtype']}/{dtype})")
+        return None
+    return NumpyVectorIndex(directory, preload=preload)
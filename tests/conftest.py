@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+ROOT_DIRECTORY = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT_DIRECTORY, 'src'))
+sys.path.insert(0, os.path.join(ROOT_DIRECTORY, 'benchmarks'))
+
+# config는 import 시점에 필수 환경 변수를 읽으므로 다른 모듈보다 먼저 더미 값을 설정
+for name in ('OPENAI_API_KEY', 'CONFLUENCE_PRIVATE_API_KEY', 'CONFLUENCE_SPACE_KEY', 'EMAIL_ADRESS'):
+    os.environ.setdefault(name, 'test')
+os.environ.setdefault('CONFLUENCE_SPACE_NAME', 'http://127.0.0.1/wiki')
+os.environ.setdefault('ANONYMIZED_TELEMETRY', 'False')
+
+
+@pytest.fixture
+def make_help_desk(tmp_path, monkeypatch):
+    """가짜 임베딩과 주어진 LLM을 쓰는 HelpDesk 생성 함수 (빈 인덱스, 작업 디렉토리는 tmp_path)"""
+    import help_desk
+    from chromadb.api.client import SharedSystemClient
+    from stand_ins import FakeEmbeddings
+
+    monkeypatch.chdir(tmp_path)
+    # Chroma는 persist_directory 문자열('./db/...')로 클라이언트를 캐시하므로, 이전 테스트의
+    # 작업 디렉토리에서 연 클라이언트를 재사용하지 않도록 비움
+    SharedSystemClient.clear_system_cache()
+    monkeypatch.setattr(help_desk, 'create_embeddings', lambda: FakeEmbeddings())
+
+    def make(llm):
+        monkeypatch.setattr(help_desk.HelpDesk, 'get_llm', lambda self: llm)
+        return help_desk.HelpDesk(new_db=False)
+
+    return make
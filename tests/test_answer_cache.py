@@ -0,0 +1,90 @@
+import answer_cache
+from answer_cache import AnswerCache
+from stand_ins import FakeStreamingChatModel
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_exact_and_similar_questions_hit():
+    cache = AnswerCache(similarity_threshold=0.9)
+    cache.put("환불은 어떻게 하나요?", [1.0, 0.0], ('답변', '소스'), 'v1')
+
+    # 공백/대소문자/끝 문장부호만 다른 질문은 정확 일치
+    assert cache.get("  환불은   어떻게 하나요 ", 'v1') == ('답변', '소스')
+    assert cache.get("결제는 어떻게 하나요?", 'v1') is None
+    # 임베딩이 충분히 비슷하면 유사 질문으로 적중, 아니면 미스
+    assert cache.get_similar([0.99, 0.05], 'v1') == ('답변', '소스')
+    assert cache.get_similar([0.5, 0.5], 'v1') is None
+    assert cache.get_stats()['exact_hits'] == 1 and cache.stats['semantic_hits'] == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(answer_cache.time, 'time', clock)
+    cache = AnswerCache(ttl_seconds=60)
+    cache.put("환불", [1.0, 0.0], ('답변', ''), 'v1')
+
+    clock.now += 59
+    assert cache.get("환불", 'v1') == ('답변', '')
+    clock.now += 2
+    assert cache.get("환불", 'v1') is None
+    assert cache.get_similar([1.0, 0.0], 'v1') is None
+    assert cache.get_stats()['entries'] == 0
+
+
+def test_index_version_change_clears_entries():
+    cache = AnswerCache()
+    cache.put("환불", [1.0, 0.0], ('이전 답변', ''), 'v1')
+
+    assert cache.get("환불", 'v2') is None
+    assert cache.get_similar([1.0, 0.0], 'v2') is None
+    # 이전 버전으로 돌아가도 비워진 항목은 되살아나지 않음
+    assert cache.get("환불", 'v1') is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AnswerCache(max_entries=2)
+    cache.put("a", None, 'A', 'v1')
+    cache.put("b", None, 'B', 'v1')
+    cache.get("a", 'v1')
+    cache.put("c", None, 'C', 'v1')
+
+    assert cache.get("b", 'v1') is None
+    assert cache.get("a", 'v1') == 'A' and cache.get("c", 'v1') == 'C'
+
+
+def test_help_desk_reuses_answers_until_the_index_changes(make_help_desk):
+    llm = FakeStreamingChatModel(answer_words=5)
+    model = make_help_desk(llm)
+    question = "환불은 어떻게 하나요?"
+
+    first = model.retrieval_qa_inference(question, verbose=False)
+    assert model.retrieval_qa_inference(question + " ", verbose=False) == first
+    assert len(llm.prompts) == 1
+
+    # 새 인덱스 버전으로 바뀌면 캐시가 비워져 다시 생성
+    model.set_db(model.db, 'new-version')
+    model.retrieval_qa_inference(question, verbose=False)
+    assert len(llm.prompts) == 2
+
+
+def test_use_cache_false_neither_reads_nor_writes_the_cache(make_help_desk):
+    llm = FakeStreamingChatModel(answer_words=5)
+    model = make_help_desk(llm)
+    question = "환불은 어떻게 하나요?"
+
+    first = model.retrieval_qa_inference(question, verbose=False, use_cache=False)
+    assert model.answer_cache.get_stats()['entries'] == 0
+    model.retrieval_qa_inference(question, verbose=False)
+    model.retrieval_qa_inference(question, verbose=False, use_cache=False)
+
+    # 캐시를 쓰지 않는 호출은 매번 LLM을 호출하고, 모델의 캐시 설정은 그대로
+    assert len(llm.prompts) == 3
+    assert model.retrieval_qa_inference(question, verbose=False) == first
+    assert len(llm.prompts) == 3
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+
+from stand_ins import FakeStreamingChatModel
+
+ERROR_ANSWER = "죄송합니다. 질문 처리 중 오류가 발생했습니다."
+
+
+def test_batch_answers_in_order_and_asks_duplicates_once(make_help_desk):
+    llm = FakeStreamingChatModel(answer_words=5)
+    model = make_help_desk(llm)
+    model.answer_cache = None
+
+    results = model.batch_retrieval_qa_inference(["환불은 어떻게 하나요?", "결제 수단은?", "  환불은 어떻게 하나요 "])
+
+    assert len(llm.prompts) == 2
+    assert all(result['error'] is None for result in results)
+    assert results[0] == results[2] and results[0]['result'] != results[1]['result']
+    # 질문 하나씩 물어본 답변과 같음
+    assert model.retrieval_qa_inference("결제 수단은?", verbose=False)[0] == results[1]['result']
+
+
+def test_concurrent_async_questions_share_one_task(make_help_desk):
+    llm = FakeStreamingChatModel(answer_words=5, first_token_delay=0.3)
+    model = make_help_desk(llm)
+    model.answer_cache = None
+
+    async def ask_all():
+        return await asyncio.gather(*(model.aretrieval_qa_inference("환불은 어떻게 하나요?") for _ in range(4)))
+
+    results = asyncio.run(ask_all())
+
+    assert len(llm.prompts) == 1
+    assert all(result == results[0] for result in results) and results[0][0] != ERROR_ANSWER
+    assert model._async_inflight == {}
+
+
+def test_event_loops_in_other_threads_do_not_await_each_others_tasks(make_help_desk):
+    llm = FakeStreamingChatModel(answer_words=5, first_token_delay=0.3)
+    model = make_help_desk(llm)
+    model.answer_cache = None
+    barrier = threading.Barrier(3)
+    results = []
+
+    def session():
+        barrier.wait()
+        results.append(asyncio.run(model.aretrieval_qa_inference("환불은 어떻게 하나요?")))
+
+    threads = [threading.Thread(target=session) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+
+    # 루프마다 따로 계산하므로 다른 루프의 태스크를 기다리다 실패하지 않음
+    assert len(results) == 3 and all(answer != ERROR_ANSWER for answer, _ in results)
+    assert len(llm.prompts) == 3
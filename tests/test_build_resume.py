@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+import load_db
+from load_db import DataLoader
+from build_journal import BuildJournal
+from stand_ins import FakeEmbeddings, StandInServer
+
+
+class CrashingEmbeddings(FakeEmbeddings):
+    """embed_documents 호출을 기록하고 crash_after번째 호출 뒤부터 실패하는 임베딩"""
+
+    def __init__(self, crash_after=None):
+        super().__init__()
+        self.crash_after = crash_after
+        self.texts = []
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            if self.crash_after is not None and self.crash_after <= 0:
+                raise RuntimeError('임베딩 서버가 종료되었습니다')
+            if self.crash_after is not None:
+                self.crash_after -= 1
+            self.texts.extend(texts)
+        return super().embed_documents(texts)
+
+
+def test_interrupted_build_resumes_without_reembedding(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(load_db, 'SPLIT_WORKERS', 1)
+    monkeypatch.setattr(load_db, 'SNAPSHOT_DIRECTORY', '')
+    monkeypatch.setattr(load_db, 'INDEX_MIN_CHUNKS', 1)
+    # 작은 배치를 하나씩 임베딩하여 중단 시점에 저장된 배치와 저장되지 않은 배치가 나뉘게 함
+    monkeypatch.setattr(load_db, 'EMBEDDING_BATCH_SIZE', 4)
+    monkeypatch.setattr(load_db, 'EMBEDDING_MAX_CONCURRENCY', 1)
+    monkeypatch.setattr(load_db, 'EMBEDDING_INITIAL_CONCURRENCY', 1)
+
+    with StandInServer() as server:
+        def make_loader():
+            return DataLoader(confluence_url=server.confluence_url(6), username='', api_key='',
+                              space_key='BENCH', persist_directory=str(tmp_path / 'db'),
+                              document_source='confluence')
+
+        crashing = CrashingEmbeddings(crash_after=3)
+        loader = make_loader()
+        with pytest.raises(RuntimeError):
+            loader.set_db(crashing, incremental=False)
+
+        # 중단된 버전은 승격되지 않고 저널에 저장된 배치만 남음
+        version = loader.index_store.building_version()
+        assert version and loader.index_store.current_version() is None
+        journal = BuildJournal(loader.index_store.version_path(version))
+        assert journal.in_progress()
+        committed = journal.committed_ids()
+        assert 0 < len(committed) <= len(crashing.texts)
+        # 마지막 기록을 쓰다가 멈춘 것처럼 잘린 줄을 덧붙여도 무시됨
+        with open(journal.journal_path, 'a', encoding='utf-8') as f:
+            f.write('["잘린')
+        assert journal.committed_ids() == committed
+
+        resumed = CrashingEmbeddings()
+        loader = make_loader()
+        db = loader.set_db(resumed, resume=True)
+
+        # 전체를 새로 빌드한 결과와 같은 청크를 가지되, 저장된 배치는 다시 임베딩하지 않음
+        splitter = make_loader()
+        expected = splitter.split_docs(splitter.iter_documents(incremental=False))
+
+    stored = db._collection.get(include=['documents'])
+    assert loader.index_store.current_version() == version
+    assert not BuildJournal(loader.index_store.version_path(version)).in_progress()
+    assert sorted(stored['documents']) == sorted(doc.page_content for doc in expected)
+    assert committed <= set(stored['ids'])
+    assert len(resumed.texts) == len(expected) - len(committed)
@@ -0,0 +1,62 @@
+from langchain_core.documents import Document
+from langchain_chroma import Chroma
+
+import load_db
+from load_db import DataLoader
+from chunk_dedup import ChunkDeduplicator
+from index_manifest import IndexManifest
+from stand_ins import FakeEmbeddings
+
+REFUND = (
+    "환불 정책 안내: 결제 후 7일 이내에 요청하시면 전액 환불됩니다. 구독 상품은 다음 결제일 전까지 "
+    "해지할 수 있으며, 이미 사용한 포인트와 쿠폰은 환불 금액에서 차감됩니다. 환불은 결제 수단으로 "
+    "영업일 기준 3~5일 안에 처리되며, 처리 상태는 설정 > 결제 내역에서 확인할 수 있습니다. "
+    "문의는 고객센터 채팅으로 남겨 주세요."
+)
+OTHER = (
+    "친구 초대 안내: 친구에게 초대 링크를 보내면 가입 후 두 사람 모두 포인트를 받습니다. 초대 링크는 "
+    "설정 > 친구 초대에서 복사할 수 있고, 한 계정당 한 달에 최대 스무 명까지 초대할 수 있습니다. "
+    "초대받은 친구가 문자 인증을 마쳐야 포인트가 지급되며, 지급 내역은 알림으로 안내됩니다. "
+    "부정한 방법으로 받은 포인트는 회수될 수 있습니다."
+)
+FOOTER = "Copyright Octo Technology. Tous droits réservés. Contactez le support via le portail interne."
+
+
+def page(source, body):
+    return Document(page_content=f"# {source}\n\n{body}\n\n## Contact\n\n{FOOTER}", metadata={'source': source})
+
+
+def build(loader, directory, docs):
+    manifest = IndexManifest(directory).load()
+    db = Chroma(persist_directory=directory, embedding_function=FakeEmbeddings())
+    loader.sync_db(db, docs, manifest, FakeEmbeddings())
+    return db._collection.get(include=['documents', 'metadatas'])
+
+
+def test_near_duplicate_and_exclude():
+    deduplicator = ChunkDeduplicator()
+    assert deduplicator.deduplicate('old', REFUND) == (None, 'old')
+    edited = REFUND.replace('7일', '14일')
+    assert deduplicator.deduplicate('copy', edited) == ('near', 'old')
+    assert deduplicator.deduplicate('new', edited, exclude={'old'}) == (None, 'new')
+    assert deduplicator.deduplicate('same', REFUND.upper(), exclude={'old'}) == ('exact', 'old')
+
+
+def test_incremental_rebuild_keeps_edit(tmp_path, monkeypatch):
+    monkeypatch.setattr(load_db, 'SPLIT_WORKERS', 1)
+    directory = str(tmp_path / 'db')
+    loader = DataLoader(persist_directory=directory, document_source='gitbook')
+
+    got = build(loader, directory, [page('a', REFUND), page('b', OTHER)])
+    footers = [m for d, m in zip(got['documents'], got['metadatas']) if 'Copyright' in d]
+    assert len(footers) == 1 and footers[0]['sources'] == 'a\nb'
+
+    got = build(loader, directory, [page('a', REFUND.replace('7일', '14일')),
+                                    page('b', OTHER)])
+    text = '\n'.join(got['documents'])
+    assert '14일 이내' in text
+    assert '7일 이내' not in text
+    # 이전 청크는 지워지고 매니페스트가 참조하는 청크는 모두 컬렉션에 있음
+    referenced = {chunk_id for entry in IndexManifest(directory).load().entries.values()
+                  for chunk_id in entry['chunk_ids']}
+    assert referenced == set(got['ids'])
@@ -0,0 +1,81 @@
+from crawler import ConcurrentCrawler
+from confluence_sync import ConfluenceSync
+from stand_ins import StandInServer
+
+
+def make_sync(server, count, state_path):
+    return ConfluenceSync(
+        url=server.confluence_url(count), username='', api_key='', space_key='BENCH',
+        state_path=state_path, page_size=2,
+        crawler=ConcurrentCrawler(concurrency=4, requests_per_second=0, retries=0)
+    )
+
+
+def synced_ids(result):
+    return sorted(doc.metadata['id'] for doc in result.documents)
+
+
+def page_ids(sources):
+    """소스 URL의 마지막 경로(페이지 ID) (URL에 코퍼스 크기가 들어가므로 ID로 비교)"""
+    return sorted(source.rsplit('/', 1)[1] for source in sources)
+
+
+def test_incremental_sync_skips_deletes_and_retries_failures(tmp_path):
+    state_path = str(tmp_path / 'confluence_state.json')
+    with StandInServer() as server:
+        sync = make_sync(server, 5, state_path)
+        result = sync.sync()
+        assert synced_ids(result) == ['0', '1', '2', '3', '4']
+        assert not result.unchanged_sources and not result.deleted_sources
+        sync.save_state()
+
+        # 버전이 그대로인 페이지는 본문을 다시 받지 않음
+        sync = make_sync(server, 5, state_path)
+        result = sync.sync()
+        assert synced_ids(result) == []
+        assert page_ids(result.unchanged_sources) == ['0', '1', '2', '3', '4']
+        sync.save_state()
+
+        # 버전이 바뀐 페이지만 받고, 목록에서 사라진 페이지는 삭제로 보고
+        server.page_versions[1] = 2
+        sync = make_sync(server, 4, state_path)
+        result = sync.sync()
+        assert synced_ids(result) == ['1']
+        assert page_ids(result.deleted_sources) == ['4']
+        assert page_ids(result.unchanged_sources) == ['0', '2', '3']
+        sync.save_state()
+
+        # 본문을 받지 못한 페이지는 기존 청크를 유지하고 이전 버전을 남겨 다음에 다시 시도
+        server.page_versions[2] = 2
+        server.failing_pages.add(2)
+        sync = make_sync(server, 4, state_path)
+        result = sync.sync()
+        assert synced_ids(result) == []
+        assert page_ids(result.unchanged_sources) == ['0', '1', '2', '3']
+        sync.save_state()
+        assert sync.state['pages']['2']['version'] == 1
+
+        server.failing_pages.clear()
+        result = make_sync(server, 4, state_path).sync()
+        assert synced_ids(result) == ['2']
+
+    # 상태를 저장하지 않은 동기화는 다음 실행에 영향을 주지 않음
+    assert make_sync(server, 4, state_path).state['pages']['2']['version'] == 1
+
+
+def test_listing_follows_next_links_when_server_caps_limit(tmp_path):
+    state_path = str(tmp_path / 'confluence_state.json')
+    with StandInServer() as server:
+        # 요청한 page_size(200)보다 작게 응답해도 목록이 첫 페이지에서 끝나지 않아야 함
+        server.max_page_size = 25
+        sync = ConfluenceSync(
+            url=server.confluence_url(60), username='', api_key='', space_key='BENCH', state_path=state_path,
+            crawler=ConcurrentCrawler(concurrency=4, requests_per_second=0, retries=0)
+        )
+        assert len(sync.list_pages()) == 60
+        assert len(sync.sync().documents) == 60
+        sync.save_state()
+
+        result = make_sync(server, 60, state_path).sync()
+        assert not result.deleted_sources
+        assert len(result.unchanged_sources) == 60
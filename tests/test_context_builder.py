@@ -0,0 +1,70 @@
+from langchain_core.documents import Document
+
+from context_builder import ContextBuilder, MIN_TRUNCATED_TOKENS
+
+
+def chunk(text, source='page', index=None):
+    metadata = {'source': source}
+    if index is not None:
+        metadata['chunk_index'] = index
+    return Document(page_content=text, metadata=metadata)
+
+
+def make_builder(max_tokens=1500):
+    builder = ContextBuilder(max_tokens=max_tokens)
+    # 토큰을 글자 수로 세어 예산 계산을 예측 가능하게 함
+    builder._encoding = None
+    return builder
+
+
+def test_adjacent_chunks_merge_without_repeating_overlap():
+    docs = [
+        chunk("환불은 결제일로부터 7일 이내에 신청할 수 있습니다.", index=1),
+        chunk("환불 규정 안내\n환불은 결제일로부터", index=0),
+    ]
+
+    packed, stats = make_builder().build(docs)
+
+    assert [doc.page_content for doc in packed] == ["환불 규정 안내\n환불은 결제일로부터 7일 이내에 신청할 수 있습니다."]
+    assert stats['merged'] == 1
+
+
+def test_non_adjacent_chunks_with_spurious_overlap_stay_separate():
+    # 3번 청크 끝과 7번 청크 시작이 우연히 같은 문구("문의하세요.")여도 합치지 않음
+    docs = [
+        chunk("비밀번호를 잊었다면 관리자에게 문의하세요.", index=3),
+        chunk("문의하세요. 백업은 매일 새벽에 실행됩니다.", index=7),
+        chunk("문의하세요. 다른 페이지의 내용입니다.", source='other', index=4),
+        chunk("관리자에게 문의하세요. 색인 없는 청크", source='loose'),
+        chunk("문의하세요. 색인 없는 다음 청크", source='loose'),
+    ]
+
+    packed, stats = make_builder().build(docs)
+
+    assert [doc.page_content for doc in packed] == [doc.page_content for doc in docs]
+    assert stats['merged'] == 5
+
+
+def test_context_fits_budget_in_rank_order():
+    docs = [chunk("가" * 40, source='a'), chunk("나" * 40, source='b'), chunk("다" * 40, source='c')]
+
+    packed, stats = make_builder(max_tokens=100).build(docs)
+
+    # 세 번째 청크는 남은 예산(20)이 너무 작아 자르지 않고 버림
+    assert [doc.metadata['source'] for doc in packed] == ['a', 'b']
+    assert stats['context_tokens'] == 80
+
+    packed, stats = make_builder(max_tokens=80 + MIN_TRUNCATED_TOKENS).build(docs)
+    assert packed[-1].page_content == "다" * MIN_TRUNCATED_TOKENS
+    assert stats['context_tokens'] == 80 + MIN_TRUNCATED_TOKENS
+
+
+def test_near_duplicate_chunks_are_dropped():
+    docs = [
+        chunk("백업은 매일 새벽 3시에 실행됩니다.", source='a'),
+        chunk("매일 새벽 3시", source='b'),
+    ]
+
+    packed, stats = make_builder().build(docs)
+
+    assert len(packed) == 1 and stats['duplicates'] == 1
@@ -0,0 +1,31 @@
+from stand_ins import FakeStreamingChatModel
+
+TURNS = 50
+
+
+def test_long_conversation_keeps_prompts_bounded(make_help_desk):
+    llm = FakeStreamingChatModel(answer_words=40)
+    model = make_help_desk(llm)
+    model.answer_cache = None
+    memory = model.create_memory()
+    count = model.context_builder.count_tokens
+
+    condense_tokens, answer_tokens = [], []
+    for turn in range(TURNS):
+        seen = len(llm.prompts)
+        model.conversational_inference(f"{turn}번째 질문: 결제 후 환불은 며칠 안에 요청해야 하나요?", memory)
+        for prompt in llm.prompts[seen:]:
+            if prompt.startswith("다음 대화 요약과 최근 대화를"):
+                condense_tokens.append(count(prompt))
+            elif "주어진 텍스트 조각" in prompt:
+                answer_tokens.append(count(prompt))
+
+    # 첫 턴은 대화 기록이 없어 재작성하지 않음
+    assert len(condense_tokens) == TURNS - 1 and len(answer_tokens) == TURNS
+    assert memory.history_tokens <= memory.max_history_tokens
+    assert count(memory.summary) <= memory.summary_max_tokens
+
+    # 프롬프트 크기는 요약 + 최근 대화 창으로 제한되고, 창이 찬 뒤에는 대화가 길어져도 늘지 않음
+    assert max(condense_tokens) <= memory.max_history_tokens + memory.summary_max_tokens + 300
+    assert max(condense_tokens[TURNS // 2:]) <= max(condense_tokens[10:TURNS // 2]) * 1.1
+    assert max(answer_tokens[TURNS // 2:]) <= max(answer_tokens[:TURNS // 2]) * 1.1
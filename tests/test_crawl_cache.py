@@ -0,0 +1,24 @@
+from crawl_cache import CrawlCache
+
+
+def test_versions_keep_their_own_bodies(tmp_path):
+    directory = str(tmp_path / 'cache')
+    old_state, new_state = str(tmp_path / 'v1.json'), str(tmp_path / 'v2.json')
+
+    old = CrawlCache(directory, old_state)
+    old.store('https://docs/a', '<p>v1</p>', lastmod='2024-01-01', etag='"1"')
+    old.save()
+
+    new = CrawlCache(directory, old_state)
+    new.state_path = new_state
+    new.store('https://docs/a', '<p>v2</p>', lastmod='2024-02-01', etag='"2"')
+    new.save()
+
+    # 같은 URL이라도 각 버전의 상태는 그 버전이 받은 본문을 가리킴
+    assert CrawlCache(directory, old_state).read_body('https://docs/a') == '<p>v1</p>'
+    assert CrawlCache(directory, new_state).read_body('https://docs/a') == '<p>v2</p>'
+
+    assert new.prune([new_state, old_state]) == 0
+    assert new.prune([new_state]) == 1
+    assert CrawlCache(directory, old_state).read_body('https://docs/a') is None
+    assert CrawlCache(directory, new_state).read_body('https://docs/a') == '<p>v2</p>'
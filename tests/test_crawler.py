@@ -0,0 +1,37 @@
+from crawler import ConcurrentCrawler
+
+
+def test_crawl_pulls_urls_only_as_results_are_consumed():
+    pulled = []
+
+    def urls():
+        for i in range(100):
+            pulled.append(i)
+            yield f"https://docs/{i}"
+
+    crawler = ConcurrentCrawler(concurrency=2, requests_per_second=0, retries=0)
+    results = crawler.crawl(urls(), str.upper, prefetch=2)
+
+    # 소비하지 않은 결과가 쌓이지 않도록 concurrency * prefetch개까지만 미리 맡김
+    next(results)
+    assert len(pulled) <= 4
+    for _ in range(10):
+        next(results)
+    assert len(pulled) <= 4 + 10
+
+    assert len(list(results)) == 100 - 11 and len(pulled) == 100
+
+
+def test_crawl_returns_every_url_with_its_result_or_error():
+    crawler = ConcurrentCrawler(concurrency=3, requests_per_second=0, retries=0)
+
+    def handler(url):
+        if url == 'b':
+            raise ValueError('broken page')
+        return url * 2
+
+    results = {url: (result, error) for url, result, error in crawler.crawl(iter('abcdefg'), handler)}
+
+    assert sorted(results) == list('abcdefg')
+    assert results['a'] == ('aa', None)
+    assert results['b'][0] is None and isinstance(results['b'][1], ValueError)
@@ -0,0 +1,64 @@
+import itertools
+
+import embedding_cache
+from embedding_cache import CachedEmbeddings
+from stand_ins import FakeEmbeddings
+
+
+class CountingEmbeddings(FakeEmbeddings):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.calls.append([text])
+        return super().embed_query(text)
+
+
+def test_vectors_round_trip_through_disk(tmp_path):
+    path = str(tmp_path / 'cache' / 'embeddings.sqlite3')
+    texts = ["환불 규정", "비밀번호 초기화", "환불 규정"]
+    first = CountingEmbeddings()
+    vectors = CachedEmbeddings(first, path).embed_documents(texts)
+    # 같은 텍스트는 한 번만 임베딩
+    assert first.calls == [["환불 규정", "비밀번호 초기화"]]
+
+    second = CountingEmbeddings()
+    cache = CachedEmbeddings(second, path)
+    assert cache.embed_documents(texts) == vectors
+    assert second.calls == []
+    assert cache.get_stats() == {'hits': 3, 'misses': 0, 'hit_rate': 1.0}
+
+    # 질문 임베딩은 문서 임베딩과 따로 저장
+    query = cache.embed_query("환불 규정")
+    assert second.calls == [["환불 규정"]]
+    assert cache.embed_query("환불 규정") == query and len(second.calls) == 1
+
+
+def test_eviction_removes_least_recently_used_entries(tmp_path, monkeypatch):
+    # 접근 시각이 같아지지 않도록 호출마다 1초씩 흐르는 시계 사용
+    clock = itertools.count(1000)
+    monkeypatch.setattr(embedding_cache.time, 'time', lambda: float(next(clock)))
+    embeddings = CountingEmbeddings()
+    cache = CachedEmbeddings(embeddings, str(tmp_path / 'embeddings.sqlite3'), max_entries=10)
+    statements = []
+    cache._conn.set_trace_callback(statements.append)
+
+    for i in range(10):
+        cache.embed_documents([f"{i}번 문서"])
+    cache.embed_documents(["0번 문서"])  # 0번을 최근에 사용한 항목으로 갱신
+    # 최대치까지는 저장할 때마다 테이블 전체를 세지 않음
+    assert not any('COUNT(*)' in statement for statement in statements)
+
+    cache.embed_documents(["10번 문서"])
+    assert cache._count_entries() == cache._entry_count == 9
+
+    embeddings.calls.clear()
+    cache.embed_documents(["0번 문서", "10번 문서"])
+    assert embeddings.calls == []
+    cache.embed_documents(["1번 문서"])
+    assert embeddings.calls == [["1번 문서"]]
@@ -0,0 +1,118 @@
+import pytest
+
+from embedding_scheduler import EmbeddingScheduler
+
+
+class RateLimitError(Exception):
+    pass
+
+
+class APIStatusError(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class FailingEmbeddings:
+    """'bad'가 든 텍스트는 input_error, error가 있으면 모든 요청이 그 오류로 실패"""
+
+    def __init__(self, error=None, input_error=None):
+        self.error = error
+        self.input_error = input_error or APIStatusError('invalid input', 400)
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        if any('bad' in text for text in texts):
+            raise self.input_error
+        return [[float(len(text))] for text in texts]
+
+
+def make_scheduler(embeddings, tmp_path):
+    return EmbeddingScheduler(embeddings, max_retries=1, initial_concurrency=1,
+                              quarantine_path=str(tmp_path / 'quarantine.jsonl'))
+
+
+@pytest.mark.parametrize('input_error', [
+    APIStatusError('invalid input', 400),
+    APIStatusError('payload too large', 413),
+    ValueError("This model's maximum context length is 8192 tokens"),
+])
+def test_input_error_quarantines_only_bad_text(tmp_path, input_error):
+    scheduler = make_scheduler(FailingEmbeddings(input_error=input_error), tmp_path)
+    try:
+        vectors = scheduler.submit(['a', 'bad', 'ccc', 'dd'], ['k1', 'k2', 'k3', 'k4']).result()
+    finally:
+        scheduler.shutdown()
+    assert vectors == [[1.0], None, [3.0], [2.0]]
+    assert scheduler.stats['quarantined'] == 1
+    assert '"k2"' in (tmp_path / 'quarantine.jsonl').read_text(encoding='utf-8')
+
+
+@pytest.mark.parametrize('error', [
+    APIStatusError('invalid api key', 401),
+    APIStatusError('no access to model', 403),
+    APIStatusError('deployment not found', 404),
+    RuntimeError('unexpected'),
+])
+def test_request_error_aborts_without_bisecting(tmp_path, error):
+    embeddings = FailingEmbeddings(error=error)
+    scheduler = make_scheduler(embeddings, tmp_path)
+    try:
+        with pytest.raises(type(error)):
+            scheduler.embed_documents(['a', 'b', 'c', 'd'], ['k1', 'k2', 'k3', 'k4'])
+    finally:
+        scheduler.shutdown()
+    # 텍스트 탓이 아니므로 재시도하거나 나누지 않고 바로 중단
+    assert embeddings.calls == 1
+    assert scheduler.stats['quarantined'] == 0
+    assert not (tmp_path / 'quarantine.jsonl').exists()
+
+
+@pytest.mark.parametrize('error', [APIStatusError('bad gateway', 502), TimeoutError('timed out')])
+def test_transient_error_is_retried(tmp_path, monkeypatch, error):
+    monkeypatch.setattr('embedding_scheduler.time.sleep', lambda _: None)
+    embeddings = FailingEmbeddings(error=error)
+    original = embeddings.embed_documents
+
+    def recover(texts):
+        if embeddings.calls == 1:
+            embeddings.error = None
+        return original(texts)
+
+    embeddings.embed_documents = recover
+    scheduler = make_scheduler(embeddings, tmp_path)
+    try:
+        vectors = scheduler.submit(['a', 'bb'], ['k1', 'k2']).result()
+    finally:
+        scheduler.shutdown()
+    assert vectors == [[1.0], [2.0]]
+    assert embeddings.calls == 2 and scheduler.stats['retried'] == 1
+
+
+def test_exhausted_rate_limit_propagates(tmp_path, monkeypatch):
+    monkeypatch.setattr('embedding_scheduler.time.sleep', lambda _: None)
+    embeddings = FailingEmbeddings(error=RateLimitError('429'))
+    scheduler = make_scheduler(embeddings, tmp_path)
+    try:
+        with pytest.raises(RateLimitError):
+            scheduler.submit(['a', 'b', 'c', 'd'], ['k1', 'k2', 'k3', 'k4']).result()
+    finally:
+        scheduler.shutdown()
+    # 나누어 다시 보내지 않고 처음 배치의 재시도만 하고 중단
+    assert embeddings.calls == 2
+    assert scheduler.stats['quarantined'] == 0
+    assert not (tmp_path / 'quarantine.jsonl').exists()
+
+
+def test_pack_respects_token_and_batch_limits(tmp_path):
+    scheduler = EmbeddingScheduler(FailingEmbeddings(), max_tokens_per_request=10, max_batch_size=3)
+    scheduler.count_tokens = len
+    try:
+        # 한도보다 긴 텍스트도 혼자 한 배치가 됨
+        assert scheduler.pack(['aaaa', 'bbbb', 'cc', 'd', 'e', 'f', 'g' * 12]) == [[0, 1, 2], [3, 4, 5], [6]]
+        assert scheduler.pack([]) == []
+    finally:
+        scheduler.shutdown()
@@ -0,0 +1,58 @@
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+
+from hybrid_search import HybridSearcher, reciprocal_rank_fusion, HYBRID, LEXICAL, VECTOR
+from lexical_index import BM25Index
+from stand_ins import FakeEmbeddings
+
+CORPUS = {
+    'refund': "결제 후 7일 안에 환불을 요청할 수 있습니다. 환불은 원래 결제 수단으로 돌아갑니다.",
+    'password': "비밀번호를 잊었다면 로그인 화면에서 비밀번호 재설정을 누르세요.",
+    'error': "앱 실행 시 ERR4021 오류가 나면 네트워크 설정을 확인하세요.",
+    'backup': "대화 백업은 설정의 백업 메뉴에서 켤 수 있습니다.",
+}
+
+
+def doc(key):
+    return Document(page_content=CORPUS[key], metadata={'source': key}, id=key)
+
+
+def test_rrf_rewards_documents_ranked_high_in_both_lists():
+    vector = [doc('refund'), doc('password'), doc('error')]
+    lexical = [doc('error'), doc('refund'), doc('backup')]
+
+    fused = reciprocal_rank_fusion([vector, lexical], k=4, rrf_k=60)
+
+    # refund: 1/61 + 1/62 > error: 1/63 + 1/61 > password: 1/62 > backup: 1/63
+    assert [d.id for d in fused] == ['refund', 'error', 'password', 'backup']
+    assert [d.id for d in reciprocal_rank_fusion([vector, lexical], k=2)] == ['refund', 'error']
+
+
+def test_bm25_ranks_term_matches_and_survives_save(tmp_path):
+    index = BM25Index.build(CORPUS.items())
+
+    assert index.search("환불 요청")[0][0] == 'refund'
+    assert index.search("ERR4021")[0][0] == 'error'
+    assert index.search("qwerty") == []
+
+    index.save(str(tmp_path / 'lexical'))
+    loaded = BM25Index.load(str(tmp_path / 'lexical'))
+    assert loaded.search("비밀번호 재설정") == index.search("비밀번호 재설정")
+
+
+def test_hybrid_searcher_fuses_vector_and_lexical_results(tmp_path):
+    embeddings = FakeEmbeddings()
+    db = Chroma(persist_directory=str(tmp_path / 'chroma'), embedding_function=embeddings)
+    db.add_documents([doc(key) for key in CORPUS], ids=list(CORPUS))
+    searcher = HybridSearcher(db, lexical_index=BM25Index.build(CORPUS.items()), fetch_k=4)
+    question = "ERR4021 오류"
+
+    docs, path = searcher.search(question, embeddings.embed_query(question), k=2)
+    assert path == HYBRID and docs[0].id == 'error'
+
+    # 질문 임베딩이 없으면 어휘 검색만, 어휘 인덱스가 없으면 벡터 검색만
+    docs, path = searcher.search(question, None, k=2)
+    assert path == LEXICAL and docs[0].id == 'error'
+    vector_only = HybridSearcher(db)
+    docs, path = vector_only.search(question, embeddings.embed_query(question), k=2)
+    assert path == VECTOR and len(docs) == 2
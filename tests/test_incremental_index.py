@@ -0,0 +1,78 @@
+from langchain_chroma import Chroma
+
+import load_db
+from load_db import DataLoader, GitBookLoader
+from index_manifest import IndexManifest
+from stand_ins import FakeEmbeddings, StandInServer
+
+
+def build(loader, directory):
+    manifest = IndexManifest(directory).load()
+    db = Chroma(persist_directory=directory, embedding_function=FakeEmbeddings())
+    loader.sync_db(db, loader.iter_documents(incremental=True), manifest, FakeEmbeddings())
+    return IndexManifest(directory).load().sources()
+
+
+def test_gitbook_failures_keep_existing_chunks(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(load_db, 'SPLIT_WORKERS', 1)
+    monkeypatch.setattr(load_db, 'SNAPSHOT_DIRECTORY', '')
+    directory = str(tmp_path / 'db')
+
+    with StandInServer() as server:
+        def make_loader(sitemap):
+            return DataLoader(confluence_url=server.confluence_url(2), username='', api_key='',
+                              space_key='BENCH', persist_directory=directory,
+                              gitbook_sitemap=sitemap, document_source='both')
+
+        sources = build(make_loader(server.sitemap_url(3)), directory)
+        gitbook_sources = {source for source in sources if '/wiki/' not in source}
+        assert len(sources) == 5 and len(gitbook_sources) == 3
+
+        # 한 페이지를 받지 못해도 그 페이지의 청크는 유지
+        failed = sorted(gitbook_sources)[1]
+        fetch_page = GitBookLoader.fetch_page
+
+        def flaky_fetch_page(self, url, lastmod=None):
+            if url == failed:
+                raise ConnectionError('connection reset')
+            return fetch_page(self, url, lastmod)
+
+        monkeypatch.setattr(GitBookLoader, 'fetch_page', flaky_fetch_page)
+        loader = make_loader(server.sitemap_url(3))
+        assert build(loader, directory) == sources
+        assert loader.retained_sources == {failed}
+
+        # 사이트맵을 읽지 못하면 Confluence 페이지만 받았더라도 GitBook 소스를 지우지 않음
+        assert build(make_loader(f"{server.base_url}/missing/sitemap.xml"), directory) == sources
+
+        # 사이트맵에서 실제로 빠진 페이지는 삭제
+        monkeypatch.setattr(GitBookLoader, 'fetch_page', fetch_page)
+        assert len(build(make_loader(server.sitemap_url(2)), directory)) == 4
+
+
+def test_rollback_restores_sync_state(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(load_db, 'SPLIT_WORKERS', 1)
+    monkeypatch.setattr(load_db, 'SNAPSHOT_DIRECTORY', '')
+
+    with StandInServer() as server:
+        def build():
+            loader = DataLoader(confluence_url=server.confluence_url(3), username='', api_key='',
+                                space_key='BENCH', persist_directory=str(tmp_path / 'db'),
+                                gitbook_sitemap=server.sitemap_url(2), document_source='both')
+            loader.set_db(FakeEmbeddings(), incremental=True)
+            return loader
+
+        first = build()
+        server.page_versions[1] = 2
+        assert sorted(build().confluence_sync.result.unchanged_pages) == ['0', '2']
+
+        # 롤백한 버전의 상태는 페이지 1의 이전 버전을 기억하므로 다음 증분 빌드에서 다시 가져옴
+        first.index_store.rollback()
+        assert sorted(build().confluence_sync.result.unchanged_pages) == ['0', '2']
+
+    for version in first.index_store.list_versions():
+        directory = first.index_store.version_path(version)
+        assert (tmp_path / directory / 'confluence_state.json').exists()
+        assert (tmp_path / directory / load_db.GITBOOK_CACHE_STATE_FILE_NAME).exists()
@@ -0,0 +1,58 @@
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+
+import load_db
+from load_db import DataLoader
+from index_manifest import IndexManifest
+from stand_ins import FakeEmbeddings
+
+
+def make_docs(count=12):
+    docs = []
+    for i in range(count):
+        sections = '\n\n'.join(
+            f"## {i}번 문서 {j}절\n\n" + ' '.join(f"{i}-{j}-{k}번 문장입니다. 환불과 백업 규정을 설명합니다." for k in range(12))
+            for j in range(3)
+        )
+        docs.append(Document(page_content=f"# {i}번 문서\n\n{sections}", metadata={'source': f"page-{i}", 'title': f"{i}번 문서"}))
+    return docs
+
+
+def make_loader(tmp_path, name):
+    return DataLoader(confluence_url='http://127.0.0.1/wiki', username='', api_key='', space_key='TEST',
+                      persist_directory=str(tmp_path / name), document_source='confluence')
+
+
+def chunks_of(docs):
+    return [(doc.page_content, doc.metadata) for doc in docs]
+
+
+def test_parallel_split_matches_serial_split(tmp_path, monkeypatch):
+    monkeypatch.setattr(load_db, 'SPLIT_PARALLEL_MIN_DOCUMENTS', 1)
+
+    monkeypatch.setattr(load_db, 'SPLIT_WORKERS', 1)
+    serial = make_loader(tmp_path, 'serial').split_docs(make_docs())
+    monkeypatch.setattr(load_db, 'SPLIT_WORKERS', 2)
+    parallel = make_loader(tmp_path, 'parallel').split_docs(make_docs())
+
+    assert len(serial) > len(make_docs())
+    assert chunks_of(parallel) == chunks_of(serial)
+
+
+def test_parallel_sync_stores_same_chunks_as_serial(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(load_db, 'SNAPSHOT_DIRECTORY', '')
+    # 앞의 2개 문서는 이 스레드에서, 나머지는 프로세스 풀에서 분할하여 두 경로가 섞이도록 함
+    monkeypatch.setattr(load_db, 'SPLIT_PARALLEL_MIN_DOCUMENTS', 2)
+
+    def build(name, workers):
+        monkeypatch.setattr(load_db, 'SPLIT_WORKERS', workers)
+        directory = str(tmp_path / name)
+        db = Chroma(persist_directory=directory, embedding_function=FakeEmbeddings())
+        make_loader(tmp_path, name).sync_db(db, iter(make_docs()), IndexManifest(directory).load(), FakeEmbeddings())
+        stored = db._collection.get(include=['documents', 'metadatas'])
+        manifest = IndexManifest(directory).load()
+        return (sorted(zip(stored['ids'], stored['documents'], stored['metadatas'])),
+                {source: manifest.get(source)['chunk_ids'] for source in manifest.sources()})
+
+    assert build('parallel', 2) == build('serial', 1)
@@ -0,0 +1,115 @@
+import time
+import asyncio
+import threading
+
+from server import HelpDeskServer
+
+
+class SlowModel:
+    """첫 토큰 뒤 오래 멈추는 스트리밍 답변과, '느린'이 든 질문만 오래 걸리는 일반 답변"""
+
+    index_version = 'test'
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def track(self, delta):
+        with self._lock:
+            self.running += delta
+            self.max_running = max(self.max_running, self.running)
+
+    def stream_retrieval_qa_inference(self, question):
+        self.track(1)
+        try:
+            yield ('token', '답변')
+            time.sleep(self.delay)
+            yield ('token', '늦은 토큰')
+        finally:
+            self.track(-1)
+
+    def retrieval_qa_inference(self, question, verbose=False):
+        self.track(1)
+        try:
+            if '느린' in question:
+                time.sleep(self.delay)
+            return '답변', ''
+        finally:
+            self.track(-1)
+
+
+async def request(port, raw):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(raw)
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    return data.decode('utf-8')
+
+
+def ask(body, stream=False, length=None):
+    data = body.encode('utf-8')
+    headers = f"Content-Length: {len(data) if length is None else length}\r\n"
+    if stream:
+        headers += "Accept: text/event-stream\r\n"
+    return f"POST /ask HTTP/1.1\r\nHost: test\r\nConnection: close\r\n{headers}\r\n".encode('latin-1') + data
+
+
+async def run(test, **kwargs):
+    model = SlowModel(1.0)
+    server = HelpDeskServer(host='127.0.0.1', port=0, model_factory=lambda: model, **kwargs)
+    await server.start()
+    while server.model is None:
+        await asyncio.sleep(0.01)
+    try:
+        return await test(server._server.sockets[0].getsockname()[1]), model
+    finally:
+        server._server.close()
+
+
+def test_invalid_content_length_is_bad_request():
+    async def test(port):
+        return await request(port, ask('{}', length='abc'))
+
+    response, _ = asyncio.run(run(test))
+    assert response.startswith('HTTP/1.1 400')
+
+
+def test_timed_out_stream_keeps_its_slot_until_the_producer_ends():
+    async def test(port):
+        started = time.monotonic()
+        streamed = await request(port, ask('{"question": "환불"}', stream=True))
+        elapsed = time.monotonic() - started
+        # 응답은 바로 끝나지만 생성 스레드가 아직 돌고 있으므로 한도 1에서는 다음 질문을 받지 않음
+        rejected = await request(port, ask('{"question": "환불"}'))
+        await asyncio.sleep(1.0)
+        answered = await request(port, ask('{"question": "환불"}'))
+        return streamed, elapsed, rejected, answered
+
+    (streamed, elapsed, rejected, answered), model = asyncio.run(
+        run(test, max_concurrency=1, queue_timeout=0.2, request_timeout=0.3)
+    )
+    assert 'event: error' in streamed
+    assert elapsed < 0.8
+    assert rejected.startswith('HTTP/1.1 503')
+    assert answered.startswith('HTTP/1.1 200')
+    assert model.max_running == 1
+
+
+def test_timed_out_answer_keeps_its_slot_until_the_worker_ends():
+    async def test(port):
+        timed_out = await request(port, ask('{"question": "느린 질문"}'))
+        rejected = await request(port, ask('{"question": "환불"}'))
+        await asyncio.sleep(1.0)
+        answered = await request(port, ask('{"question": "환불"}'))
+        return timed_out, rejected, answered
+
+    (timed_out, rejected, answered), model = asyncio.run(
+        run(test, max_concurrency=1, queue_timeout=0.2, request_timeout=0.3)
+    )
+    assert timed_out.startswith('HTTP/1.1 504')
+    assert rejected.startswith('HTTP/1.1 503')
+    assert answered.startswith('HTTP/1.1 200')
+    assert model.max_running == 1
@@ -0,0 +1,122 @@
+import time
+import threading
+
+import pytest
+
+from singleflight import SingleFlight
+from stand_ins import FakeStreamingChatModel
+
+
+def run_threads(count, target):
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def run(i):
+        barrier.wait()
+        results[i] = target()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+    return results
+
+
+def test_stream_runs_source_once_and_replays_to_late_consumers():
+    singleflight = SingleFlight()
+    started = []
+
+    def source():
+        started.append(1)
+        for i in range(3):
+            time.sleep(0.05)
+            yield i
+
+    first, shared = singleflight.stream('q', source)
+    assert not shared and next(first) == 0
+    second, shared = singleflight.stream('q', source)
+    assert shared
+    assert list(second) == [0, 1, 2]
+    assert list(first) == [1, 2]
+    assert len(started) == 1 and singleflight.in_flight() == 0
+
+
+def test_stream_error_reaches_every_consumer_and_close_stops_source():
+    singleflight = SingleFlight()
+
+    def failing():
+        yield 'a'
+        raise RuntimeError('llm down')
+
+    first, _ = singleflight.stream('q', failing)
+    second, _ = singleflight.stream('q', failing)
+    for events in (first, second):
+        assert next(events) == 'a'
+        with pytest.raises(RuntimeError):
+            next(events)
+
+    closed = []
+
+    def endless():
+        try:
+            while True:
+                yield 'x'
+        finally:
+            closed.append(1)
+
+    events, _ = singleflight.stream('r', endless)
+    next(events)
+    events.close()
+    assert closed == [1] and singleflight.in_flight() == 0
+
+
+def test_concurrent_streams_share_one_llm_call(make_help_desk):
+    # 전체 테스트를 함께 돌릴 때 늦게 출발한 스레드도 생성이 끝나기 전에 합류하도록 넉넉히 지연
+    llm = FakeStreamingChatModel(answer_words=5, first_token_delay=1.0, token_delay=0.01)
+    model = make_help_desk(llm)
+    model.answer_cache = None
+
+    results = run_threads(5, lambda: list(model.stream_retrieval_qa_inference("환불은 어떻게 하나요?")))
+
+    assert len(llm.prompts) == 1
+    assert all(result == results[0] for result in results)
+    assert sum(1 for kind, _ in results[0] if kind == "token") == 5
+
+
+def test_do_runs_function_once_for_concurrent_callers():
+    singleflight = SingleFlight()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return 'answer'
+
+    results = run_threads(8, lambda: singleflight.do('q', compute))
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False] + [True] * 7
+    assert all(result == 'answer' for result, _ in results)
+
+
+def test_concurrent_questions_share_one_llm_call(make_help_desk):
+    llm = FakeStreamingChatModel(answer_words=5, first_token_delay=1.0)
+    model = make_help_desk(llm)
+    model.answer_cache = None
+
+    # 공백/대소문자만 다른 질문은 같은 키로 합쳐짐
+    questions = ["환불은 어떻게 하나요?", "  환불은  어떻게 하나요?", "환불은 어떻게 하나요? "] * 3
+    pending = iter(questions)
+    lock = threading.Lock()
+
+    def ask():
+        with lock:
+            question = next(pending)
+        return model.retrieval_qa_inference(question, verbose=False)
+
+    results = run_threads(len(questions), ask)
+
+    assert len(llm.prompts) == 1
+    assert model.singleflight.stats['shared'] == len(questions) - 1
+    assert all(result == results[0] for result in results)
@@ -0,0 +1,58 @@
+from langchain_core.documents import Document
+from langchain_chroma import Chroma
+
+import load_db
+from load_db import DataLoader
+from index_manifest import IndexManifest
+from snapshot_store import SnapshotStore
+from stand_ins import FakeEmbeddings, StandInServer
+
+
+def use_snapshots(monkeypatch, tmp_path, directory=''):
+    monkeypatch.setattr(load_db, 'SPLIT_WORKERS', 1)
+    monkeypatch.setattr(load_db, 'SNAPSHOT_DIRECTORY', directory)
+    monkeypatch.setattr(load_db, 'PATH_NAME_SPLITTER', str(tmp_path / 'snapshots.jsonl'))
+
+
+def test_unchanged_confluence_pages_are_snapshotted(tmp_path, monkeypatch):
+    use_snapshots(monkeypatch, tmp_path)
+    with StandInServer() as server:
+        def make_loader():
+            return DataLoader(confluence_url=server.confluence_url(3), username='', api_key='',
+                              space_key='BENCH', persist_directory=str(tmp_path / 'db'),
+                              document_source='confluence')
+
+        # 스냅숏 없이 한 번 동기화한 뒤 스냅숏을 켜면 모든 페이지가 '바뀌지 않음'
+        loader = make_loader()
+        assert len(list(loader.iter_documents(incremental=True))) == 3
+        loader.confluence_sync.save_state()
+
+        monkeypatch.setattr(load_db, 'SNAPSHOT_DIRECTORY', str(tmp_path / 'snapshots'))
+        loader = make_loader()
+        docs = list(loader.iter_documents(incremental=True))
+        assert len(loader.confluence_sync.result.unchanged_pages) == 3
+
+    assert len(docs) == 3
+    assert loader.retained_sources == set()
+    assert sorted(loader.snapshot_store.entries) == sorted(doc.metadata['source'] for doc in docs)
+
+
+def test_snapshot_mode_keeps_sources_without_snapshot(tmp_path, monkeypatch):
+    use_snapshots(monkeypatch, tmp_path, str(tmp_path / 'snapshots'))
+    directory = str(tmp_path / 'db')
+    pages = [Document(page_content=f"# {name}\n\n{name} 페이지 본문입니다.", metadata={'source': name})
+             for name in ('a', 'b')]
+
+    def build(loader, docs):
+        manifest = IndexManifest(directory).load()
+        db = Chroma(persist_directory=directory, embedding_function=FakeEmbeddings())
+        loader.sync_db(db, docs, manifest, FakeEmbeddings())
+        return IndexManifest(directory).load().sources()
+
+    assert build(DataLoader(persist_directory=directory, document_source='gitbook'), pages) == {'a', 'b'}
+
+    store = SnapshotStore(load_db.SNAPSHOT_DIRECTORY, load_db.PATH_NAME_SPLITTER)
+    store.put_page('a', pages[0])
+    store.save()
+    loader = DataLoader(persist_directory=directory, document_source='snapshot')
+    assert build(loader, loader.iter_documents()) == {'a', 'b'}
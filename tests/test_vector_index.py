@@ -0,0 +1,61 @@
+import os
+
+from langchain_chroma import Chroma
+
+import vector_index
+import lexical_index
+from vector_index import NumpyVectorIndex
+from stand_ins import FakeEmbeddings
+
+
+def make_db(tmp_path):
+    db = Chroma(persist_directory=str(tmp_path / 'chroma'), embedding_function=FakeEmbeddings())
+    db.add_texts([f"{i}번 문서: 환불 규정 안내" for i in range(6)], metadatas=[{'source': str(i)} for i in range(6)])
+    return db
+
+
+def test_close_waits_for_searches_in_progress(tmp_path):
+    db = make_db(tmp_path)
+    directory = str(tmp_path / 'vector_index')
+    vector_index.export_collection(db._collection, directory)
+    assert [name for name in os.listdir(tmp_path) if name.endswith('.tmp')] == []
+    index = NumpyVectorIndex(directory, preload=True)
+    query = FakeEmbeddings().embed_query("환불 규정")
+
+    # 교체 직전에 검색기를 가져간 요청이 끝날 때까지 파일을 닫지 않음
+    with index._in_use():
+        index.close()
+        assert not index.closed
+        assert len(index.search_batch([query], k=2)[0]) == 2
+    assert index.closed and index.vectors is None
+
+    # 닫힌 뒤 늦게 도착한 검색은 다시 열어 답하고 곧바로 놓음
+    assert len(index.similarity_search_by_vector(query, k=3)) == 3
+    assert index.closed and index._documents_file.closed
+
+
+def test_serving_does_not_write_into_version_directory(tmp_path):
+    db = make_db(tmp_path)
+    persist_directory = str(tmp_path / 'version')
+    os.makedirs(persist_directory)
+
+    assert vector_index.load(db, persist_directory) is None
+    index = lexical_index.load_or_build(db, persist_directory)
+    assert index.count == 6
+    assert os.listdir(persist_directory) == []
+
+    # 빌더가 내보낸 것은 그대로 열고, 컬렉션과 맞지 않으면 다시 내보내지 않고 None
+    vector_index.export_collection(db._collection, os.path.join(persist_directory, vector_index.VECTOR_INDEX_DIRECTORY_NAME))
+    assert vector_index.load(db, persist_directory).count == 6
+    assert vector_index.load(db, persist_directory, dtype='int8') is None
+
+
+def test_swapping_index_closes_previous_searcher(make_help_desk):
+    model = make_help_desk(None)
+    previous = model.searcher
+    closed = []
+    previous.close = lambda: closed.append(1)
+
+    model.set_db(model.db, model.index_version)
+
+    assert model.searcher is not previous and closed == [1]